@@ -0,0 +1,12 @@
+r"""
+Benchmarks of the stages of `iokectools` and of entire evaluations.
+
+The benchmarks follow the conventions of airspeed velocity (asv), i.e., classes with
+`setup`, `params` and methods `time_*` (wall time) and `peakmem_*` (peak memory),
+and can be run without further dependencies from the `scripts` folder with::
+
+    python -m benchmarks run
+    python -m benchmarks compare <commit> <commit>
+
+The results are stored for each commit in `benchmarks/results` (see `benchmarks.__main__`).
+"""
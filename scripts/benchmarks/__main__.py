@@ -0,0 +1,227 @@
+r"""
+Runs the benchmarks and compares the results of different commits.
+
+The wall time of a `time_*` benchmark is the minimum (and the median) of `--repeat` calls,
+where `setup` is called before each call. The peak memory of a `peakmem_*` benchmark
+is the peak of the memory allocated during a single call as traced by `tracemalloc`,
+which includes the data of NumPy arrays.
+
+The results are stored in `benchmarks/results/<commit>.json`, where the commit is
+the current commit of the repository (or `--name`)::
+
+    python -m benchmarks run --filter Baseline
+    python -m benchmarks compare 2291aac HEAD
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+package = os.path.dirname(os.path.abspath(__file__))
+results_folder = os.path.join(package, "results")
+
+sys.path.insert(0, os.path.dirname(package))
+
+
+def commit(revision="HEAD"):
+    r"""
+    Returns the abbreviated hash of a commit of the repository containing the benchmarks.
+    """
+    return subprocess.run(
+        ["git", "rev-parse", "--short", revision], cwd=package, capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def parameters(suite):
+    r"""
+    Returns a list of the tuples of parameters of a suite, as defined by `params` in asv.
+    """
+    params = getattr(suite, "params", None)
+    if params is None:
+        return [()]
+    if isinstance(params, tuple) or (params and isinstance(params[0], list)):
+        return list(itertools.product(*params))
+    return [(param,) for param in params]
+
+
+def benchmarks(pattern=None):
+    r"""
+    Yields the name, the suite and the name of the method of each benchmark matching `pattern`.
+    """
+    for module in pkgutil.iter_modules([package]):
+        if not module.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{module.name}")
+        for suite_name, suite in inspect.getmembers(module, inspect.isclass):
+            if suite.__module__ != module.__name__ or suite_name.startswith("_"):
+                continue
+            for method in dir(suite):
+                if not method.startswith(("time_", "peakmem_")):
+                    continue
+                name = f"{module.__name__.split('.')[-1]}.{suite_name}.{method}"
+                if pattern and not re.search(pattern, name):
+                    continue
+                yield name, suite, method
+
+
+def measure(suite, method, params, repeat):
+    r"""
+    Returns the measured wall times in s or the peak memory in bytes of a benchmark.
+    Returns `None` if the benchmark is skipped by raising `NotImplementedError` in `setup`.
+    """
+    calls = repeat if method.startswith("time_") else 1
+
+    values = []
+    for _ in range(calls):
+        with contextlib.redirect_stdout(io.StringIO()):
+            value = _call(suite, method, params)
+        if value is None:
+            return None
+        values.append(value)
+
+    return values
+
+
+def _call(suite, method, params):
+    r"""
+    Returns the wall time or peak memory of a single call of a benchmark after calling `setup`.
+    """
+    instance = suite()
+    try:
+        if hasattr(instance, "setup"):
+            instance.setup(*params)
+    except NotImplementedError:
+        return None
+
+    if method.startswith("time_"):
+        start = time.perf_counter()
+        getattr(instance, method)(*params)
+        value = time.perf_counter() - start
+    else:
+        tracemalloc.start()
+        getattr(instance, method)(*params)
+        value = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if hasattr(instance, "teardown"):
+        instance.teardown(*params)
+
+    return value
+
+
+def run(pattern=None, repeat=5, name=None):
+    r"""
+    Runs the benchmarks matching `pattern` and stores the results.
+    """
+    import numpy
+    import pandas
+    import scipy
+
+    name = name or commit()
+    path = os.path.join(results_folder, f"{name}.json")
+
+    results = {}
+    if os.path.exists(path):
+        with open(path) as file:
+            results = json.load(file)["results"]
+
+    for benchmark, suite, method in benchmarks(pattern):
+        for params in parameters(suite):
+            key = f"{benchmark}({', '.join(str(param) for param in params)})"
+            values = measure(suite, method, params, repeat)
+            if values is None:
+                print(f"{key:<90} skipped")
+                continue
+
+            if method.startswith("time_"):
+                results[key] = {"time": min(values), "median": statistics.median(values), "repeat": len(values)}
+                print(f"{key:<90} {format_value(key, results[key]['time'])}")
+            else:
+                results[key] = {"peakmem": values[0]}
+                print(f"{key:<90} {format_value(key, values[0])}")
+
+    os.makedirs(results_folder, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({
+            "commit": name,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "machine": {"platform": platform.platform(), "processor": platform.processor(), "cpus": os.cpu_count()},
+            "versions": {"python": platform.python_version(), "numpy": numpy.__version__, "pandas": pandas.__version__, "scipy": scipy.__version__},
+            "results": results,
+        }, file, indent=1)
+    print(f"Stored the results in {path}.")
+
+
+def load(name):
+    r"""
+    Returns the results of a commit, given by a revision or the name of a result file.
+    """
+    path = os.path.join(results_folder, f"{name}.json")
+    if not os.path.exists(path):
+        try:
+            path = os.path.join(results_folder, f"{commit(name)}.json")
+        except subprocess.CalledProcessError:
+            raise FileNotFoundError(f"No results for `{name}` in {results_folder}.")
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def format_value(key, value):
+    if ".peakmem_" in key:
+        return f"{value / 2**20:10.2f} MiB"
+    return f"{value * 1000:10.2f} ms"
+
+
+def compare(before, after, factor=1.1):
+    r"""
+    Prints the results of two commits, marking benchmarks which changed by more than `factor`.
+    """
+    before, after = load(before), load(after)
+
+    for key in sorted(set(before) | set(after)):
+        values = [results.get(key) for results in (before, after)]
+        values = [None if value is None else value.get("time", value.get("peakmem")) for value in values]
+        if None in values:
+            print(f"{key:<90} {'':>14} {'':>14}   only in one result")
+            continue
+
+        ratio = values[1] / values[0] if values[0] else float("inf")
+        mark = "+" if ratio > factor else "-" if ratio < 1 / factor else " "
+        print(f"{mark} {key:<88} {format_value(key, values[0])} {format_value(key, values[1])} {ratio:6.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks of iokectools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and store the results of the current commit")
+    run_parser.add_argument("--filter", help="a regular expression selecting the benchmarks by name")
+    run_parser.add_argument("--repeat", type=int, default=5, help="the number of calls of each time benchmark")
+    run_parser.add_argument("--name", help="the name of the results instead of the current commit")
+
+    compare_parser = commands.add_parser("compare", help="compare the results of two commits")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--factor", type=float, default=1.1, help="the ratio of a significant change")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args.filter, repeat=args.repeat, name=args.name)
+    else:
+        compare(args.before, args.after, factor=args.factor)
+
+
+if __name__ == "__main__":
+    main()
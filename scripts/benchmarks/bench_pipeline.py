@@ -0,0 +1,80 @@
+r"""
+Benchmarks of entire evaluations with `BatchIntegration` and `charge_statistics`.
+"""
+from .common import clear_caches, grids, sizes, synthetic_experiment
+
+
+class BatchIntegrationSuite:
+    r"""
+    The evaluation of the charges of all cycles of an experiment, starting from the cached cycle files.
+    """
+
+    params = list(sizes)
+    param_names = ["size"]
+
+    # whether the charges are stored and reused (see `iokectools.results`)
+    cache = False
+
+    def setup(self, size):
+        from iokectools.cycle_description import CycleDescription
+
+        self.experiment = synthetic_experiment(sizes[size])
+        # Parses the cycle files once, such that the columnar cache is used by the benchmarks.
+        [cycle["df"] for cycle in CycleDescription(self.experiment, usecols="pipeline").cycle_description.values()]
+        clear_caches()
+
+    def _evaluate(self):
+        from iokectools.batchintegration import BatchIntegration
+        from iokectools.cycle_description import CycleDescription
+
+        return BatchIntegration(CycleDescription(self.experiment, usecols="pipeline"), cache=self.cache).df
+
+    def time_batchintegration(self, size):
+        self._evaluate()
+
+    def peakmem_batchintegration(self, size):
+        self._evaluate()
+
+
+class StoredResultsSuite(BatchIntegrationSuite):
+    r"""
+    Evaluating the charges of all cycles of an experiment again, where the charges of all cycles
+    have been stored by a previous evaluation (see `iokectools.results`).
+    """
+
+    cache = True
+
+    def setup(self, size):
+        super().setup(size)
+        self._evaluate()
+        clear_caches(results=False)
+
+
+class ChargeStatisticsSuite:
+    r"""
+    Sweeps of the time shift and the K pre-factor of a medium sized experiment with `charge_statistics`,
+    evaluating the pipeline for every K or all Ks of a time shift at once (`analytic_K`).
+    """
+
+    params = (list(grids), [False, True])
+    param_names = ["grid", "analytic_K"]
+
+    def setup(self, grid, analytic_K):
+        from iokectools.cycle_description import CycleDescription
+
+        self.experiment = synthetic_experiment(sizes["medium"])
+        [cycle["df"] for cycle in CycleDescription(self.experiment, usecols="pipeline").cycle_description.values()]
+        clear_caches()
+
+    def _evaluate(self, grid, analytic_K):
+        from iokectools.charge_statistics import charge_statistics
+        from iokectools.cycle_description import CycleDescription
+
+        time_shifts, K_shifts = grids[grid]
+        return charge_statistics(CycleDescription(self.experiment, usecols="pipeline"), time_shifts=time_shifts, K_shifts=K_shifts, analytic_K=analytic_K).df_short
+
+    def time_charge_statistics(self, grid, analytic_K):
+        self._evaluate(grid, analytic_K)
+
+    def peakmem_charge_statistics(self, grid, analytic_K):
+        self._evaluate(grid, analytic_K)
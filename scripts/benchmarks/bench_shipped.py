@@ -0,0 +1,78 @@
+r"""
+Benchmarks with the data shipped in the `data` folder, which is read directly from the ZIP archives,
+and the segmentation of measurement files into cycles.
+"""
+import os
+
+from .common import clear_caches, shipped_data
+
+
+class ShippedDataSuite:
+    r"""
+    Reading the CV and DEMS traces of Pt(111) from `data/Pt111.zip` and detecting their cycles.
+    """
+
+    params = ["parse", "cached"]
+    param_names = ["source"]
+
+    files = [
+        "Pt111/20150129_Pt111_1125ul_10mVs_c2_c3_COOR.csv",
+        "Pt111/20150129_Pt111_1125ul_10mVs_c2_c3_DEMS.csv",
+    ]
+
+    def setup(self, source):
+        from iokectools.cache import read_csv
+
+        archive = os.path.join(shipped_data, "Pt111.zip")
+        if not os.path.exists(archive):
+            raise NotImplementedError(f"The shipped data {archive} is not available.")
+
+        self.paths = [os.path.join(archive, file) for file in self.files]
+        clear_caches()
+        if source == "cached":
+            for path in self.paths:
+                read_csv(path)
+
+    def _read(self, source):
+        from iokectools.cache import read_csv
+
+        return [read_csv(path, cache=source == "cached") for path in self.paths]
+
+    def time_read(self, source):
+        self._read(source)
+
+    def peakmem_read(self, source):
+        self._read(source)
+
+    def time_vertices(self, source):
+        import pandas as pd
+
+        from iokectools.segment import vertices
+
+        for df in self._read(source):
+            # The first row contains the units of the columns.
+            vertices(pd.to_numeric(df["E"].iloc[1:]).to_numpy(), hysteresis=0.05)
+
+
+class SegmentSuite:
+    r"""
+    Segmenting the potential trace of a measurement file with `cycles` noisy cycles.
+    """
+
+    params = [10, 100, 1000]
+    param_names = ["cycles"]
+
+    def setup(self, cycles):
+        from iokectools.synthetic import SyntheticExperiment
+
+        self.potential = SyntheticExperiment(cycles=cycles, vertices=[1.2] * cycles, potential_noise=0.002).potential
+
+    def time_cycle_ranges(self, cycles):
+        from iokectools.segment import cycle_ranges
+
+        cycle_ranges(self.potential)
+
+    def peakmem_cycle_ranges(self, cycles):
+        from iokectools.segment import cycle_ranges
+
+        cycle_ranges(self.potential)
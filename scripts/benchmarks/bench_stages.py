@@ -0,0 +1,131 @@
+r"""
+Benchmarks of the individual stages of the evaluation of the cycles of an experiment.
+"""
+from .common import clear_caches, sizes, synthetic_experiment
+
+
+class WorkingFilesSuite:
+    r"""
+    Loading the cycle files, parsing the CSV or from the columnar cache.
+    """
+
+    params = (list(sizes), ["parse", "cached"])
+    param_names = ["size", "source"]
+
+    def setup(self, size, source):
+        from iokectools.workingfiles import WorkingFiles
+
+        self.experiment = synthetic_experiment(sizes[size])
+        self.files = [f"{self.experiment['experiment name']}{cycle}.csv" for cycle in self.experiment["cycles"]]
+        clear_caches()
+        if source == "cached":
+            WorkingFiles(self.experiment["data folder"], self.files).create_concat_df()
+
+    def _load(self, source):
+        from iokectools.workingfiles import WorkingFiles
+
+        return WorkingFiles(self.experiment["data folder"], self.files, cache=source == "cached").create_concat_df()
+
+    def time_load(self, size, source):
+        self._load(source)
+
+    def peakmem_load(self, size, source):
+        self._load(source)
+
+
+class _CycleStage:
+    r"""
+    Provides the data of the cycles of a synthetic experiment in `self.dfs`.
+    """
+
+    params = list(sizes)
+    param_names = ["size"]
+
+    def setup(self, size):
+        from iokectools.cycle_description import CycleDescription
+
+        self.cycle_description = CycleDescription(synthetic_experiment(sizes[size]), usecols="pipeline")
+        self.dfs = [cycle["df"] for cycle in self.cycle_description.cycle_description.values()]
+        clear_caches()
+
+
+class BaselineSuite(_CycleStage):
+    def time_baseline(self, size):
+        from iokectools.baseline import Baseline
+
+        for df in self.dfs:
+            Baseline(df).df
+
+    def time_baseline_als(self, size):
+        from iokectools.baseline import Baseline
+
+        for df in self.dfs:
+            Baseline(df, als={}).df
+
+
+class TimeshiftSuite(_CycleStage):
+    def setup(self, size):
+        from iokectools.baseline import Baseline
+
+        super().setup(size)
+        self.dfs = [Baseline(df).df for df in self.dfs]
+
+    def time_timeshift(self, size):
+        from iokectools.timeshift import Timeshift
+
+        for df in self.dfs:
+            Timeshift(df, K_prefactor=1.0, K_power=1e-6, interval=0.4).df
+
+    def time_estimate_delay(self, size):
+        from iokectools.delay import estimate_delay
+
+        for df in self.dfs:
+            estimate_delay(df["time"], df["current1_muA_geo"], df["ion_current_M44_UVS_ALS_sub_norm_filt"])
+
+
+class COIntegralSuite(_CycleStage):
+    def setup(self, size):
+        from iokectools.baseline import Baseline
+        from iokectools.timeshift import Timeshift
+
+        super().setup(size)
+        self.dfs = [Timeshift(Baseline(df).df, K_prefactor=1.0, K_power=1e-6, interval=0.4).df for df in self.dfs]
+
+    def time_cointegral(self, size):
+        from iokectools.integrate import COIntegral
+
+        for df in self.dfs:
+            COIntegral(df, K=1e-6).summary()
+
+    def time_ksweep(self, size):
+        from iokectools.integrate import KSweep
+
+        Ks = [K * 1e-6 for K in (0.9, 0.95, 1.0, 1.05, 1.1)]
+        for df in self.dfs:
+            KSweep(df, Ks).summaries
+
+
+class ALSSuite:
+    r"""
+    The ALS baseline correction of ion currents of a measurement file.
+    """
+
+    params = [2000, 20000, 200000]
+    param_names = ["points"]
+
+    def setup(self, points):
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        x = np.linspace(0, 1, points)
+        self.y = 1e-10 * (x + np.exp(-((x - 0.5) / 0.01) ** 2)) + rng.normal(0, 1e-13, points)
+
+    def time_baseline_als(self, points):
+        from iokectools.als import baseline_als
+
+        baseline_als(self.y, 1e8, 1e-6, niter=15)
+
+    def peakmem_baseline_als(self, points):
+        from iokectools.als import baseline_als
+
+        baseline_als(self.y, 1e8, 1e-6, niter=15)
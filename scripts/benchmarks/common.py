@@ -0,0 +1,59 @@
+r"""
+Inputs shared by the benchmarks: synthetic experiments of different sizes and the data shipped in `data`.
+
+The synthetic cycles are written once per process to a temporary folder, which also contains the
+columnar cache of `iokectools.cache`, such that the benchmarks do not depend on the cache of the user.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+
+folder = tempfile.mkdtemp(prefix="iokectools_benchmarks_")
+atexit.register(shutil.rmtree, folder, ignore_errors=True)
+os.environ.setdefault("IOKECTOOLS_CACHE", os.path.join(folder, "cache"))
+
+shipped_data = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data")
+
+experiment_name = "synthetic_c_"
+
+# the number of cycles of the small, medium and large experiments
+sizes = {"small": 4, "medium": 16, "large": 64}
+
+# the time shifts and K shifts of the small, medium and large sweeps of `charge_statistics`
+grids = {
+    "small": ([0.4], [0]),
+    "medium": ([0.35, 0.4, 0.45], [-0.02, 0, 0.02]),
+    "large": ([0.3, 0.35, 0.4, 0.45, 0.5], [-0.04, -0.02, 0, 0.02, 0.04]),
+}
+
+
+@lru_cache(maxsize=None)
+def synthetic_experiment(cycles):
+    r"""
+    Returns the experiment description of a `synthetic.SyntheticExperiment` with `cycles` cycles,
+    which are written to CSV files and the columnar cache.
+    """
+    from iokectools.synthetic import SyntheticExperiment
+
+    return SyntheticExperiment(cycles=cycles).to_csv(os.path.join(folder, f"synthetic_{cycles}"), experiment_name=experiment_name)
+
+
+def clear_caches(results=True):
+    r"""
+    Removes the results shared between instances of the stages, such that a benchmark evaluates the entire stage.
+    The columnar cache of parsed CSV files on disk is kept, as are the stored charges of `iokectools.results`
+    unless `results` is set.
+    """
+    from iokectools import results as stored
+    from iokectools.baseline import Baseline
+    from iokectools.folderindex import FolderIndex
+    from iokectools.timeshift import Timeshift
+
+    Baseline._cache.clear()
+    Timeshift._aligned.clear()
+    FolderIndex._indexes.clear()
+    stored._file_hashes.clear()
+    if results:
+        stored.clear()
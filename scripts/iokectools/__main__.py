@@ -0,0 +1,201 @@
+r"""
+Evaluates the experiment descriptions of `experiments.py` without Jupyter, e.g., on a compute node.
+
+The experiment descriptions and integration limits are referenced by their name in the definitions
+(`--definitions`, by default `experiments.py` in the current folder) or as `<file>:<name>`.
+For each experiment description, `integrate` writes the charges of each cycle (`BatchIntegration.df`)
+to `<name>.csv` and `statistics` writes the charges of all overviews (`charge_statistics.df`)
+to `<name>_statistics.csv` and their means per vertex potential (`charge_statistics.df_short`)
+to `<name>_statistics_short.csv` in the `--output` folder::
+
+    python -m iokectools integrate experiment_description_1 --limits integration_limits_1ML
+    python -m iokectools statistics experiment_description_1 --limits integration_limits_1ML \
+        --time-shifts -0.45 -0.4 -0.35 --K-shifts -0.01 0 0.01 --workers 8 --format parquet
+
+The ALS baseline correction of the ion current (`--als`) is provided as JSON, e.g.,
+`--als '{"lam": 1e8, "p": 1e-6, "niter": 15}'`, and the bins of the vertex potentials
+(`--vertex-bins`, see `vertex.VertexBins`) by their width, the center of the first bin and their count.
+With `--trace`, the time spent in the stages of the evaluation is written to `<trace>_stages.<format>`.
+The interval of `integrate` (`--interval`) is a time shift or `auto` to estimate it for each cycle
+(see `delay.estimate_intervals`). Only `statistics` evaluates its overviews in several processes (`--workers`).
+
+Neither matplotlib nor the widgets of the notebooks are imported.
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+
+logger = logging.getLogger("iokectools")
+
+
+def load_definition(reference, definitions="experiments.py"):
+    r"""
+    Returns the object `<name>` defined in `definitions` or in `<file>` for a reference `<file>:<name>`.
+    """
+    import runpy
+
+    path, _, name = reference.rpartition(":")
+    path = path or definitions
+
+    namespace = _definitions.get(path)
+    if namespace is None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"The definitions {path} do not exist.")
+        namespace = _definitions[path] = runpy.run_path(path)
+
+    if name not in namespace:
+        raise KeyError(f"`{name}` is not defined in {path}.")
+    return namespace[name]
+
+
+# the namespaces of the loaded definitions
+_definitions = {}
+
+
+def experiment_description(reference, definitions="experiments.py", data_folder=None):
+    r"""
+    Returns a copy of the experiment description `reference`, read from `data_folder` if provided.
+    """
+    experiment_description = copy.deepcopy(load_definition(reference, definitions))
+    if data_folder is not None:
+        experiment_description["data folder"] = data_folder
+    return experiment_description
+
+
+def write(df, path, format="csv", index=False):
+    r"""
+    Writes a dataframe to `path` with the suffix of `format`, and returns the path.
+    """
+    path = f"{path}.{format}"
+    if format == "parquet":
+        df.to_parquet(path, index=index)
+    else:
+        df.to_csv(path, index=index)
+    logger.info("Wrote %s.", path)
+    return path
+
+
+def interval(value):
+    r"""
+    Returns the interval of `--interval`, i.e., a float or `'auto'`.
+    """
+    if value == "auto":
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid interval: {value!r} is neither a number nor 'auto'")
+
+
+def integrate(args):
+    from .batchintegration import BatchIntegration
+    from .cycle_description import CycleDescription
+
+    for name, experiment_description in args.experiments.items():
+        overview = BatchIntegration(CycleDescription(experiment_description, usecols="pipeline"), cathodic_limit=args.cathodic_limit, interval=args.interval,
+                                    K_modifier=args.K_modifier, fixed_K=args.fixed_K, limits=args.limits, als=args.als,
+                                    vertex_bins=args.vertex_bins, cache=args.cache)
+        # The cycle is a column of the charges as well as their index.
+        write(overview.df, os.path.join(args.output, name), args.format)
+
+
+def statistics(args):
+    from .charge_statistics import charge_statistics
+    from .cycle_description import CycleDescription
+
+    for name, experiment_description in args.experiments.items():
+        statistics = charge_statistics(CycleDescription(experiment_description, usecols="pipeline"), cathodic_limit=args.cathodic_limit, time_shifts=args.time_shifts, K_shifts=args.K_shifts, fixed_Ks=args.fixed_Ks,
+                                       vertex_limit_lower=args.vertex_limit_lower, vertex_limit_upper=args.vertex_limit_upper, test=args.test, limits=args.limits,
+                                       analytic_K=args.analytic_K, workers=args.workers, als=args.als, vertex_bins=args.vertex_bins, cache=args.cache)
+        name = os.path.join(args.output, name)
+        write(statistics.df, f"{name}_statistics", args.format)
+        write(statistics.df_short, f"{name}_statistics_short", args.format)
+
+
+def _parquet():
+    r"""
+    Returns whether an engine to write Parquet files is installed.
+    """
+    from importlib.util import find_spec
+
+    return any(find_spec(engine) is not None for engine in ["pyarrow", "fastparquet"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m iokectools", description="Evaluates the charges of the experiment descriptions of experiments.py.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("experiments", nargs="+", help="the names of the experiment descriptions, or <file>:<name>")
+    common.add_argument("--definitions", default="experiments.py", help="the file defining the experiment descriptions and integration limits")
+    common.add_argument("--limits", help="the name of the integration limits, or <file>:<name>; by default the regions are integrated without limits")
+    common.add_argument("--data-folder", help="the data folder replacing the `data folder` of the experiment descriptions")
+    common.add_argument("--cathodic-limit", type=float)
+    common.add_argument("--output", default=".", help="the folder of the summary tables")
+    common.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    common.add_argument("--als", type=json.loads, help="the parameters of the ALS baseline correction of the ion current as JSON; by default the corrected ion current of the data is used")
+    common.add_argument("--vertex-bins", type=float, nargs=3, metavar=("WIDTH", "ORIGIN", "COUNT"), help="the bins of the vertex potentials (see `vertex.VertexBins`)")
+    common.add_argument("--cache", action="store_true", help="reuse the charges of cycles stored by a previous evaluation (see `results`)")
+    common.add_argument("--trace", help="write a Chrome trace of the stages of the evaluation to this file (see `instrument`)")
+    common.add_argument("-v", "--verbose", action="count", default=0, help="log progress (-v) and details (-vv)")
+
+    integrate_parser = commands.add_parser("integrate", parents=[common], help="evaluate the charges of each cycle with BatchIntegration")
+    integrate_parser.add_argument("--interval", type=interval, help="the time shift or 'auto' to estimate it for each cycle; by default the interval of the experiment description")
+    integrate_parser.add_argument("--K-modifier", type=float, default=0)
+    integrate_parser.add_argument("--fixed-K", type=float)
+    integrate_parser.set_defaults(evaluate=integrate)
+
+    statistics_parser = commands.add_parser("statistics", parents=[common], help="evaluate the charges for combinations of time shifts and K with charge_statistics")
+    statistics_parser.add_argument("--time-shifts", type=float, nargs="+", default=[-0.3, -0.35, -0.4, -0.45])
+    statistics_parser.add_argument("--K-shifts", type=float, nargs="+", default=[-0.02, 0, 0.02])
+    statistics_parser.add_argument("--fixed-Ks", type=float, nargs="+", default=[])
+    statistics_parser.add_argument("--vertex-limit-lower", type=float)
+    statistics_parser.add_argument("--vertex-limit-upper", type=float)
+    statistics_parser.add_argument("--test", action="store_true", help="reject overviews violating `charge_statistics.boundary_conditions`")
+    statistics_parser.add_argument("--analytic-K", action="store_true", help="evaluate all K of a time shift at once (see `BatchIntegration.sweep_K`)")
+    statistics_parser.add_argument("--workers", type=int, help="the number of processes evaluating the overviews (only for statistics, integrate evaluates a single overview in this process); by default the overviews are evaluated in this process")
+    statistics_parser.set_defaults(evaluate=statistics)
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)], format="%(levelname)s %(name)s: %(message)s")
+
+    if args.format == "parquet" and not _parquet():
+        parser.error("Writing Parquet files requires pyarrow or fastparquet.")
+
+    try:
+        args.experiments = {
+            reference.rpartition(":")[2]: experiment_description(reference, args.definitions, args.data_folder)
+            for reference in args.experiments
+        }
+        if args.limits is not None:
+            args.limits = load_definition(args.limits, args.definitions)
+    except (FileNotFoundError, KeyError) as e:
+        parser.error(str(e).strip("'\""))
+
+    if args.vertex_bins is not None:
+        from .vertex import VertexBins
+
+        width, origin, count = args.vertex_bins
+        args.vertex_bins = VertexBins(width=width, origin=origin, count=int(count))
+
+    os.makedirs(args.output, exist_ok=True)
+
+    if args.trace is None:
+        args.evaluate(args)
+        return
+
+    from .instrument import Recorder
+
+    with Recorder() as recorder:
+        args.evaluate(args)
+    recorder.chrome_trace(args.trace)
+    table = recorder.table()
+    logger.info("Stages of the evaluation:\n%s", table.to_string())
+    write(table, f"{os.path.splitext(args.trace)[0]}_stages", args.format, index=True)
+
+
+if __name__ == "__main__":
+    main()
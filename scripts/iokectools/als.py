@@ -0,0 +1,141 @@
+r"""
+Asymmetric least squares (ALS) baseline correction of the ion currents,
+as used in `DEMS_EC_evaluation_BL_corr.ipynb` to obtain the `*_ALS_sub` columns.
+
+The baseline `z` of a series `y` solves `(W + lam * D D^T) z = W y` iteratively, where `D` is the
+second difference matrix and the weights `W` are updated from the sign of `y - z`.
+Since `D D^T` is pentadiagonal and `W + lam * D D^T` is symmetric positive definite,
+the system is solved with a banded Cholesky solver in O(n) instead of a generic sparse solver.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=8)
+def penalty_bands(s, lam):
+    r"""
+    Returns the upper bands of `lam * D D^T` in the format of `scipy.linalg.solveh_banded`,
+    where `D` is the `s x s` matrix with the diagonals 1, -2 and 1 on and below its diagonal,
+    i.e., the difference matrix of `baseline_als` in `DEMS_EC_evaluation_BL_corr.ipynb`.
+
+    The bands are cached, such that they are shared by all iterations and series of the same length.
+
+    EXAMPLES::
+
+        >>> penalty_bands(5, 1.0)
+        array([[ 0.,  0.,  1.,  1.,  1.],
+               [ 0., -2., -4., -4., -4.],
+               [ 1.,  5.,  6.,  6.,  6.]])
+
+    """
+    index = np.arange(s)
+
+    bands = np.zeros((3, s))
+    # (D D^T)[i, i] = 1 + 4 + 1, where the terms of columns before the first one are missing
+    bands[2] = 1 + 4 * (index >= 1) + (index >= 2)
+    # (D D^T)[i - 1, i] = -2 - 2, where the second term is missing for i = 1
+    bands[1, 1:] = -2 - 2 * (index[1:] >= 2)
+    # (D D^T)[i - 2, i] = 1
+    bands[0, 2:] = 1
+
+    bands *= lam
+    bands.flags.writeable = False
+    return bands
+
+
+def _solve(bands, w, y):
+    r"""
+    Solves `(diag(w) + P) z = w y` for the penalty `P` given by its `bands`.
+    Several series `y` (columns) sharing the same weights are solved at once.
+    """
+    from scipy.linalg import solveh_banded
+
+    banded = bands.copy()
+    banded[2] += w
+    return solveh_banded(banded, (w * y.T).T, check_finite=False)
+
+
+def baseline_als(y, lam, p, niter=10, weights=None):
+    r"""
+    Returns the asymmetric least squares baseline of `y` with smoothness `lam` and asymmetry `p`
+    after `niter` iterations.
+
+    `y` can also be a two dimensional array with one series per row, e.g., the ion currents of several masses.
+    The first iteration of all series, which share the initial weights, is then solved at once.
+
+    weights: the initial weights, e.g., obtained with `als_weights` from the baseline of a similar series,
+    to start from a previous result. By default all weights are 1.
+
+    The iteration stops early when the weights do not change anymore, since the baseline
+    is then not modified by further iterations.
+
+    EXAMPLES:
+
+    The peak on a linear background is recovered::
+
+        >>> y = np.linspace(0, 1, 50) + np.exp(-((np.arange(50) - 25) / 3)**2)
+        >>> z = baseline_als(y, 100, 0.01)
+        >>> round(float(y[25] - z[25]), 1)
+        1.0
+
+    Several series are evaluated at once::
+
+        >>> bool(np.allclose(baseline_als(np.array([y, 2 * y]), 100, 0.01), [z, 2 * z]))
+        True
+
+    """
+    y = np.asarray(y, dtype=float)
+    bands = penalty_bands(y.shape[-1], float(lam))
+
+    if y.ndim == 2:
+        if weights is not None:
+            weights = np.broadcast_to(np.asarray(weights, dtype=float), y.shape)
+            return np.array([_iterate(bands, series, w, p, niter) for series, w in zip(y, weights)])
+        if niter < 1:
+            return np.array([None] * len(y))
+
+        z = _solve(bands, np.ones(y.shape[1]), y.T).T
+        return np.array([
+            _iterate(bands, series, als_weights(series, baseline, p), p, niter - 1, baseline)
+            for series, baseline in zip(y, z)
+        ])
+
+    w = np.ones(len(y)) if weights is None else np.asarray(weights, dtype=float)
+    return _iterate(bands, y, w, p, niter)
+
+
+def _iterate(bands, y, w, p, niter, z=None):
+    r"""
+    Returns the baseline after `niter` iterations starting with the weights `w`,
+    or the baseline `z`, from which the weights `w` were obtained, if no iteration is needed.
+    """
+    for _ in range(niter):
+        baseline = _solve(bands, w, y)
+        updated = als_weights(y, baseline, p)
+        z = baseline
+        if np.array_equal(updated, w):
+            # The weights are converged, further iterations reproduce the same baseline.
+            break
+        w = updated
+
+    return z
+
+
+def als_weights(y, z, p):
+    r"""
+    Returns the weights of the points of `y` for the baseline `z`, i.e., `p` for points above
+    and `1 - p` for points below the baseline.
+    """
+    return p * (y > z) + (1 - p) * (y < z)
+
+
+def als_sub(y, lam=1e8, p=1e-6, niter=15):
+    r"""
+    Returns the ion current `y` with the ALS baseline subtracted, where the last value
+    of the series is subtracted first, since ALS requires data close to zero
+    (method 1 of `DEMS_EC_evaluation_BL_corr.ipynb`).
+    """
+    y = np.asarray(y, dtype=float)
+    shifted = y - y[..., -1:]
+    return shifted - baseline_als(shifted, lam, p, niter=niter)
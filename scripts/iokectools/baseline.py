@@ -1,9 +1,57 @@
+import weakref
+
+from .instrument import stage
+
+
 class Baseline:
-    def __init__(self, df, mass=44, start=0, stop=50):
-        self._df = df
+    r"""
+    Adjusts the baseline of the ion currents of mass `mass` to the mean of the rows `start` to `stop`
+    and filters them with a running median of width `filter_value`.
+
+    als: parameters of `als.als_sub`, e.g., `{"lam": 1e8, "p": 1e-6, "niter": 15}`. If provided,
+    the column `ion_current_M{mass}_UVS_ALS_sub` is replaced by the ALS corrected ion current `ion_current_M{mass}`,
+    instead of using the baseline corrected ion current of the preprocessed data.
+
+    The resulting dataframe is computed once for each input dataframe and set of parameters
+    and shared by all instances, e.g., by all points of a parameter sweep.
+    It is computed again when the input dataframe has been modified in place.
+    The input dataframe is not modified.
+    """
+
+    # The hash of the content of the input dataframe and the baseline corrected dataframe
+    # by the id of the input dataframe and the parameters.
+    _cache = {}
+
+    def __init__(self, df, mass=44, start=0, stop=50, filter_value=9, als=None):
+        self._source = df
+        # The columns are added to a shallow copy, such that the input dataframe,
+        # which might be shared with other stages, is not modified.
+        self._df = df.copy(deep=False)
         self.mass = mass
         self.start = start
         self.stop = stop
+        self.filter_value = filter_value
+        self.als = als
+
+    @classmethod
+    def required_columns(cls, mass=44):
+        r"""
+        The columns of the input dataframe used by this class, including those passed on to `Timeshift`.
+        """
+        return [
+            "time",
+            "potential",
+            "current1_muA_geo",
+            f"ion_current_M{mass}",
+            f"ion_current_M{mass}_UVS_ALS_sub",
+        ]
+
+    def remove_als_baseline(self):
+        from .als import als_sub
+
+        self._df[f"ion_current_M{self.mass}_UVS_ALS_sub"] = als_sub(
+            self._df[f"ion_current_M{self.mass}"].to_numpy(dtype=float), **self.als
+        )
 
     def remove_baseline(self):
         self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_norm"] = (
@@ -17,22 +65,65 @@ class Baseline:
             - self._df[f"ion_current_M{self.mass}"].iloc[self.start : self.stop].mean()
         )
 
-    def med_filter(self, filter_value=9):
-        from scipy.signal import medfilt
+    @staticmethod
+    def median(values, filter_value=9):
+        r"""
+        Returns the running median of `values` with a window of width `filter_value`,
+        which is identical to `scipy.signal.medfilt` (zero padded at the edges).
+        """
+        from scipy.ndimage import median_filter
+
+        return median_filter(
+            values.to_numpy(dtype=float), size=filter_value, mode="constant", cval=0.0
+        )
+
+    def med_filter(self, filter_value=None):
+        filter_value = filter_value or self.filter_value
+
+        with stage("median filter", rows=len(self._df)):
+            self._filter(filter_value)
 
-        self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_norm_filt"] = medfilt(
+    def _filter(self, filter_value):
+        self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_norm_filt"] = self.median(
             self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_norm"], filter_value
         )
-        self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_filt"] = medfilt(
+        self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_filt"] = self.median(
             self._df[f"ion_current_M{self.mass}_UVS_ALS_sub"], filter_value
         )
 
+    @classmethod
+    def _forget(cls, source):
+        for key in [key for key in cls._cache if key[0] == source]:
+            del cls._cache[key]
+
     @property
     def df(self):
-        self.remove_baseline()
-        self.med_filter()
+        r"""
+        The input dataframe with the baseline corrected and filtered ion currents.
+
+        The dataframe is shared with other instances and should not be modified.
+        """
+        from .cache import frame_hash
+
+        als = None if self.als is None else tuple(sorted(self.als.items()))
+        key = (id(self._source), self.mass, self.start, self.stop, self.filter_value, als)
+        content = frame_hash(self._source)
+
+        if key not in self._cache or self._cache[key][0] != content:
+            with stage("baseline", rows=len(self._df)):
+                if self.als is not None:
+                    with stage("als", rows=len(self._df)):
+                        self.remove_als_baseline()
+                self.remove_baseline()
+                self.med_filter()
+
+            if not any(cached[0] == key[0] for cached in self._cache):
+                # Drop the cached dataframes when the input dataframe is deleted,
+                # before its id can be reused.
+                weakref.finalize(self._source, Baseline._forget, key[0])
+            self._cache[key] = (content, self._df)
 
-        return self._df
+        return self._cache[key][1]
 
     def plot(self):
         import matplotlib.pyplot as plt
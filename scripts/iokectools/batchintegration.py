@@ -1,21 +1,47 @@
+import logging
 from functools import cached_property
 
+logger = logging.getLogger(__name__)
+
 
 class BatchIntegration:
     r"""
+    experiment_description: a `CycleDescription` or an experiment description, whose cycles
+    are then loaded with only the `required_columns`.
+
     K_modifier: allows varying the K pre-factor by a specified value.
     This is an absolute offset and is usually a float in the range of 0.05 to 0.2.
+
+    als: parameters of the ALS baseline correction of the ion current in `Baseline`.
+    By default the baseline corrected ion current of the preprocessed data is used.
+
+    interval: the time shift of the ion current. With `'auto'` the interval is estimated
+    for each cycle by cross-correlation of the current density and the ion current (see `delay`).
+
+    vertex_bins: the `vertex.VertexBins` of the vertex potentials, which are provided
+    in the column `vertex bin` of `df` and used in the plots, if set.
+
+    cache: store the summary of each cycle on disk and reuse it when a cycle is evaluated again
+    with the same data and parameters, without loading its data (see `results`). Disabled by default.
+    traces: also store the integrated regions of each cycle, which are then provided by `charges` of a reused cycle.
     """
-    def __init__(self, experiment_description, cathodic_limit=0.5, interval=None, K_modifier=0, fixed_K=None, limits=None):
+    def __init__(self, experiment_description, cathodic_limit=0.5, interval=None, K_modifier=0, fixed_K=None, limits=None, als=None, vertex_bins=None,
+                 cache=False, traces=False):
         self._input_experiment_description = experiment_description
         self.cathodic_limit = cathodic_limit
         self.K_modifier = K_modifier
         self.fixed_K = fixed_K
         self._limits = limits
+        self.als = als
+        self.vertex_bins = vertex_bins
+        self.cache = cache
+        self.traces = traces
+        self._timeshifts = {}
+        self._fingerprints = {}
 
         if interval == 0:
             self.interval = interval
-            print('The interval was 0')
+            logger.debug("The interval is 0.")
         else:
             self.interval = (
                 interval
@@ -26,38 +52,196 @@ class BatchIntegration:
     def cycle_info(self):
         pass
 
+    @classmethod
+    def required_columns(cls, mass=44):
+        r"""
+        The columns of the cycle data required to evaluate the charges,
+        i.e., the columns used by `Baseline`, which provides all columns used by `Timeshift`.
+        """
+        from .baseline import Baseline
+
+        return Baseline.required_columns(mass)
+
     @cached_property
     def _experiment_description(self):
-        import copy
-        return copy.deepcopy(self._input_experiment_description)
+        r"""
+        The `CycleDescription` of the experiment, which is shared and not modified by this class.
+        """
+        if isinstance(self._input_experiment_description, dict):
+            from .cycle_description import CycleDescription
+
+            return CycleDescription(self._input_experiment_description, usecols="pipeline")
+        return self._input_experiment_description
 
     @cached_property
-    def charges(self):
-        from .baseline import Baseline
-        from .integrate import COIntegral
-        from .timeshift import Timeshift
+    def intervals(self):
+        r"""
+        Returns a dict with the interval used for each cycle.
+        """
+        if self.interval != "auto":
+            return {key: self.interval for key in self._experiment_description.cycle_description}
+
+        from .delay import estimate_intervals
 
-        cycle_description = self._experiment_description.cycle_description
+        return estimate_intervals(self._experiment_description, als=self.als)
 
-        charges = {}
-        for key in cycle_description:
+    @property
+    def timeshifts(self):
+        r"""
+        Returns a dict with the baseline corrected and time shifted data for each cycle.
+        """
+        return {key: self.timeshift(key) for key in self._experiment_description.cycle_description}
 
-            baseline = Baseline(cycle_description[key]["df"])
+    def timeshift(self, cycle):
+        r"""
+        Returns the baseline corrected and time shifted data of a cycle, which is only loaded when it is requested.
+        """
+        from .baseline import Baseline
+        from .timeshift import Timeshift
 
-            K_prefactor = (self.fixed_K or cycle_description[key]["K_prefactor"]) + self.K_modifier
-            K_power = cycle_description[key]["K_power"]
+        if cycle not in self._timeshifts:
+            description = self._experiment_description.cycle_description[cycle]
+            baseline = Baseline(description["df"], als=self.als)
 
-            timeshift = Timeshift(
+            self._timeshifts[cycle] = Timeshift(
                 baseline.df,
-                K_prefactor=K_prefactor,
-                K_power=K_power,
-                interval=self.interval,
+                K_prefactor=self.K_prefactor(cycle),
+                K_power=description["K_power"],
+                interval=self.intervals[cycle],
             )
 
-            charge = COIntegral(timeshift.df, K=timeshift.K, cathodic_limit=self.cathodic_limit, limits=self._limits)
-            charges[key] = charge
+        return self._timeshifts[cycle]
+
+    def K_prefactor(self, cycle, K_modifier=None, fixed_K=None):
+        r"""
+        Returns the K pre-factor of a cycle, which is modified by `K_modifier`
+        or replaced by `fixed_K` if these are provided or set for this instance.
+        """
+        K_modifier = self.K_modifier if K_modifier is None else K_modifier
+        fixed_K = fixed_K or self.fixed_K
+        return (fixed_K or self._experiment_description.cycle_description[cycle]["K_prefactor"]) + K_modifier
+
+    def integral(self, cycle):
+        r"""
+        Returns the `COIntegral` of a cycle.
+        """
+        from .integrate import COIntegral
+
+        timeshift = self.timeshift(cycle)
+        return COIntegral(timeshift.df, K=timeshift.K, cathodic_limit=self.cathodic_limit, limits=self._limits)
 
-        return charges
+    def summary_key(self, cycle, K_prefactor=None):
+        r"""
+        Returns the key of the results of a cycle in `results`, evaluated with the `K_prefactor`
+        (by default the K pre-factor of the cycle).
+        """
+        from .results import fingerprint, summary_key
+
+        description = self._experiment_description.cycle_description[cycle]
+        if cycle not in self._fingerprints:
+            self._fingerprints[cycle] = fingerprint(description)
+
+        return summary_key(
+            data=self._fingerprints[cycle],
+            als=self.als,
+            K_prefactor=self.K_prefactor(cycle) if K_prefactor is None else K_prefactor,
+            K_power=description["K_power"],
+            interval=self.interval if self.interval == "auto" else self.intervals[cycle],
+            cathodic_limit=self.cathodic_limit,
+            limits=self._limits,
+        )
+
+    def stored_charge(self, cycle, key):
+        r"""
+        Returns the charge of a cycle stored for `key` in `results` or `None` if it has not been stored.
+        """
+        from functools import partial
+
+        from . import results
+        from .integrate import SummaryCharge
+
+        summary = results.load(key)
+        if summary is None:
+            return None
+
+        charges = None
+        if self.traces:
+            charges = results.load_charges(key)
+            if charges is None:
+                return None
+
+        return SummaryCharge(summary, partial(self.integral, cycle), charges=charges)
+
+    def store_charge(self, key, charge):
+        r"""
+        Stores the summary and, with `traces`, the integrated regions of a charge in `results`.
+        """
+        from . import results
+
+        results.save(key, charge.summary(), charge.charges if self.traces else None)
+
+    def charge(self, cycle):
+        r"""
+        Returns the `COIntegral` of a cycle or, with `cache`, the stored charge if the cycle has been evaluated before.
+        """
+        if not self.cache:
+            return self.integral(cycle)
+
+        key = self.summary_key(cycle)
+        charge = self.stored_charge(cycle, key)
+        if charge is None:
+            charge = self.integral(cycle)
+            self.store_charge(key, charge)
+        return charge
+
+    @cached_property
+    def charges(self):
+        return {key: self.charge(key) for key in self._experiment_description.cycle_description}
+
+    def sweep_K(self, K_modifiers=[0], fixed_Ks=[None]):
+        r"""
+        Returns a list of `BatchIntegration`, one for each combination of `K_modifiers`
+        and `fixed_Ks` (iterating over `fixed_Ks` first), which share the baseline corrected
+        and time shifted data of this instance.
+
+        Since the charges obtained from the MS data are proportional to 1/K,
+        the charges for all K of a cycle are obtained at once with `KSweep`,
+        instead of integrating each cycle again for every K.
+        With `cache`, a cycle is only integrated if the charge of any K has not been stored.
+        """
+        from .integrate import KSweep
+
+        combinations = [(K_modifier, fixed_K) for K_modifier in K_modifiers for fixed_K in fixed_Ks]
+
+        overviews = [
+            BatchIntegration(self._experiment_description, cathodic_limit=self.cathodic_limit, interval=self.interval, K_modifier=K_modifier, fixed_K=fixed_K, limits=self._limits, als=self.als, vertex_bins=self.vertex_bins,
+                             cache=self.cache, traces=self.traces)
+            for K_modifier, fixed_K in combinations
+        ]
+        for overview in overviews:
+            overview.__dict__["charges"] = {}
+            overview.__dict__["intervals"] = self.intervals
+
+        for key in self._experiment_description.cycle_description:
+            K_prefactors = [self.K_prefactor(key, K_modifier=K_modifier, fixed_K=fixed_K) for K_modifier, fixed_K in combinations]
+
+            if self.cache:
+                summary_keys = [self.summary_key(key, K_prefactor=K_prefactor) for K_prefactor in K_prefactors]
+                charges = [overview.stored_charge(key, summary_key) for overview, summary_key in zip(overviews, summary_keys)]
+                if all(charge is not None for charge in charges):
+                    for overview, charge in zip(overviews, charges):
+                        overview.charges[key] = charge
+                    continue
+
+            timeshift = self.timeshift(key)
+            Ks = [K_prefactor * timeshift.K_power for K_prefactor in K_prefactors]
+            sweep = KSweep(timeshift.df, Ks, mass=timeshift.mass, cathodic_limit=self.cathodic_limit, limits=self._limits)
+            for n, overview in enumerate(overviews):
+                overview.charges[key] = sweep.charge(n)
+                if self.cache:
+                    overview.store_charge(summary_keys[n], overview.charges[key])
+
+        return overviews
 
     @cached_property
     def cycle_description(self):
@@ -70,15 +254,18 @@ class BatchIntegration:
                 **self.charges[key].summary(),
                 **self._experiment_description.cycle_description[key],
             }
-            del cycle_description[key]["df"]
+            cycle_description[key].pop("df", None)
+            if self.interval == "auto":
+                cycle_description[key]["interval"] = self.intervals[key]
 
         return cycle_description
 
     @cached_property
     def experiment_description(self):
-        experiment_description = self._experiment_description.experiment_description
-        experiment_description["cycles"] = self.cycle_description
-        return experiment_description
+        return {
+            **self._experiment_description.experiment_description,
+            "cycles": self.cycle_description,
+        }
 
     def cycles(self):
         r"""
@@ -95,7 +282,13 @@ class BatchIntegration:
         """
         import pandas as pd
 
-        return pd.DataFrame.from_dict(self.cycle_description, orient="index")
+        df = pd.DataFrame.from_dict(self.cycle_description, orient="index")
+        if self.vertex_bins is not None:
+            df["vertex bin"] = self.vertex_bins.assign(df["vertex potential"])
+            report = self.vertex_bins.report(df["vertex potential"], labels=df.index)
+            if report:
+                logger.warning(report)
+        return df
 
     def plot_charges(self):
         r"""
@@ -103,6 +296,8 @@ class BatchIntegration:
         """
         import matplotlib.pyplot as plt
 
+        vertex = "vertex potential" if self.vertex_bins is None else "vertex bin"
+
         y = [
             "Q_tot_j",
             "Q_tot_M",
@@ -125,10 +320,10 @@ class BatchIntegration:
         fig, [ax0, ax1] = plt.subplots(2, 1, figsize=[5, 10])
         for i in y:
             #     df.plot.scatter(x='vertex potential', y=i, ax=ax0)
-            ax0.scatter(x=self.df["vertex potential"], y=self.df[i], label=i)
+            ax0.scatter(x=self.df[vertex], y=self.df[i], label=i)
             ax0.legend()
         for i in y2:
-            ax1.scatter(x=self.df["vertex potential"], y=self.df[i], label=i)
+            ax1.scatter(x=self.df[vertex], y=self.df[i], label=i)
             ax1.legend()
             ax1.set_xlabel("Upper potential limit / V vs. RHE")
             ax0.set_ylabel("Q / uC cm-2")
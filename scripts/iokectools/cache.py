@@ -0,0 +1,283 @@
+r"""
+A cache for parsed CSV files, where each column is stored as a binary NumPy (`.npy`) file.
+Columns of strings, which NumPy could only store pickled, are stored as JSON lists instead.
+
+A cached file is identified by the absolute path, the size and the modification time
+of the CSV file, i.e., modifying a file invalidates its cached version.
+Files in ZIP archives (see `folderindex`) are additionally identified by their CRC,
+such that cached files are loaded without decompressing the archive.
+By default the cache is located in `~/.cache/iokectools`,
+which can be changed with the environment variable `IOKECTOOLS_CACHE`.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .folderindex import file_stat, open_file
+from .instrument import stage
+
+# Increase when the layout of the cache changes.
+VERSION = 1
+
+cache_folder = os.environ.get(
+    "IOKECTOOLS_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "iokectools"),
+)
+
+
+def cache_key(path):
+    r"""
+    Returns a key identifying the current state of a file.
+    """
+    identifier = "|".join(str(item) for item in (VERSION, *file_stat(path)))
+    return hashlib.sha1(identifier.encode()).hexdigest()
+
+
+def cache_path(path):
+    r"""
+    Returns the folder containing the cached columns of a file.
+    """
+    return os.path.join(cache_folder, cache_key(path))
+
+
+def frame_hash(df, columns=None):
+    r"""
+    Returns a hash of the content of the `columns` of a dataframe (by default all columns),
+    which changes when the dataframe is modified in place.
+
+    EXAMPLES::
+
+        >>> df = pd.DataFrame({"time": [0.0, 1.0], "potential": [0.1, 0.2]})
+        >>> key = frame_hash(df)
+        >>> df["potential"] *= 2
+        >>> frame_hash(df) == key
+        False
+
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    digest = hashlib.sha1(json.dumps([str(column) for column in columns]).encode())
+    for column in columns:
+        values = df[column].to_numpy()
+        if values.dtype == object:
+            values = pd.util.hash_pandas_object(df[column], index=False).to_numpy()
+        digest.update(str(values.dtype).encode())
+        digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+def save_column(values, path):
+    r"""
+    Stores the values of a column at `path` with the suffix `.npy`, or `.json` for values of `object` dtype.
+    """
+    if values.dtype == object:
+        with open(f"{path}.json", "w") as f:
+            json.dump(values.tolist(), f)
+    else:
+        np.save(f"{path}.npy", values, allow_pickle=False)
+
+
+def load_column(path, mmap_mode=None):
+    r"""
+    Returns the values of a column stored by `save_column` at `path`.
+    The values are memory-mapped with `mmap_mode`, if provided, unless they are stored as JSON.
+    """
+    try:
+        return np.load(f"{path}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+    except FileNotFoundError:
+        with open(f"{path}.json") as f:
+            return np.array(json.load(f), dtype=object)
+
+
+def save(df, folder):
+    r"""
+    Stores each column of a dataframe with `save_column` in `folder`.
+    The folder is only created when all columns have been written.
+
+    EXAMPLES::
+
+        >>> folder = os.path.join(tempfile.mkdtemp(), "columns")
+        >>> save(pd.DataFrame({"time": [0.0, 1.0], "label": ["a", None]}), folder)
+        >>> load(folder)
+           time label
+        0   0.0     a
+        1   1.0  None
+
+    """
+    tmp = None
+    try:
+        os.makedirs(os.path.dirname(folder), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(folder))
+        columns = []
+        for n, column in enumerate(df.columns):
+            save_column(df[column].to_numpy(), os.path.join(tmp, str(n)))
+            columns.append(column)
+        with open(os.path.join(tmp, "columns.json"), "w") as f:
+            json.dump(columns, f)
+        os.replace(tmp, folder)
+    except OSError:
+        # The folder was created concurrently or the cache is not writable.
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+class ColumnWriter:
+    r"""
+    Stores the columns of a dataframe of floats with `rows` rows, which is provided in chunks,
+    in the layout of `save`, without holding the entire dataframe in memory.
+    The columns are written to memory-mapped files in a temporary folder, which becomes `folder` with `commit`.
+    Errors are ignored if the cache is not writable, as in `save`.
+
+    EXAMPLES::
+
+        >>> folder = os.path.join(tempfile.mkdtemp(), "columns")
+        >>> writer = ColumnWriter(["time", "potential"], rows=3)
+        >>> writer.write(pd.DataFrame({"time": [0.0, 1.0], "potential": [0.1, 0.2]}), start=0)
+        >>> writer.write(pd.DataFrame({"time": [2.0], "potential": [0.3]}), start=2)
+        >>> writer.commit(folder)
+        >>> load(folder)
+           time  potential
+        0   0.0        0.1
+        1   1.0        0.2
+        2   2.0        0.3
+
+    """
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self._tmp = None
+        self._arrays = []
+        try:
+            os.makedirs(cache_folder, exist_ok=True)
+            self._tmp = tempfile.mkdtemp(dir=cache_folder)
+            self._arrays = [
+                np.lib.format.open_memmap(os.path.join(self._tmp, f"{n}.npy"), mode="w+", dtype=float, shape=(rows,))
+                for n in range(len(self.columns))
+            ]
+        except OSError:
+            self.discard()
+
+    def write(self, chunk, start):
+        r"""
+        Stores the rows of the dataframe `chunk` starting at the row `start`.
+        """
+        for column, values in zip(self.columns, self._arrays):
+            values[start : start + len(chunk)] = chunk[column].to_numpy(dtype=float)
+
+    def commit(self, folder):
+        r"""
+        Moves the stored columns to `folder`.
+        """
+        if self._tmp is None:
+            return
+        try:
+            for values in self._arrays:
+                values.flush()
+            self._arrays = []
+            with open(os.path.join(self._tmp, "columns.json"), "w") as f:
+                json.dump(self.columns, f)
+            os.replace(self._tmp, folder)
+            self._tmp = None
+        except OSError:
+            # The folder was created concurrently or the cache is not writable.
+            self.discard()
+
+    def discard(self):
+        r"""
+        Removes the stored columns.
+        """
+        self._arrays = []
+        if self._tmp is not None:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            self._tmp = None
+
+
+def load(folder, usecols=None):
+    r"""
+    Returns a dataframe from the columns stored in `folder`.
+    Only the columns in `usecols` are loaded, if provided.
+    """
+    with open(os.path.join(folder, "columns.json")) as f:
+        columns = json.load(f)
+
+    selected = [
+        (n, column)
+        for n, column in enumerate(columns)
+        if usecols is None or column in usecols
+    ]
+
+    return pd.DataFrame(
+        {
+            column: load_column(os.path.join(folder, str(n)))
+            for n, column in selected
+        },
+        columns=[column for _, column in selected],
+    )
+
+
+def read_csv(path, cache=True, usecols=None):
+    r"""
+    Returns a dataframe of a CSV file, which is loaded from the cache when the file was read before.
+    Only the columns in `usecols` are returned, if provided. Columns not present in the file are ignored.
+    The cache always contains all columns of the file.
+    """
+    with stage("load") as frame:
+        df = _read_csv(path, cache=cache, usecols=usecols)
+        frame["rows"] = len(df)
+    return df
+
+
+def _read_csv(path, cache=True, usecols=None):
+    if not cache:
+        with open_file(path) as file:
+            return pd.read_csv(
+                file, usecols=None if usecols is None else lambda column: column in usecols
+            )
+
+    folder = cache_path(path)
+    if os.path.exists(os.path.join(folder, "columns.json")):
+        return load(folder, usecols=usecols)
+
+    with open_file(path) as file:
+        df = pd.read_csv(file)
+    save(df, folder)
+
+    if usecols is None:
+        return df
+    return df.drop(columns=[column for column in df.columns if column not in usecols])
+
+
+def iter_csv(path, chunksize, cache=True, usecols=None):
+    r"""
+    Yields dataframes with `chunksize` rows of a CSV file, such that the file is never loaded entirely.
+    Cached files are read from memory maps of the cached columns.
+    """
+    folder = cache_path(path) if cache else None
+    if folder is None or not os.path.exists(os.path.join(folder, "columns.json")):
+        with open_file(path) as file:
+            yield from pd.read_csv(
+                file,
+                usecols=None if usecols is None else lambda column: column in usecols,
+                chunksize=chunksize,
+            )
+        return
+
+    with open(os.path.join(folder, "columns.json")) as f:
+        columns = json.load(f)
+
+    arrays = {}
+    for n, column in enumerate(columns):
+        if usecols is None or column in usecols:
+            arrays[column] = load_column(os.path.join(folder, str(n)), mmap_mode="r")
+
+    rows = len(next(iter(arrays.values()))) if arrays else 0
+    for start in range(0, rows, chunksize):
+        stop = min(start + chunksize, rows)
+        yield pd.DataFrame(
+            {column: np.array(values[start:stop]) for column, values in arrays.items()},
+            index=pd.RangeIndex(start, stop),
+        )
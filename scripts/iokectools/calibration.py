@@ -0,0 +1,157 @@
+r"""
+Calibration of the conversion factor K between the ion current and the current density.
+
+Since the simulated current `sim_current = ion_current / K * 1000000` is linear in 1/K,
+the K for which the simulated current best matches the current density in a potential window
+is obtained by a weighted linear least squares fit, instead of evaluating a grid of Ks.
+"""
+import numpy as np
+
+
+def least_squares_K(current, ion_current, weights=None):
+    r"""
+    Returns the K minimizing `sum(weights * (current - ion_current / K * 1000000)**2)`.
+
+    EXAMPLES::
+
+        >>> least_squares_K(np.array([2.0, 4.0]), np.array([1e-6, 2e-6]))
+        0.5
+
+    """
+    current = np.asarray(current, dtype=float)
+    ion_current = np.asarray(ion_current, dtype=float)
+    weights = np.ones(len(current)) if weights is None else np.asarray(weights, dtype=float)
+
+    slope = np.sum(weights * current * ion_current) / np.sum(weights * ion_current**2)
+    if not slope > 0:
+        raise ValueError("The current density and the ion current are not positively correlated in the window.")
+
+    return 1000000 / slope
+
+
+def window_mask(potential, window=None, scan="pos"):
+    r"""
+    Returns a boolean array selecting the points of the scan `scan` (`'pos'`, `'neg'` or `'full'`)
+    with a potential within `window = (lower, upper)`. The scans are separated at the vertex,
+    as in `COIntegral`.
+
+    EXAMPLES::
+
+        >>> window_mask(np.array([0.1, 0.5, 0.9, 0.5, 0.1]), (0.3, 1.0))
+        array([False,  True,  True, False, False])
+
+    """
+    potential = np.asarray(potential, dtype=float)
+    index = np.arange(len(potential))
+    vertex = int(np.nanargmax(potential))
+
+    scans = {
+        "full": np.ones(len(potential), dtype=bool),
+        "pos": index <= vertex,
+        "neg": index >= vertex,
+    }
+    if scan not in scans:
+        raise ValueError(f"Unknown scan `{scan}`. Use one of {list(scans)}.")
+
+    mask = scans[scan]
+    if window is not None:
+        lower, upper = window
+        mask = mask & (potential >= lower) & (potential <= upper)
+    return mask
+
+
+def constrain_K(integral):
+    r"""
+    Returns the smallest K, not smaller than the K of the `COIntegral` `integral`,
+    for which the charges satisfy the conditions of `charge_statistics.boundary_conditions`,
+    i.e., `Q_tot_j >= Q_tot_M` and `Q_tot_j_pos >= Q_tot_M_pos`.
+
+    Since the charges of the MS data are proportional to 1/K and the charges of the current density
+    do not depend on K, the bound is obtained from the charges for a single K.
+    """
+    charges = integral.total_charges
+
+    K = integral.K
+    for j, M in [("Q_tot_j", "Q_tot_M"), ("Q_tot_j_pos", "Q_tot_M_pos")]:
+        if charges[M] > charges[j]:
+            if not charges[j] > 0:
+                raise ValueError(f"No K satisfies `{j} >= {M}`, since `{j}` vanishes.")
+            # The small offset avoids rejecting the bound due to rounding.
+            K = max(K, integral.K * charges[M] / charges[j] * (1 + 1e-12))
+    return K
+
+
+def fit_timeshift(timeshift, window=None, scan="pos", weights=None, constrained=False, cathodic_limit=0.5, limits=None):
+    r"""
+    Returns the K fitted to the aligned data of a `Timeshift`.
+
+    weights: a function returning the weight of each point, called with the dict of aligned arrays
+    of the `Timeshift` (see `Timeshift.aligned`). By default all points have the same weight.
+
+    constrained: whether K is increased to satisfy the conditions of `constrain_K`,
+    evaluated with the `cathodic_limit` and the integration `limits` of `COIntegral`.
+    """
+    aligned = timeshift.aligned
+    mask = window_mask(aligned["potential"], window=window, scan=scan)
+    if not mask.any():
+        raise ValueError("No data points in the window.")
+
+    K = least_squares_K(
+        aligned["current1_muA_geo"][mask],
+        aligned[timeshift.ion_current][mask],
+        weights=None if weights is None else np.asarray(weights(aligned), dtype=float)[mask],
+    )
+
+    if not constrained:
+        return K
+
+    from .integrate import COIntegral
+    from .timeshift import Timeshift
+
+    fitted = Timeshift(timeshift._df, K_prefactor=K / timeshift.K_power, K_power=timeshift.K_power, interval=timeshift.interval, mass=timeshift.mass, ion_current=timeshift.ion_current)
+    return constrain_K(COIntegral(fitted.df, K=fitted.K, mass=fitted.mass, cathodic_limit=cathodic_limit, limits=limits))
+
+
+def fit_K(cycle, window=None, interval=0, mass=44, ion_current=None, scan="pos", weights=None, constrained=False, cathodic_limit=0.5, limits=None):
+    r"""
+    Returns the K for which the simulated current best matches the current density of a cycle
+    in the potential window `window = (lower, upper)` of the scan `scan`.
+
+    The `cycle` is an entry of `CycleDescription.cycle_description` or a dataframe with the cycle data.
+    The ion current is shifted by `interval` as in `Timeshift`; with `'auto'` the interval is estimated
+    with `delay.estimate_delay`. See `fit_timeshift` for the remaining arguments.
+    """
+    from .baseline import Baseline
+    from .timeshift import Timeshift
+
+    df = Baseline(cycle["df"] if isinstance(cycle, dict) else cycle, mass=mass).df
+    ion_current = ion_current or f"ion_current_M{mass}_UVS_ALS_sub_norm_filt"
+
+    if interval == "auto":
+        from .delay import estimate_delay
+
+        interval = estimate_delay(df["time"], df["current1_muA_geo"], df[ion_current])
+
+    K_power = cycle.get("K_power", 1) if isinstance(cycle, dict) else 1
+    timeshift = Timeshift(df, K_prefactor=1, K_power=K_power, interval=interval, mass=mass, ion_current=ion_current)
+
+    return fit_timeshift(timeshift, window=window, scan=scan, weights=weights, constrained=constrained, cathodic_limit=cathodic_limit, limits=limits)
+
+
+def fit_K_prefactors(experiment_description, window=None, interval=None, scan="pos", weights=None, constrained=False, cathodic_limit=0.5, limits=None):
+    r"""
+    Returns a dict with the fitted `K_prefactor` of each cycle of a `CycleDescription`,
+    i.e., the fitted K divided by the `K_power` of the cycle, which can be used in an experiment description.
+
+    The interval is determined as in `BatchIntegration`, i.e., the interval of the experiment description
+    is used by default and `'auto'` estimates the interval of each cycle. See `fit_timeshift` for the remaining arguments.
+    """
+    from .batchintegration import BatchIntegration
+
+    # The fitted K does not depend on the K pre-factor of the cycles, which might not be calibrated yet.
+    overview = BatchIntegration(experiment_description, cathodic_limit=cathodic_limit, interval=interval, fixed_K=1, limits=limits)
+
+    return {
+        key: fit_timeshift(timeshift, window=window, scan=scan, weights=weights, constrained=constrained, cathodic_limit=cathodic_limit, limits=limits) / timeshift.K_power
+        for key, timeshift in overview.timeshifts.items()
+    }
@@ -1,13 +1,37 @@
+import logging
 from functools import cached_property
 
+from .instrument import stage
+
+logger = logging.getLogger(__name__)
+
 
 class charge_statistics:
+    r"""
+    experiment_descriptions: a `CycleDescription` or an experiment description, or a list of these.
+    The cycles of experiment descriptions are loaded with only the columns required by `BatchIntegration`.
+
+    analytic_K: evaluate all `K_shifts` and `fixed_Ks` of a time shift at once with `BatchIntegration.sweep_K`,
+    instead of evaluating the entire pipeline for every K.
+
+    workers: the number of processes used to evaluate the overviews (see `parallel.sweep`).
+    By default the overviews are evaluated serially in this process.
+
+    vertex_bins: the `vertex.VertexBins` used to group the cycles by their vertex potential.
+    Cycles with a vertex potential outside the bins are reported and not included in `df_short`.
+
+    als: parameters of the ALS baseline correction of the ion current (see `BatchIntegration`).
+
+    cache: reuse the charges of cycles stored on disk by a previous evaluation (see `BatchIntegration`).
+    """
 
     def __init__(self, experiment_descriptions, cathodic_limit=None,
                  time_shifts=[-0.3, -0.35, -0.4, -0.45], K_shifts=[-0.02, 0, 0.02], fixed_Ks=[],
-                 vertex_limit_lower=None, vertex_limit_upper=None, test=False, limits=None):
+                 vertex_limit_lower=None, vertex_limit_upper=None, test=False, limits=None, analytic_K=False, workers=None, vertex_bins=None, als=None, cache=False):
 
         self.eds = [experiment_descriptions] if type(experiment_descriptions) != list else experiment_descriptions
+        # Experiment descriptions are loaded once for all overviews, with only the columns required by `BatchIntegration`.
+        self.eds = [self._cycle_description(ed) for ed in self.eds]
         self.time_shifts = time_shifts
         self.K_shifts = K_shifts
         self.fixed_Ks = fixed_Ks
@@ -16,6 +40,24 @@ class charge_statistics:
         self._vertex_limit_upper = vertex_limit_upper
         self.test = test
         self.limits = limits
+        self.analytic_K = analytic_K
+        self.workers = workers
+        self.vertex_bins = vertex_bins
+        self.als = als
+        self.cache = cache
+
+        if self.vertex_bins is None:
+            from .vertex import VertexBins
+
+            self.vertex_bins = VertexBins()
+
+    @staticmethod
+    def _cycle_description(ed):
+        if isinstance(ed, dict):
+            from .cycle_description import CycleDescription
+
+            return CycleDescription(ed, usecols="pipeline")
+        return ed
 
     @property
     def vertex_limit_lower(self):
@@ -31,31 +73,56 @@ class charge_statistics:
         A boolean indicating if the charges are within certain limits.
         """
         for cycle in overview.cycles():
-            # print(cycle)
-            if overview.charges[cycle].summary()['Q_diff_pos = Q_tot_j_pos - Q_tot_M_pos'] < 0:
-                # print(overview.charges[cycle].summary()['Q_diff_pos = Q_tot_j_pos - Q_tot_M_pos'])
-                print('rejected Q_diff_pos')
+            summary = overview.charges[cycle].summary()
+            if summary['Q_diff_pos = Q_tot_j_pos - Q_tot_M_pos'] < 0:
+                logger.info("Rejected an overview with a negative Q_diff_pos in cycle %s.", cycle)
                 return False
-            if overview.charges[cycle].summary()['Q_tot_j - Q_tot_M'] < 0:
-                print("rejected 'Q_tot_j - Q_tot_M'")
+            if summary['Q_tot_j - Q_tot_M'] < 0:
+                logger.info("Rejected an overview with a negative Q_tot_j - Q_tot_M in cycle %s.", cycle)
                 return False
 
         return True
 
+    def overview(self, ed, **kwargs):
+        r"""
+        Returns a `BatchIntegration` of an experiment description with the parameters of this instance.
+        """
+        from .batchintegration import BatchIntegration
+
+        return BatchIntegration(ed, cathodic_limit=self.cathodic_limit, limits=self.limits, als=self.als, vertex_bins=self.vertex_bins, cache=self.cache, **kwargs)
+
     @cached_property
     def overviews(self):
-        from .batchintegration import BatchIntegration
         overviews = []
-        print(len(self.eds))
+        logger.info("Evaluating %d experiment descriptions.", len(self.eds))
         processed_eds = 0
 
+        if self.workers:
+            from .parallel import sweep
+
+            for overview in sweep(self.eds, self.time_shifts, self.K_shifts, self.fixed_Ks, cathodic_limit=self.cathodic_limit, limits=self.limits, analytic_K=self.analytic_K, workers=self.workers, als=self.als, vertex_bins=self.vertex_bins, cache=self.cache):
+                if self.test and not self.boundary_conditions(overview):
+                    continue
+                overviews.append(overview)
+            return overviews
+
+        if self.analytic_K:
+            for ed in self.eds:
+                for time_shift in self.time_shifts:
+                    overview = self.overview(ed, interval=time_shift)
+                    for overview in overview.sweep_K(self.K_shifts, self.fixed_Ks or [None]):
+                        if self.test and not self.boundary_conditions(overview):
+                            continue
+                        overviews.append(overview)
+            return overviews
+
         for ed in self.eds:
             # Remove EDs that do have K factors which do not yield results compliant with the boundary conditions.
             for time_shift in self.time_shifts:
                 for K_shift in self.K_shifts:
                     if self.fixed_Ks:
                         for fixed_K in self.fixed_Ks:
-                            overview = BatchIntegration(ed, cathodic_limit=self.cathodic_limit, interval=time_shift, K_modifier=K_shift, fixed_K=fixed_K, limits=self.limits)
+                            overview = self.overview(ed, interval=time_shift, K_modifier=K_shift, fixed_K=fixed_K)
 
                             # Test if the overview is with self.boundary_conditions(overview)
                             if self.test:
@@ -66,15 +133,15 @@ class charge_statistics:
                             else:
                                 overviews.append(overview)
                     else:
-                        overview = BatchIntegration(ed, cathodic_limit=self.cathodic_limit, interval=time_shift, K_modifier=K_shift, limits=self.limits)
+                        overview = self.overview(ed, interval=time_shift, K_modifier=K_shift)
                         if self.test:
                             if self.boundary_conditions(overview):
                                 overviews.append(overview)
                             else:
                                 pass
                         else:
-                            overviews.append(BatchIntegration(ed, cathodic_limit=self.cathodic_limit, interval=time_shift, K_modifier=K_shift, limits=self.limits))
-                        print('no fixed_K: ', processed_eds)
+                            overviews.append(self.overview(ed, interval=time_shift, K_modifier=K_shift))
+                        logger.debug("Evaluated the combination %d of time shift and K shift.", processed_eds)
                     processed_eds +=1
         # print('processed edsprocessed eds: ', processed_eds)
         return overviews
@@ -84,36 +151,36 @@ class charge_statistics:
         r"""
         Test if a vertex potential is within a certain range and return the value in the center of that range.
         For example the vertex potential might be 1.01 or 0.99, which are both set to 1.0, since they are between 0.95 and 1.05.
+        Returns `None` if the vertex potential is not within any range (see `vertex.VertexBins`).
         """
-        vertex_regions = [round((0.725 + 0.05*n),3) for n in range(0,40,1)]
-        vertex_potentials = [round((0.75 + 0.05*n),3) for n in range(0,40,1)]
+        from .vertex import VertexBins
 
-        for idx, item in enumerate(vertex_regions):
-            if len(vertex_regions) == idx:
-                pass
-            if vertex > vertex_regions[idx] and vertex < vertex_regions[idx+1]:
-                return vertex_potentials[idx]
+        return VertexBins(closed="neither").center(vertex)
 
     @cached_property
     def data(self):
-        import copy
-        data = copy.deepcopy(self._data_dummy)
+        r"""
+        A dict with an array of each charge of the summaries and the cycle, with one entry per cycle of each overview.
+        The summary of each cycle is evaluated only once.
+        """
+        import numpy as np
 
-        n = 0
+        rows = sum(len(overview.cycles()) for overview in self.overviews)
+        data = {item: np.empty(rows) for item in self.charge_indexes}
         cycles = []
-        for overview in self.overviews:
-            print('Processing overview number: ', n)
-            for cycle in overview.cycles():
-                data['vertex potential'].append(overview.charges[cycle].summary()['vertex potential'])
-                # print('Processing overview number: ', n, ' - ADDING vertex')
-                cycles.append(cycle)
-                for item in data.keys():
-                    if not item == 'vertex potential':
-                        # print('Processing overview number: ', n, ' - ADDING charge summary')
-                        data[item].append(overview.charges[cycle].summary()[item])
-                        # print('Processing overview number: ', n, ' Next cycle')
-            n +=1
-        data['cycle'] = cycles
+
+        row = 0
+        for n, overview in enumerate(self.overviews):
+            logger.debug("Processing overview number %d.", n)
+            with stage("summaries", rows=len(overview.cycles())):
+                for cycle in overview.cycles():
+                    summary = overview.charges[cycle].summary()
+                    for item, values in data.items():
+                        values[row] = summary[item]
+                    cycles.append(cycle)
+                    row += 1
+
+        data['cycle'] = np.array(cycles)
         return data
 
     @cached_property
@@ -127,41 +194,31 @@ class charge_statistics:
     @cached_property
     def df(self):
         df = self._df.copy()
-        df['vertex potential'] = df['vertex potential'].apply(charge_statistics.get_vertex)#lambda x: charge_statistics.get_vertex(x))
+        report = self.vertex_bins.report(df['vertex potential'], labels=[f"cycle {cycle}" for cycle in df['cycle']])
+        if report:
+            logger.warning(report)
+        df['vertex potential'] = self.vertex_bins.assign(df['vertex potential'])
         return df
 
     # vertex_limit = 1.40
 
     @property
     def vertex_potentials(self):
-        return list(self.df.drop_duplicates(subset=['vertex potential']).copy()['vertex potential'].values)
-
-    @cached_property
-    def _data_dummy(self):
-        return {item : [] for item in self.charge_indexes}
+        return list(self.df['vertex potential'].dropna().unique())
 
     @cached_property
     def data_short(self):
-        import copy
-
-        data_short = copy.deepcopy(self._data_dummy) #!
-
-        for vertex_potential in self.vertex_potentials:
-            if vertex_potential >= self.vertex_limit_lower and vertex_potential <= self.vertex_limit_upper:
-                df_vertex = self.df[self.df['vertex potential'] == vertex_potential].copy()
-                data_short['vertex potential'].append(vertex_potential)
-                for item in data_short:
-                    if not item == 'vertex potential':
-                        mean_value = df_vertex[item].mean()
-
-                        data_short[item].append(mean_value)
-
-        return data_short
+        return {item: list(values) for item, values in self.df_short.items()}
 
     @cached_property
     def df_short(self):
-        import pandas as pd
-        return pd.DataFrame(self.data_short)
+        r"""
+        The mean of each charge for each vertex potential within the vertex limits.
+        """
+        df = self.df[self.charge_indexes].dropna(subset=['vertex potential'])
+        with stage("statistics", rows=len(df)):
+            df = df[(df['vertex potential'] >= self.vertex_limit_lower) & (df['vertex potential'] <= self.vertex_limit_upper)]
+            return df.groupby('vertex potential', as_index=False, sort=True).mean()[self.charge_indexes]
 
     @cached_property
     def charge_indexes(self):
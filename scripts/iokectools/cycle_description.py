@@ -1,12 +1,109 @@
+import weakref
 from functools import cached_property
 
 
+class CycleData:
+    r"""
+    A handle to the data of a single cycle file, which is loaded on first access to `df`.
+
+    Handles are shared: `CycleData.get` returns the same handle for the same file and loading
+    parameters as long as it is in use, such that the data is loaded only once.
+    The dataframe is shared by all users of the handle and must not be modified;
+    stages adding columns work on a (shallow) copy of it.
+    """
+
+    _handles = weakref.WeakValueDictionary()
+
+    def __init__(self, folder, filename, usecols=None, dtype=None):
+        self.folder = folder
+        self.filename = filename
+        self.usecols = usecols
+        self.dtype = dtype
+
+    @classmethod
+    def get(cls, folder, filename, usecols=None, dtype=None):
+        key = (folder, filename, None if usecols is None else tuple(usecols), dtype)
+        handle = cls._handles.get(key)
+        if handle is None:
+            handle = cls(folder, filename, usecols=usecols, dtype=dtype)
+            cls._handles[key] = handle
+        return handle
+
+    @cached_property
+    def df(self):
+        from .folderindex import file_stat
+        from .workingfiles import WorkingFiles
+
+        files = WorkingFiles(self.folder, [self.filename], usecols=self.usecols, dtype=self.dtype)
+        self._loaded = [file_stat(path) for path in files.filesfullpath]
+        return files.create_concat_df()
+
+    @property
+    def fingerprint(self):
+        r"""
+        A tuple identifying the data of the handle by the content of the file, which is determined without loading the data.
+        If the file changed after the data was loaded, the loaded data is identified by its content instead.
+        """
+        from .cache import frame_hash
+        from .folderindex import FolderIndex, file_stat
+        from .results import file_hash
+
+        paths = FolderIndex.get(self.folder).find([self.filename])
+        if "df" in self.__dict__ and [file_stat(path) for path in paths] != self._loaded:
+            return ("frame", frame_hash(self.df))
+        return ("file", *[file_hash(path) for path in paths], self.usecols, self.dtype)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class Cycle(dict):
+    r"""
+    The description of a cycle, where the key `df` is provided by a `CycleData` handle
+    and is only loaded when it is accessed.
+    The key is not listed in the dict, unless the dataframe was provided in the description.
+    """
+
+    def __init__(self, description, data):
+        super().__init__(description)
+        self.data = data
+
+    def __missing__(self, key):
+        if key == "df" and self.data is not None:
+            return self.data.df
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 class CycleDescription:
-    def __init__(self, experiment_description):
+    r"""
+    Loads the data of the cycles in an experiment description.
+
+    usecols: the columns loaded from the cycle files. By default all columns are loaded.
+    With `'pipeline'` only the columns required by `BatchIntegration` are loaded.
+    dtype: the dtype of the floating point columns, e.g., `float32` (see `WorkingFiles`).
+
+    Instead of a file per cycle, the experiment description can name a `measurement file`
+    in the data folder containing all cycles, which is segmented with `segment.Segments`
+    (with the optional `hysteresis` of the description). The data of a cycle is then a slice
+    of the data of the measurement file. Without `cycles` all detected cycles are evaluated,
+    with the `K_prefactor` and `K_power` of the experiment description.
+    """
+    def __init__(self, experiment_description, usecols=None, dtype=None):
         self._experiment_description = experiment_description
-        self._cycle_description = self._experiment_description["cycles"]
+        self.usecols = usecols
+        self.dtype = dtype
+        self._cycle_description = self._experiment_description.get("cycles")
         self.datafolder = self._experiment_description["data folder"]
-        self.experiment_name = self._experiment_description["experiment name"]
+        self.experiment_name = self._experiment_description.get("experiment name")
 
     @property
     def filenames(self):
@@ -22,22 +119,65 @@ class CycleDescription:
             for key in self.experiment_description["cycles"]
         ]
 
-    def get_df(self, filename):
-        from .workingfiles import WorkingFiles
+    def get_data(self, filename):
+        r"""
+        Returns the shared `CycleData` handle of a cycle file.
+        """
+        return CycleData.get(self.datafolder, filename, usecols=self._usecols, dtype=self.dtype)
+
+    @property
+    def _usecols(self):
+        if self.usecols == "pipeline":
+            from .batchintegration import BatchIntegration
 
-        return WorkingFiles(self.datafolder, [filename]).create_concat_df()
+            return BatchIntegration.required_columns()
+        return self.usecols
+
+    @cached_property
+    def segments(self):
+        r"""
+        The `Segments` of the measurement file or `None` if the cycles are stored in individual files.
+        """
+        if "measurement file" not in self._experiment_description:
+            return None
+
+        from .segment import Segments
+
+        return Segments.get(
+            self.datafolder,
+            self._experiment_description["measurement file"],
+            hysteresis=self._experiment_description.get("hysteresis", 0.05),
+            usecols=self._usecols,
+            dtype=self.dtype,
+        )
+
+    def get_df(self, filename):
+        return self.get_data(filename).df
 
     @cached_property
     def experiment_description(self):
-        import copy
-        experiment_description = copy.deepcopy(self._experiment_description)
-        for key in experiment_description["cycles"]:
-            filename = f"{self.experiment_name}{key}.csv"
-            experiment_description["cycles"][key].setdefault("filename", filename)
-            experiment_description["cycles"][key].setdefault("cycle", key)
-            experiment_description["cycles"][key].setdefault(
-                "df", self.get_df(filename)
-            )
+        r"""
+        The experiment description, where the description of each cycle is a `Cycle`,
+        providing the data of the cycle in the key `df`, which is loaded on first access.
+        """
+        cycles = self._cycle_description
+        if cycles is None:
+            defaults = {item: self._experiment_description[item] for item in ["K_prefactor", "K_power"] if item in self._experiment_description}
+            cycles = {key: dict(defaults) for key in self.segments.cycles()}
+
+        experiment_description = dict(self._experiment_description)
+        experiment_description["cycles"] = {}
+        for key, description in cycles.items():
+            if self.segments is not None and "filename" not in description:
+                filename = self._experiment_description["measurement file"]
+                data = None if "df" in description else self.segments.handle(key)
+            else:
+                filename = description.get("filename", f"{self.experiment_name}{key}.csv")
+                data = None if "df" in description else self.get_data(filename)
+            cycle = Cycle(description, data)
+            cycle.setdefault("filename", filename)
+            cycle.setdefault("cycle", key)
+            experiment_description["cycles"][key] = cycle
 
         return experiment_description
 
@@ -0,0 +1,108 @@
+r"""
+Estimates the time delay between the current density and the ion current of a cycle
+by cross-correlation, which is evaluated with a single FFT.
+
+The delay is returned as an `interval` in the convention of `Timeshift`, i.e.,
+the ion current at `time + interval` corresponds to the current density at `time`.
+"""
+import numpy as np
+
+
+def resample(time, values, step):
+    r"""
+    Returns the values of a time series on an equidistant time axis with a spacing of `step`,
+    starting at the first time of the series.
+
+    EXAMPLES::
+
+        >>> resample(np.array([0.0, 0.1, 0.3]), np.array([0.0, 1.0, 3.0]), 0.1)
+        array([0., 1., 2., 3.])
+
+    """
+    grid = time[0] + step * np.arange(int(np.floor((time[-1] - time[0]) / step + 1e-9)) + 1)
+    return np.interp(grid, time, values)
+
+
+def cross_correlation(a, b):
+    r"""
+    Returns the cross-correlation `c[lag] = sum(a[n] * b[n + lag])` of two series of the same length
+    for all lags, where negative lags are found at the end of the array (as in `numpy.fft`).
+    The means of the series are subtracted before correlating.
+    """
+    from scipy.fft import irfft, next_fast_len, rfft
+
+    a = a - a.mean()
+    b = b - b.mean()
+
+    length = next_fast_len(2 * len(a) - 1, real=True)
+    return irfft(np.conj(rfft(a, length)) * rfft(b, length), length)
+
+
+def estimate_delay(time, current, ion_current, max_delay=2.0, step=None):
+    r"""
+    Returns the interval (in the units of `time`), by which the ion current must be shifted
+    to match the current density, as defined in `Timeshift`.
+
+    The series are resampled to an equidistant time axis with spacing `step`
+    (by default the median spacing of `time`) and cross-correlated. The maximum correlation
+    within `max_delay` is refined with a parabola through its neighbouring lags
+    to obtain a delay with sub-sample precision.
+
+    EXAMPLES::
+
+        >>> time = np.arange(0, 100, 0.05)
+        >>> current = np.exp(-((time - 50) / 2) ** 2)
+        >>> ion_current = np.exp(-((time - 50.37) / 2) ** 2)
+        >>> round(estimate_delay(time, current, ion_current), 2)
+        0.37
+
+    """
+    time = np.asarray(time, dtype=float)
+    current = np.asarray(current, dtype=float)
+    ion_current = np.asarray(ion_current, dtype=float)
+
+    defined = ~(np.isnan(time) | np.isnan(current) | np.isnan(ion_current))
+    time, current, ion_current = time[defined], current[defined], ion_current[defined]
+    order = np.argsort(time, kind="stable")
+    time, current, ion_current = time[order], current[order], ion_current[order]
+
+    if len(time) < 3:
+        raise ValueError("At least three data points are required to estimate a delay.")
+
+    step = step or float(np.median(np.diff(time)))
+    current = resample(time, current, step)
+    ion_current = resample(time, ion_current, step)
+
+    correlation = cross_correlation(current, ion_current)
+
+    max_lag = min(int(max_delay / step), len(current) - 2)
+    lags = np.arange(-max_lag, max_lag + 1)
+    values = correlation[lags]
+
+    n = int(np.argmax(values))
+    lag = float(lags[n])
+    if 0 < n < len(values) - 1:
+        left, center, right = values[n - 1], values[n], values[n + 1]
+        curvature = left - 2 * center + right
+        if curvature < 0:
+            lag += 0.5 * (left - right) / curvature
+
+    return lag * step
+
+
+def estimate_intervals(cycle_description, mass=44, ion_current=None, max_delay=2.0, als=None):
+    r"""
+    Returns a dict with the estimated interval of each cycle of a `CycleDescription`,
+    determined from the baseline corrected data, which is also used by `BatchIntegration`.
+    """
+    from .baseline import Baseline
+
+    ion_current = ion_current or f"ion_current_M{mass}_UVS_ALS_sub_norm_filt"
+
+    intervals = {}
+    for key, cycle in cycle_description.cycle_description.items():
+        df = Baseline(cycle["df"], mass=mass, als=als).df
+        intervals[key] = estimate_delay(
+            df["time"], df["current1_muA_geo"], df[ion_current], max_delay=max_delay
+        )
+    return intervals
@@ -28,7 +28,7 @@ class ExpDescriptions:
         r"""
         Returns the available cycles in the data description that should be evaluated.
         """
-        return list(self.exp_description['cycles'].keys())
+        return list(self._exp_description['cycles'].keys())
 
     @property
     def cycles_min(self):
@@ -44,92 +44,87 @@ class ExpDescriptions:
         """
         return max(self.cycles)
 
-    def _cycle_K(self, K1, K2):
+    @cached_property
+    def K_matrix(self):
         r"""
-        A dict defining the k values for the initial and final cycle.
+        Returns an array of shape (K values, K values, cycles) with the K prefactor of each cycle
+        on the straight line from the i-th K value at the first cycle to the j-th K value at the last cycle.
         """
-        return {'K_prefactor':[K1, K2], 'cycle':[self.cycles_min, self.cycles_max]}
+        import numpy as np
+
+        K_values = np.array(self.K_values, dtype=float)
+        cycles = np.array(self.cycles, dtype=float)
+
+        if self.cycles_max == self.cycles_min:
+            position = np.zeros(len(cycles))
+        else:
+            position = (cycles - self.cycles_min) / (self.cycles_max - self.cycles_min)
 
-    # @property
-    # def _df_cycle_K(self):
-    #     import pandas as pd
-    #     return pd.DataFrame(self._cycle_K)
+        K_first = K_values[:, None, None]
+        K_last = K_values[None, :, None]
+        return K_first + (K_last - K_first) * position[None, None, :]
 
     @property
-    def cycles_K(self):
+    def K_lines(self):
+        return self.K_matrix.reshape(-1, len(self.cycles)).tolist()
+
+    def K_overrides(self):
         r"""
-        Returns a list of cycles with initial and final K values,
-        as well as the initial and final cycle number.
+        Yields a dict with the K prefactor of each cycle for each K line.
         """
-        import pandas as pd
-
-        cycles_K = {}
-        n=0
-        for _K_min in self.K_values:
-            for _K_max in self.K_values:
-                cycles_K.setdefault(n, {})
-                _cycle_K = self._cycle_K(_K_min, _K_max)
-                cycles_K[n] = _cycle_K
-                #cycles_K[n]['df'] = pd.DataFrame(_cycle_K)
-                n+=1
-        return cycles_K
-
-    def K_change(self):
+        for K_line in self.K_matrix.reshape(-1, len(self.cycles)):
+            yield dict(zip(self.cycles, K_line.tolist()))
+
+    def override(self, K_prefactors):
         r"""
-        Returns a list with K factors, which has the same length than the number of cycles,
-        where each value of the list corresponds to the K factor of a specific cycle.
+        Returns a copy of the experiment description, where the K prefactors of the cycles
+        are replaced by `K_prefactors`. Only the dicts describing the experiment and the cycles are copied,
+        all other values, such as provided dataframes, are shared with the original experiment description.
         """
-        for key, item in self.cycles_K.items():
-            item['K_prefactor']
-
-    @property
-    def dfs_cycles_K(self):
-        import pandas as pd
-
-        cycles_K = []
-
-        for _K_min in self.K_values:
-            for _K_max in self.K_values:
-                # cycles_K.setdefault(n, {})
-                # _cycle_K = self._cycle_K(_K_min, _K_max)
-                # cycles_K[n] = _cycle_K
-                cycles_K.append(pd.DataFrame(self._cycle_K(_K_min, _K_max)))
-        return cycles_K
-
-    def regression_stats_K(self, df):
-        from scipy.stats import linregress
-        return linregress(df['cycle'], df['K_prefactor'])
-
-    def regression_K(self, regression):
-        return [cycle*regression.slope + regression.intercept for cycle in self.cycles]
-
-    @property
-    def K_lines(self):
-        K_lines = []
-        for df in self.dfs_cycles_K:
-            regression = self.regression_stats_K(df)
-            K_lines.append(self.regression_K(regression))
-        return K_lines
+        experiment = dict(self._exp_description)
+        experiment['cycles'] = {
+            cycle: {**description, 'K_prefactor': K_prefactors.get(cycle, description.get('K_prefactor'))}
+            for cycle, description in self._exp_description['cycles'].items()
+        }
+        return experiment
+
+    def iter_exp_descriptions(self):
+        r"""
+        Yields the experiment description of each K line.
+        """
+        for K_prefactors in self.K_overrides():
+            yield self.override(K_prefactors)
 
     @property
     def exp_descriptions(self):
-        eds = []
+        return list(self.iter_exp_descriptions())
 
-        for K_line in self.K_lines:
-            experiment = self.exp_description.copy()
+    @cached_property
+    def cycle_description(self):
+        r"""
+        The `CycleDescription` of the experiment, which holds the data of the cycles,
+        which is shared by the `CycleDescription` of all K lines.
+        """
+        from .cycle_description import CycleDescription
 
-            for idx, cycle in enumerate(self.cycles):
-                experiment['cycles'][cycle]['K_prefactor'] = K_line[idx]
+        cycle_description = CycleDescription(self._exp_description)
+        # Creates the shared handles of the cycle data, which are kept as long as this instance exists.
+        cycle_description.experiment_description
+        return cycle_description
 
-            eds.append(experiment)
-            # exp = self.exp_description.copy()
+    def iter_eds(self):
+        r"""
+        Yields a `CycleDescription` for each K line, which share the data of the cycles.
+        """
+        from .cycle_description import CycleDescription
 
-        return eds
+        shared = self.cycle_description
+        for experiment in self.iter_exp_descriptions():
+            yield CycleDescription(experiment, usecols=shared.usecols, dtype=shared.dtype)
 
     @cached_property
     def eds(self):
-        from .cycle_description import CycleDescription
-        return [CycleDescription(ed) for ed in self.exp_descriptions]
+        return list(self.iter_eds())
 
     @property
     def plot_K_parameter_space(self):
@@ -0,0 +1,221 @@
+r"""
+An index of the files in a folder and its subfolders, which is shared by all `WorkingFiles`
+of the same folder.
+
+The index is built once per folder. On subsequent use only the modification times of the
+(sub)folders are checked and only modified folders are listed again.
+
+The folder can also be a ZIP archive, such as `data/Pt111.zip`, or a folder within an archive,
+such as `data/Pt111.zip/Pt111`. The files in the archive are then listed as paths within the
+archive, e.g., `data/Pt111.zip/Pt111/file.csv`, which can be opened with `open_file`
+without extracting the archive.
+"""
+import os
+import re
+import zipfile
+from functools import lru_cache
+
+
+def split_archive(path):
+    r"""
+    Returns the path of a ZIP archive and the name of a member (or folder) in that archive
+    if `path` points into an archive and `None` otherwise.
+    """
+    parts = re.split(r"[\\/]", path)
+    for n in range(len(parts), 0, -1):
+        if parts[n - 1].lower().endswith(".zip"):
+            archive = os.sep.join(parts[:n]) or os.sep
+            if os.path.isfile(archive):
+                return archive, "/".join(part for part in parts[n:] if part)
+    return None
+
+
+def open_file(path):
+    r"""
+    Returns a binary file object of a file, which might also be located in a ZIP archive.
+    """
+    archive = split_archive(path)
+    if archive is None:
+        return open(path, "rb")
+
+    archive, member = archive
+    # The archive remains open until the member is closed.
+    with zipfile.ZipFile(archive) as zip_file:
+        return zip_file.open(member)
+
+
+@lru_cache(maxsize=16)
+def _archive_members(archive, size, mtime):
+    r"""
+    Returns the members of a ZIP archive by their name. The result is cached for the given state of the archive.
+    """
+    with zipfile.ZipFile(archive) as zip_file:
+        return {info.filename: info for info in zip_file.infolist()}
+
+
+def archive_members(archive):
+    r"""
+    Returns the members of a ZIP archive by their name, which are only read again when the archive changed.
+    """
+    stat = os.stat(archive)
+    return _archive_members(os.path.abspath(archive), stat.st_size, stat.st_mtime_ns)
+
+
+def file_stat(path):
+    r"""
+    Returns a tuple identifying the state of a file, which might also be located in a ZIP archive.
+    For files in an archive the tuple contains the CRC of the file.
+    """
+    archive = split_archive(path)
+    if archive is None:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    archive, member = archive
+    stat = os.stat(archive)
+    info = archive_members(archive)[member]
+    return (os.path.abspath(archive), stat.st_size, stat.st_mtime_ns, member, info.CRC)
+
+
+class FolderIndex:
+    r"""
+    Lists all files in a folder and its subfolders ending with `endswith`
+    in the same order as `os.walk` and maps the file names to their full paths.
+
+    Use `FolderIndex.get` to obtain an up to date index shared with other users of the same folder.
+    """
+
+    _indexes = {}
+
+    def __init__(self, folder, endswith=".csv"):
+        self.folder = folder
+        self.endswith = endswith
+        self._directories = {}
+        self.files = []
+        self.filenames = {}
+
+    @classmethod
+    def get(cls, folder, endswith=".csv"):
+        r"""
+        Returns the shared index of a folder, which is refreshed before it is returned.
+        """
+        key = (os.path.abspath(folder), endswith)
+        if key not in cls._indexes:
+            cls._indexes[key] = cls(folder, endswith)
+
+        index = cls._indexes[key]
+        index.refresh()
+        return index
+
+    def _scan(self, directory):
+        r"""
+        Returns the files and subfolders of a single directory in the order of `os.scandir`.
+        """
+        files = []
+        directories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if is_dir:
+                        # `os.walk` does not follow symbolic links to directories
+                        if not entry.is_symlink():
+                            directories.append(entry.name)
+                    elif entry.name.endswith(self.endswith):
+                        files.append(entry.name)
+        except OSError:
+            pass
+        return files, directories
+
+    def _refresh_archive(self, archive, folder):
+        r"""
+        Lists the files in a ZIP archive if the archive changed since the last refresh.
+        """
+        try:
+            mtime = os.stat(archive).st_mtime_ns
+        except OSError:
+            self._directories, self.files, self.filenames = {}, [], {}
+            return
+
+        if self._directories.get(archive) == mtime:
+            return
+
+        self._directories = {archive: mtime}
+        self.files = []
+        self.filenames = {}
+
+        prefix = f"{folder}/" if folder else ""
+        for member in archive_members(archive):
+            name = member.rsplit("/", 1)[-1]
+            if member.startswith(prefix) and name.endswith(self.endswith):
+                path = os.path.join(archive, *member.split("/"))
+                self.files.append(path)
+                self.filenames.setdefault(name, []).append(path)
+
+    def refresh(self):
+        r"""
+        Lists all folders whose modification time changed since the last refresh.
+        """
+        archive = split_archive(self.folder)
+        if archive is not None:
+            self._refresh_archive(*archive)
+            return
+
+        changed = False
+        directories = {}
+        pending = [self.folder]
+        while pending:
+            directory = pending.pop()
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+
+            if directory in self._directories and self._directories[directory][0] == mtime:
+                directories[directory] = self._directories[directory]
+            else:
+                directories[directory] = (mtime, *self._scan(directory))
+                changed = True
+
+            pending.extend(
+                os.path.join(directory, name)
+                for name in reversed(directories[directory][2])
+            )
+
+        if changed or directories.keys() != self._directories.keys():
+            self._directories = directories
+            self._update()
+
+    def _update(self):
+        self.files = []
+        self.filenames = {}
+
+        pending = [self.folder]
+        while pending:
+            directory = pending.pop()
+            if directory not in self._directories:
+                continue
+            _, files, directories = self._directories[directory]
+            for file in files:
+                path = os.path.join(directory, file)
+                self.files.append(path)
+                self.filenames.setdefault(file, []).append(path)
+            pending.extend(os.path.join(directory, name) for name in reversed(directories))
+
+    def find(self, items):
+        r"""
+        Returns the full paths of the files in the folder matching `items`.
+
+        An item matching the name of one or more files returns these files.
+        Otherwise all files whose full path contains the item are returned.
+        """
+        paths = []
+        for item in items:
+            if item in self.filenames:
+                paths.extend(self.filenames[item])
+            else:
+                paths.extend(file for file in self.files if item in file)
+        return paths
@@ -0,0 +1,176 @@
+r"""
+Opt-in instrumentation of the stages of the evaluation.
+
+The stages of the pipeline, e.g., loading a file, the baseline correction or the integration,
+are wrapped in `stage`, which does nothing unless a `Recorder` is active. An active recorder
+records the wall time, the number of rows processed and, optionally, the memory allocated
+by each call of a stage, which can be summarized in a table or exported as a Chrome trace
+(to be opened in `chrome://tracing` or https://ui.perfetto.dev)::
+
+    >>> from iokectools.instrument import Recorder
+    >>> with Recorder(memory=True) as recorder:  # doctest: +SKIP
+    ...     charge_statistics(experiment_description).df_short
+    >>> recorder.table()  # doctest: +SKIP
+    >>> recorder.chrome_trace("trace.json")  # doctest: +SKIP
+
+Messages of the modules are logged to the logger `iokectools` (see `logging`), which can be silenced with
+`logging.getLogger("iokectools").setLevel(logging.WARNING)`.
+"""
+import contextlib
+import os
+import threading
+import time
+import tracemalloc
+
+# the active recorder, if any
+_recorder = None
+
+
+class Recorder:
+    r"""
+    Records the calls of the stages of the pipeline while it is active, i.e., within a `with` block.
+
+    memory: whether the memory allocated by each stage is traced with `tracemalloc`, which slows down the evaluation.
+    The recorded bytes of a stage are the peak of the memory allocated during the stage,
+    including the memory allocated by nested stages.
+
+    EXAMPLES::
+
+        >>> with Recorder() as recorder:
+        ...     with stage("load") as frame:
+        ...         with stage("baseline", rows=10):
+        ...             pass
+        ...         frame["rows"] = 10
+        >>> [(event["name"], event["rows"], event["depth"]) for event in recorder.events]
+        [('baseline', 10, 1), ('load', 10, 0)]
+
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.events = []
+        self._stack = []
+        self._started_tracing = False
+
+    def __enter__(self):
+        global _recorder
+        if _recorder is not None:
+            raise RuntimeError("Another recorder is already active.")
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        self._origin = time.perf_counter()
+        _recorder = self
+        return self
+
+    def __exit__(self, *exc):
+        global _recorder
+        _recorder = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=None):
+        frame = {"name": name, "rows": rows, "depth": len(self._stack), "nested": 0.0}
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+            frame["current"] = frame["peak"] = current
+            tracemalloc.reset_peak()
+
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield frame
+        finally:
+            duration = time.perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]["nested"] += duration
+
+            allocated = None
+            if self.memory:
+                peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                allocated = peak - frame["current"]
+                if self._stack:
+                    self._stack[-1]["peak"] = max(self._stack[-1]["peak"], peak)
+                tracemalloc.reset_peak()
+
+            self.events.append({
+                "name": name,
+                "start": start - self._origin,
+                "duration": duration,
+                "self": duration - frame["nested"],
+                "rows": frame["rows"],
+                "bytes": allocated,
+                "depth": frame["depth"],
+                "thread": threading.get_ident(),
+            })
+
+    def table(self):
+        r"""
+        Returns a dataframe with the number of calls, the total and mean wall time (in s),
+        the wall time not spent in nested stages, the rows processed and the allocated bytes of each stage,
+        sorted by the total wall time.
+        """
+        import pandas as pd
+
+        columns = ["name", "duration", "self", "rows", "bytes"]
+        df = pd.DataFrame(self.events, columns=columns)
+        df[["rows", "bytes"]] = df[["rows", "bytes"]].astype(float)
+
+        table = df.groupby("name").agg(
+            calls=("duration", "size"),
+            time=("duration", "sum"),
+            mean_time=("duration", "mean"),
+            self_time=("self", "sum"),
+            rows=("rows", "sum"),
+            bytes=("bytes", "sum"),
+            max_bytes=("bytes", "max"),
+        )
+        if not self.memory:
+            table = table.drop(columns=["bytes", "max_bytes"])
+        return table.sort_values("time", ascending=False)
+
+    def trace_events(self):
+        r"""
+        Returns the recorded calls as events of the Chrome trace format with times in µs.
+        """
+        return [
+            {
+                "name": event["name"],
+                "ph": "X",
+                "ts": event["start"] * 1e6,
+                "dur": event["duration"] * 1e6,
+                "pid": os.getpid(),
+                "tid": event["thread"],
+                "args": {key: event[key] for key in ["rows", "bytes"] if event[key] is not None},
+            }
+            for event in self.events
+        ]
+
+    def chrome_trace(self, path):
+        r"""
+        Writes the recorded calls to a JSON file in the Chrome trace format.
+        """
+        import json
+
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, file)
+
+
+def stage(name, rows=None):
+    r"""
+    Returns a context manager recording a call of the stage `name`, processing `rows` rows,
+    with the active `Recorder`. Without an active recorder, nothing is recorded.
+
+    The context manager provides a dict, in which the `rows` can be set when they are only known
+    at the end of the stage.
+    """
+    if _recorder is None:
+        return contextlib.nullcontext({})
+    return _recorder.stage(name, rows=rows)
@@ -1,5 +1,40 @@
+import logging
 from functools import cached_property
 
+import numpy as np
+
+from .instrument import stage
+
+logger = logging.getLogger(__name__)
+
+
+def masked_cumulative_trapezoid(x, y, masks):
+    r"""
+    Returns the cumulative trapezoidal integral of `y` over `x` for each row of `masks`.
+
+    Only the points selected in a row are integrated, i.e., consecutive selected points
+    are connected by a trapezoid, which is identical to integrating `df[mask]`
+    with `scipy.integrate.cumtrapz(x=..., y=..., initial=0)`.
+    Points that are not selected carry the value of the previous selected point.
+
+    `y` is either a 1D array shared by all masks or a 2D array with one row per mask.
+    """
+    masks = np.atleast_2d(masks)
+    y = np.broadcast_to(y, masks.shape)
+    rows = np.arange(masks.shape[0])[:, None]
+    index = np.broadcast_to(np.arange(masks.shape[1]), masks.shape)
+
+    # index of the previously selected point for each point, -1 if there is none
+    previous = np.maximum.accumulate(np.where(masks, index, -1), axis=1)
+    previous = np.concatenate(
+        [np.full((masks.shape[0], 1), -1), previous[:, :-1]], axis=1
+    )
+    step = masks & (previous >= 0)
+    previous = np.where(step, previous, index)
+
+    area = (x - x[previous]) * (y + y[rows, previous]) / 2.0
+    return np.cumsum(np.where(step, area, 0.0), axis=1)
+
 
 class Integrate:
     def __init__(self, df):
@@ -82,7 +117,7 @@ class COIntegral(Integrate):
         # We need to add some value to the vertex limits from the df.
         # Otherwise the point at the vertex will not be considered during the integration process.
         def default_none():
-            return {'upper': self.df['potential'].max() + 1, 'lower': self.df['potential'].min() - 1, 'current': None }
+            return {'upper': np.nanmax(self.arrays['potential']) + 1, 'lower': np.nanmin(self.arrays['potential']) - 1, 'current': None }
 
         _limits = {"Q_tot_j": default_none(),
                 "Q_tot_j_pos": default_none(),
@@ -102,7 +137,7 @@ class COIntegral(Integrate):
         # print(provided_limits)
 
         if provided_limits == None:
-            print('no limits provided')
+            logger.debug("No integration limits provided, integrating the entire cycle.")
             return _limits
 
         for charge_name, _ in provided_limits.items():
@@ -125,25 +160,41 @@ class COIntegral(Integrate):
 
 
 
-    @staticmethod
-    def charge_description(func):
-        """A decorator, returning the dataframe and metadata from evaluated charges."""
-
-        def inner(self):
-            df, axis = func(self)
-            return {"df": df, "total charge": df["Q_total"].iloc[-1], 'axis': axis}
+    # Integration regions evaluated by the class, in the order of `charges`.
+    # Each region is defined by the part of the cycle it covers (`scan`), the axis integrated
+    # and whether the absolute values of the axis are integrated.
+    regions = {
+        "Q_tot_j": {"scan": "full", "axis": "current_density", "absolute": False},
+        "Q_tot_j_pos": {"scan": "pos", "axis": "current_density", "absolute": False},
+        "Q_tot_j_neg": {"scan": "neg", "axis": "current_density", "absolute": False},
+        "Q_tot_M": {"scan": "full", "axis": "ion_current", "absolute": False},
+        "Q_tot_M_pos": {"scan": "pos", "axis": "ion_current", "absolute": False},
+        "Q_tot_M_neg": {"scan": "neg", "axis": "ion_current", "absolute": False},
+        "Q cathodic": {"scan": "neg", "axis": "current_density", "absolute": True},
+        "Q_tot_j_sim_pos": {"scan": "pos", "axis": "redox_CV_current", "absolute": False},
+        "Q_tot_j_sim_neg": {"scan": "neg", "axis": "redox_CV_current", "absolute": False},
+    }
 
-        return inner
+    @cached_property
+    def arrays(self):
+        r"""
+        The columns of the input dataframe required for the integration as NumPy arrays.
+        """
+        return {
+            "time": self._df["time"].to_numpy(dtype=float),
+            "potential": self._df["potential"].to_numpy(dtype=float),
+            "current_density": self._df[self.current_density].to_numpy(dtype=float),
+            "ion_current": self._df[self.ion_current].to_numpy(dtype=float),
+            "redox_CV_current": self._df[self.redox_CV_current].to_numpy(dtype=float),
+        }
 
     @cached_property
     def vertex_point(self):
-        return self.df[self.df["potential"] == self.df["potential"].max()].index.values[
-            0
-        ]
+        return int(np.nanargmax(self.arrays["potential"]))
 
     @cached_property
     def vertex_potential(self):
-        return self.df["potential"].max()
+        return self.arrays["potential"][self.vertex_point]
 
     @cached_property
     def df_pos(self):
@@ -160,104 +211,158 @@ class COIntegral(Integrate):
         return self.df[self.vertex_point :].reset_index(drop=True)
 
     @cached_property
-    @charge_description
+    def K_independent_masks(self):
+        r"""
+        Returns a boolean array of shape (regions, points) selecting the points of
+        the input dataframe which are integrated in each region of `regions`,
+        disregarding the sign of `current_H_sub`, which is the only condition depending on K.
+        """
+        with stage("integration masks", rows=len(self.arrays["potential"])):
+            return self._K_independent_masks()
+
+    def _K_independent_masks(self):
+        potential = self.arrays["potential"]
+        j = self.arrays["current_density"]
+        index = np.arange(len(potential))
+        scans = {
+            "full": np.ones(len(potential), dtype=bool),
+            "pos": index <= self.vertex_point,
+            "neg": index >= self.vertex_point,
+        }
+
+        def above(name):
+            return potential > self.limits[name]["lower"]
+
+        def below(name):
+            return potential < self.limits[name]["upper"]
+
+        conditions = {
+            "Q_tot_j": (j > 0) & above("Q_tot_j"),
+            "Q_tot_j_pos": (j > 0) & above("Q_tot_j_pos"),
+            "Q_tot_j_neg": j > 0,
+            "Q_tot_M": above("Q_tot_M"),
+            "Q_tot_M_pos": above("Q_tot_M_pos"),
+            "Q_tot_M_neg": above("Q_tot_M_neg"),
+            "Q cathodic": (j < 0) & above("Q cathodic"),
+            "Q_tot_j_sim_pos": above("Q_tot_j_sim_pos") & below("Q_tot_j_sim_pos"),
+            "Q_tot_j_sim_neg": above("Q_tot_j_sim_neg") & below("Q_tot_j_sim_neg"),
+        }
+
+        return np.array(
+            [
+                scans[region["scan"]] & conditions[name]
+                for name, region in self.regions.items()
+            ]
+        )
+
+    @cached_property
+    def region_masks(self):
+        r"""
+        Returns a boolean array of shape (regions, points) selecting the points of
+        the input dataframe which are integrated in each region of `regions`.
+        """
+        masks = self.K_independent_masks.copy()
+        masks[list(self.regions).index("Q_tot_j_sim_neg")] &= (
+            self.arrays["redox_CV_current"] < 0
+        )
+        return masks
+
+    @cached_property
+    def cumulative_charges(self):
+        r"""
+        Returns the absolute cumulative charge of all regions in `regions` as an
+        array of shape (regions, points), computed in a single pass.
+        """
+        masks = self.region_masks
+        with stage("integration", rows=masks.size):
+            y = np.array(
+                [
+                    np.abs(self.arrays[region["axis"]])
+                    if region["absolute"]
+                    else self.arrays[region["axis"]]
+                    for region in self.regions.values()
+                ]
+            )
+            return np.abs(
+                masked_cumulative_trapezoid(self.arrays["time"], y, masks)
+            )
+
+    @cached_property
+    def total_charges(self):
+        r"""
+        Returns a dict with the total charge of each region in `regions`.
+        """
+        if not len(self.arrays["time"]):
+            return {name: 0.0 for name in self.regions}
+
+        return dict(zip(self.regions, self.cumulative_charges[:, -1]))
+
+    def _charge(self, name):
+        r"""
+        Returns the dataframe and metadata of an integrated region.
+        """
+        with stage(f"region {name}", rows=len(self.arrays["time"])):
+            return self._region(name)
+
+    def _region(self, name):
+        n = list(self.regions).index(name)
+        region = self.regions[name]
+        axis = getattr(self, region["axis"])
+        mask = self.region_masks[n]
+        charge = self.cumulative_charges[n]
+
+        if region["scan"] == "pos":
+            df, scan = self.df_pos, slice(None, self.vertex_point + 1)
+        elif region["scan"] == "neg":
+            df, scan = self.df_neg, slice(self.vertex_point, None)
+        else:
+            df, scan = self.df, slice(None)
+        mask, charge = mask[scan], charge[scan]
+
+        if name == "Q cathodic" and not mask.any():
+            df_region = df[0:2].copy()
+            df_region["Q_total"] = 0
+            return {"df": df_region, "total charge": 0, "axis": axis}
+
+        df_region = df[mask].copy()
+        df_region["Q_total"] = charge[mask]
+        return {"df": df_region, "total charge": self.total_charges[name], "axis": axis}
+
+    @cached_property
     def charge_total_j(self):
-        axis = self.current_density
-        ipos2 = self.df["current1_muA_geo"] > 0
-        U_limit_lower = self.df["potential"] > self.limits['Q_tot_j']['lower']
-        df_j = self.df[ipos2 & U_limit_lower].copy()
-        df_j["Q_total"] = self.integrate(df_j, "time", axis)
-        return df_j, axis
+        return self._charge("Q_tot_j")
 
     @cached_property
-    @charge_description
     def charge_total_j_pos(self):
-        axis = self.current_density
-        ipos2 = self.df_pos["current1_muA_geo"] > 0
-        U_limit_lower = self.df_pos["potential"] > self.limits['Q_tot_j_pos']['lower']
-        df_j = self.df_pos[ipos2 & U_limit_lower].copy()
-        df_j["Q_total"] = self.integrate(df_j, "time", axis)
-        return df_j, axis
+        return self._charge("Q_tot_j_pos")
 
     @cached_property
-    @charge_description
     def charge_total_j_neg(self):
-        axis = self.current_density
-        ipos2 = self.df_neg["current1_muA_geo"] > 0
-        # U_limit_lower = self.df_neg["potential"] > 0.6
-        # df_j = self.df_neg[ipos2 & U_limit_lower].copy()
-        df_j = self.df_neg[ipos2].copy()
-        df_j["Q_total"] = self.integrate(df_j, "time", axis)
-        return df_j, axis
+        return self._charge("Q_tot_j_neg")
 
     @cached_property
-    @charge_description
     def charge_total_j_cathodic(self):
-        axis = self.current_density
-        ipos2 = self.df_neg["current1_muA_geo"] < 0
-        # U_limit_upper = self.df_neg["potential"] > self.cathodic_limit # old
-        U_limit_upper = self.df_neg["potential"] > self.limits['Q cathodic']['lower']
-        df_j = self.df_neg[ipos2 & U_limit_upper].copy()
-        if len(df_j) == 0:
-            df_j = self.df_neg[0:2].copy()
-            df_j["Q_total"] = 0
-            return df_j, axis
-
-        df_j["Q_total"] = self.integrate(df_j, "time", axis, absolute=True)
-        return df_j, axis
+        return self._charge("Q cathodic")
 
     @cached_property
-    @charge_description
     def charge_total_M(self):
-        axis = self.ion_current
-        U_limit_lower = self.df["potential"] > self.limits['Q_tot_M']['lower']
-        df_M = self.df[U_limit_lower].copy()
-        df_M["Q_total"] = self.integrate(df_M, "time", axis)
-        return df_M, axis
+        return self._charge("Q_tot_M")
 
     @cached_property
-    @charge_description
     def charge_total_M_pos(self):
-        axis = self.ion_current
-        U_limit_lower = self.df_pos["potential"] > self.limits['Q_tot_M_pos']['lower']
-        df_M = self.df_pos[U_limit_lower].copy()
-        df_M["Q_total"] = self.integrate(df_M, "time", axis)
-        return df_M, axis
+        return self._charge("Q_tot_M_pos")
 
     @cached_property
-    @charge_description
     def charge_total_M_neg(self):
-        axis = self.ion_current
-        U_limit_lower = self.df_neg["potential"] > self.limits['Q_tot_M_neg']['lower']
-        df_M = self.df_neg[U_limit_lower].copy()
-        df_M["Q_total"] = self.integrate(df_M, "time", axis)
-        return df_M, axis
+        return self._charge("Q_tot_M_neg")
 
     @cached_property
-    @charge_description
     def charge_total_j_sim_pos(self):
-        axis = self.redox_CV_current
-        # ipos2 = self.df_pos[axis] > 0
-        U_limit_lower = self.df_pos["potential"] > self.limits['Q_tot_j_sim_pos']['lower']
-        U_limit_upper = self.df_pos["potential"] < self.limits['Q_tot_j_sim_pos']['upper']
-        # df_j = self.df_pos[ipos2 & U_limit_lower].copy()
-        df_j = self.df_pos[U_limit_lower & U_limit_upper].copy()
-        df_j["Q_total"] = self.integrate(df_j, "time", axis)
-        return df_j, axis
+        return self._charge("Q_tot_j_sim_pos")
 
     @cached_property
-    @charge_description
     def charge_total_j_sim_neg(self):
-        axis = self.redox_CV_current
-        # ipos2 = self.df_neg[axis] < 0
-        # ipos2 = self.df_neg[axis] < 0
-        U_limit_lower = self.df_neg["potential"] > self.limits['Q_tot_j_sim_neg']['lower']
-        U_limit_upper = self.df_neg["potential"] < self.limits['Q_tot_j_sim_neg']['upper']
-        ipos2 = self.df_neg["current_H_sub"] < 0
-        # df_j = self.df_neg[ipos2 & U_limit_lower].copy()
-        df_j = self.df_neg[U_limit_lower & U_limit_upper & ipos2].copy()
-        df_j["Q_total"] = self.integrate(df_j, "time", axis)
-        return df_j, axis
+        return self._charge("Q_tot_j_sim_neg")
 
     @cached_property
     def charges(self):
@@ -273,33 +378,37 @@ class COIntegral(Integrate):
         }
         return charges
 
-    def summary(self, round_values=None):
-        diff_pos = (
-            self.charge_total_j_pos["total charge"] - self.charge_total_M_pos["total charge"]
-        )
-        diff_neg = (
-            self.charge_total_j_neg["total charge"] - self.charge_total_M_neg["total charge"]
-        )
-
-        summary = {
-            "Q_tot_j": self.charge_total_j["total charge"],
-            "Q_tot_M": self.charge_total_M["total charge"],
-            "Q_tot_j - Q_tot_M": self.charge_total_j["total charge"]
-            - self.charge_total_M["total charge"],
-            "Q_tot_j_pos": self.charge_total_j_pos["total charge"],
-            "Q_tot_M_pos": self.charge_total_M_pos["total charge"],
+    @staticmethod
+    def charge_summary(charges, vertex_potential):
+        r"""
+        Returns the summary of the total charges of the regions in `regions`,
+        including differences and sums of these charges.
+        The charges can also be arrays, which are then combined elementwise.
+        """
+        diff_pos = charges["Q_tot_j_pos"] - charges["Q_tot_M_pos"]
+        diff_neg = charges["Q_tot_j_neg"] - charges["Q_tot_M_neg"]
+
+        return {
+            "Q_tot_j": charges["Q_tot_j"],
+            "Q_tot_M": charges["Q_tot_M"],
+            "Q_tot_j - Q_tot_M": charges["Q_tot_j"] - charges["Q_tot_M"],
+            "Q_tot_j_pos": charges["Q_tot_j_pos"],
+            "Q_tot_M_pos": charges["Q_tot_M_pos"],
             "Q_diff_pos = Q_tot_j_pos - Q_tot_M_pos": diff_pos,
-            "Q_tot_j_neg": self.charge_total_j_neg["total charge"],
-            "Q_tot_M_neg": self.charge_total_M_neg["total charge"],
+            "Q_tot_j_neg": charges["Q_tot_j_neg"],
+            "Q_tot_M_neg": charges["Q_tot_M_neg"],
             "Q_diff_neg = Q_tot_j_neg - Q_tot_M_neg": diff_neg,
-            "Q_diff_neg - Q cathodic": diff_neg - self.charge_total_j_cathodic["total charge"],
-            "Q cathodic": self.charge_total_j_cathodic["total charge"],
+            "Q_diff_neg - Q cathodic": diff_neg - charges["Q cathodic"],
+            "Q cathodic": charges["Q cathodic"],
             "Q_diff_pos - Q_diff_neg": diff_pos + diff_neg,
-            "vertex potential": self.vertex_potential,
-            "Q_tot_j_sim_pos": self.charge_total_j_sim_pos["total charge"],
-            "Q_tot_j_sim_neg": self.charge_total_j_sim_neg["total charge"],
-            "Q_tot_j_sim_neg + cathodic": self.charge_total_j_sim_neg["total charge"] + self.charge_total_j_cathodic["total charge"],
+            "vertex potential": vertex_potential,
+            "Q_tot_j_sim_pos": charges["Q_tot_j_sim_pos"],
+            "Q_tot_j_sim_neg": charges["Q_tot_j_sim_neg"],
+            "Q_tot_j_sim_neg + cathodic": charges["Q_tot_j_sim_neg"] + charges["Q cathodic"],
         }
+
+    def summary(self, round_values=None):
+        summary = self.charge_summary(self.total_charges, self.vertex_potential)
         if not round_values:
             return summary
 
@@ -321,3 +430,142 @@ class COIntegral(Integrate):
             plt.title(title)
 
         return fig
+
+
+class KSweep:
+    r"""
+    Evaluates the charges of `COIntegral` for a list of calibration factors `Ks` at once.
+
+    The simulated current `sim_current` is the ion current divided by K.
+    Hence the charges of all regions integrating `sim_current` are proportional to 1/K
+    and are obtained from a single integration of the ion current, while the charges of
+    the faradaic current do not depend on K at all.
+    Only the region `Q_tot_j_sim_neg`, which is restricted to negative values of
+    `current_H_sub`, is masked and integrated for each K individually.
+
+    The input dataframe is a dataframe created by `Timeshift`, where the K used to create
+    it is irrelevant.
+    """
+
+    def __init__(self, df, Ks, mass=44, cathodic_limit=0.5, limits=None, ion_current=None):
+        self._df = df
+        self.Ks = np.asarray(Ks, dtype=float)
+        self.mass = mass
+        self.cathodic_limit = cathodic_limit
+        self._limits = limits
+        self.ion_current = ion_current or f"ion_current_M{self.mass}_UVS_ALS_sub_norm_filt"
+
+    @cached_property
+    def integral(self):
+        r"""
+        A `COIntegral` of the input dataframe providing the K independent regions.
+        """
+        return COIntegral(self._df, K=None, mass=self.mass, cathodic_limit=self.cathodic_limit, limits=self._limits)
+
+    @cached_property
+    def total_charges(self):
+        r"""
+        Returns a dict with the total charges of each region in `COIntegral.regions`
+        as arrays with one entry per K.
+        """
+        with stage("K sweep", rows=len(self._df) * len(self.Ks)):
+            return self._total_charges()
+
+    def _total_charges(self):
+        integral = self.integral
+        time = integral.arrays["time"]
+        j = integral.arrays["current_density"]
+        ion = self._df[self.ion_current].to_numpy(dtype=float)
+
+        if not len(time):
+            return {name: np.zeros(len(self.Ks)) for name in integral.regions}
+
+        masks = integral.K_independent_masks
+        absolute = [region["absolute"] for region in integral.regions.values()]
+        charge_j = masked_cumulative_trapezoid(time, np.where(np.array(absolute)[:, None], np.abs(j), j), masks)[:, -1]
+        charge_ion = masked_cumulative_trapezoid(time, ion * 1000000, masks)[:, -1]
+
+        charges = {}
+        for n, (name, region) in enumerate(integral.regions.items()):
+            if region["axis"] == "current_density":
+                charges[name] = np.full(len(self.Ks), abs(charge_j[n]))
+            elif region["axis"] == "ion_current":
+                charges[name] = np.abs(charge_ion[n] / self.Ks)
+            else:
+                charges[name] = np.abs(charge_j[n] - charge_ion[n] / self.Ks)
+
+        # The sign of current_H_sub depends on K, hence this region is masked for each K.
+        n = list(integral.regions).index("Q_tot_j_sim_neg")
+        current_H_sub = j - ion / self.Ks[:, None] * 1000000
+        masks = masks[n] & (current_H_sub < 0)
+        charges["Q_tot_j_sim_neg"] = np.abs(
+            masked_cumulative_trapezoid(time, current_H_sub, masks)[:, -1]
+        )
+
+        return charges
+
+    @cached_property
+    def summaries(self):
+        r"""
+        Returns the `COIntegral.summary` for all Ks, where each value is an array with one entry per K.
+        """
+        summaries = COIntegral.charge_summary(self.total_charges, self.integral.vertex_potential)
+        summaries["vertex potential"] = np.full(len(self.Ks), summaries["vertex potential"])
+        return summaries
+
+    def summary(self, n, round_values=None):
+        r"""
+        Returns the `COIntegral.summary` for the `n`-th K.
+        """
+        summary = {key: item[n] for key, item in self.summaries.items()}
+        if not round_values:
+            return summary
+
+        return {key: round(item, round_values) for key, item in summary.items()}
+
+    def integral_K(self, n):
+        r"""
+        Returns a `COIntegral` of the input dataframe evaluated with the `n`-th K.
+        """
+        df = self._df.copy()
+        df["sim_current"] = df[self.ion_current] / self.Ks[n] * 1000000
+        df["current_H_sub"] = df["current1_muA_geo"] - df["sim_current"]
+        return COIntegral(df, K=self.Ks[n], mass=self.mass, cathodic_limit=self.cathodic_limit, limits=self._limits)
+
+    def charge(self, n):
+        r"""
+        Returns the charges for the `n`-th K, which can be used in place of a `COIntegral`.
+        """
+        return SummaryCharge(self.summary(n), lambda: self.integral_K(n))
+
+
+class SummaryCharge:
+    r"""
+    The summary of a `COIntegral` which has been evaluated elsewhere,
+    for example with `KSweep` or in another process.
+
+    All other attributes are those of the `COIntegral` returned by the callable `integral`,
+    which is only evaluated when such an attribute is requested.
+    The integrated regions can be provided as `charges`, e.g., when they were stored with `results`.
+    """
+
+    def __init__(self, summary, integral, charges=None):
+        self._summary = summary
+        self._integral = integral
+        if charges is not None:
+            self.charges = charges
+
+    def summary(self, round_values=None):
+        if not round_values:
+            return dict(self._summary)
+
+        return {key: round(item, round_values) for key, item in self._summary.items()}
+
+    @cached_property
+    def integral(self):
+        return self._integral()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.integral, name)
@@ -0,0 +1,180 @@
+r"""
+Evaluates the charges of the cycles of a measurement while it is recorded.
+
+A growing CSV file with the merged EC and DEMS data (such as written by `merge.Merge`)
+is read as new lines are appended. The cycles are detected from the turning points of the potential,
+and each cycle is evaluated with `Baseline`, `Timeshift` and `COIntegral` as soon as it is completed.
+Only the data of the current cycle is kept in memory.
+"""
+import numpy as np
+
+from .segment import TurningPoints
+
+
+def tail(path, poll=1.0, timeout=None, blocksize=1 << 20):
+    r"""
+    Yields dataframes with the lines appended to a CSV file, which are read as soon as they are completed.
+
+    The file is polled every `poll` seconds. The iteration stops when no line was appended
+    for `timeout` seconds or, with the default `None`, never.
+    """
+    import io
+    import os
+    import time
+
+    import pandas as pd
+
+    header = None
+    pending = b""
+    waiting = 0.0
+
+    while not os.path.exists(path):
+        if timeout is not None and waiting >= timeout:
+            return
+        time.sleep(poll)
+        waiting += poll
+
+    with open(path, "rb") as file:
+        while True:
+            data = file.read(blocksize)
+            if not data:
+                if timeout is not None and waiting >= timeout:
+                    return
+                time.sleep(poll)
+                waiting += poll
+                continue
+
+            waiting = 0.0
+            pending += data
+            end = pending.rfind(b"\n") + 1
+            if not end:
+                continue
+
+            lines, pending = pending[:end], pending[end:]
+            if header is None:
+                header, lines = lines.split(b"\n", 1)
+                header += b"\n"
+                if not lines:
+                    continue
+
+            yield pd.read_csv(io.BytesIO(header + lines))
+
+
+class LiveCycles:
+    r"""
+    Evaluates the charges of each cycle of a growing CSV file with the merged EC and DEMS data
+    as soon as the cycle is completed.
+
+    A cycle starts at a lower vertex of the potential and ends at the next lower vertex, which is
+    part of both cycles. Data recorded before the first lower vertex is not evaluated, i.e., a file starting
+    during a sweep starts with the first complete cycle.
+    When the file stops growing (see `timeout`), the last cycle is evaluated if the potential
+    returned to the potential at its start.
+    The vertices are detected with `TurningPoints` with a `hysteresis` in V.
+
+    The remaining arguments are those of `Baseline`, `Timeshift` and `COIntegral`,
+    where `sample_diameter` is used to determine the current density as in `WorkingFiles`.
+    Since the baseline corrected ion current of a growing file is not known before the
+    measurement is completed, it must either be provided by the file, or the ion current
+    `ion_current_M{mass}` of each cycle is corrected with the ALS parameters `als` (see `Baseline`).
+
+    EXAMPLES:
+
+    Evaluate the cycles of a file, which is not growing anymore::
+
+        >>> live = LiveCycles("data.csv", K_prefactor=1.0, K_power=1e-6, interval=-0.4, timeout=0)  # doctest: +SKIP
+        >>> for summary in live.summaries():  # doctest: +SKIP
+        ...     print(summary["cycle"], summary["Q_tot_M"])
+
+    """
+
+    def __init__(self, path, K_prefactor, K_power, interval=0, mass=44, hysteresis=0.05, first_cycle=1,
+                 sample_diameter=0.7, cathodic_limit=0.5, limits=None, als=None, poll=1.0, timeout=None):
+        self.path = path
+        self.K_prefactor = K_prefactor
+        self.K_power = K_power
+        self.interval = interval
+        self.mass = mass
+        self.hysteresis = hysteresis
+        self.first_cycle = first_cycle
+        self.diameter = sample_diameter
+        self.cathodic_limit = cathodic_limit
+        self.limits = limits
+        self.als = als
+        self.poll = poll
+        self.timeout = timeout
+
+    def chunks(self):
+        r"""
+        Yields the data appended to the file, including the current density.
+        """
+        for chunk in tail(self.path, poll=self.poll, timeout=self.timeout):
+            if "current1_muA" in chunk:
+                chunk["current1_muA_geo"] = chunk["current1_muA"] / (np.pi * (self.diameter / 2) ** 2)
+            yield chunk
+
+    def cycles(self):
+        r"""
+        Yields the cycle number and the dataframe of each cycle as soon as it is completed.
+        """
+        import pandas as pd
+
+        turning_points = TurningPoints(hysteresis=self.hysteresis)
+
+        cycle = self.first_cycle
+        # the rows since the start of the current cycle and the position of the first of these rows
+        rows = []
+        start = None
+        position = 0
+
+        for chunk in self.chunks():
+            chunk.index = pd.RangeIndex(position, position + len(chunk))
+            position += len(chunk)
+            rows.append(chunk)
+
+            for vertex, kind in turning_points.update(chunk["potential"].to_numpy()):
+                if kind != "lower":
+                    continue
+
+                data = pd.concat(rows)
+                if start is not None:
+                    yield cycle, data.loc[start:vertex].reset_index(drop=True)
+                    cycle += 1
+
+                start = vertex
+                rows = [data.loc[vertex:]]
+
+            if start is None:
+                # Before the first cycle only the data which might belong to the first cycle is required.
+                rows = [pd.concat(rows).loc[turning_points.offset:]]
+
+        # The start of the file is only confirmed as the start of a cycle at the end of the file,
+        # when the file does not contain another lower vertex.
+        for vertex, kind in turning_points.close():
+            if kind == "lower":
+                start = vertex
+
+        if start is not None and turning_points.direction == "down":
+            # When the file is not growing anymore, the last cycle is completed,
+            # if the potential returned to the potential at the start of the cycle.
+            data = pd.concat(rows).loc[start:]
+            if data["potential"].iloc[-1] <= data["potential"].iloc[0] + self.hysteresis:
+                yield cycle, data.reset_index(drop=True)
+
+    def integral(self, df):
+        r"""
+        Returns the `COIntegral` of the data of a cycle.
+        """
+        from .baseline import Baseline
+        from .integrate import COIntegral
+        from .timeshift import Timeshift
+
+        timeshift = Timeshift(Baseline(df, mass=self.mass, als=self.als).df, K_prefactor=self.K_prefactor, K_power=self.K_power, interval=self.interval, mass=self.mass)
+        return COIntegral(timeshift.df, K=timeshift.K, mass=self.mass, cathodic_limit=self.cathodic_limit, limits=self.limits)
+
+    def summaries(self):
+        r"""
+        Yields the summary of the charges of each cycle as soon as the cycle is completed.
+        """
+        for cycle, df in self.cycles():
+            yield {**self.integral(df).summary(), "cycle": cycle}
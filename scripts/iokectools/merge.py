@@ -0,0 +1,252 @@
+r"""
+Merges the data of an EC file and a DEMS file onto a common time axis
+and corrects the baseline of the ion currents, as in `DEMS_EC_evaluation_BL_corr.ipynb`.
+
+The raw files are read in chunks and only the columns required for the merged data are kept.
+All columns sharing a time axis are interpolated at once. Since the baseline of the ion currents
+is determined from the entire measurement, the ion currents are merged at once, whereas the columns
+of the EC file are interpolated for one chunk of the merged data at a time, which is written
+to a CSV file, which can be read by `WorkingFiles`, and, as parsed from the CSV file, to the cache of
+`cache.read_csv`, such that the merged file is not parsed again when it is read.
+"""
+from functools import cached_property
+
+import numpy as np
+
+
+def interpolate(time, values, grid):
+    r"""
+    Returns the series in the rows of `values`, sampled at `time`, at the times `grid`.
+
+    The values are interpolated linearly between the data points and extrapolated linearly
+    from the first and last two data points, i.e., the result is identical to
+    `scipy.interpolate.interp1d(time, values, fill_value="extrapolate")(grid)`.
+
+    EXAMPLES::
+
+        >>> interpolate(np.array([0.0, 1.0, 2.0]), np.array([[0.0, 10.0, 30.0], [1.0, 1.0, 1.0]]), np.array([-1.0, 0.5, 3.0]))
+        array([[-10.,   5.,  50.],
+               [  1.,   1.,   1.]])
+
+    """
+    time = np.asarray(time, dtype=float)
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    grid = np.asarray(grid, dtype=float)
+
+    if np.any(np.diff(time) < 0):
+        order = np.argsort(time, kind="stable")
+        time, values = time[order], values[:, order]
+
+    hi = np.clip(np.searchsorted(time, grid), 1, len(time) - 1)
+    lo = hi - 1
+
+    # The positions are shared by all series and only computed once.
+    slope = (values[:, hi] - values[:, lo]) / (time[hi] - time[lo])
+    return slope * (grid - time[lo]) + values[:, lo]
+
+
+class Merge:
+    r"""
+    Merges the EC file `ec_file` and the DEMS file `dems_file` on a time axis with a spacing of `interval`.
+
+    time_offset: added to the time of the masses in the DEMS file (`time_rel_M{mass}`)
+    to match the time of the EC file.
+    limits: the first and last (excluded) row of the merged data, which is stored.
+    als: the parameters of the ALS baseline correction of the ion currents (see `als.baseline_als`),
+    which is applied after subtracting a linear univariate spline with smoothing `spline_smoothing`
+    (method 3 in the notebook), providing the columns `ion_current_M{mass}_UVS_ALS_sub`.
+    With `None` the baseline is not corrected.
+    """
+
+    def __init__(self, ec_file, dems_file, masses=[44], time_offset=0, interval=0.05, limits=None,
+                 als={"lam": 1e8, "p": 1e-6, "niter": 15}, spline_smoothing=0.1, chunksize=100000, cache=True):
+        self.ec_file = ec_file
+        self.dems_file = dems_file
+        self.masses = masses
+        self.time_offset = time_offset
+        self.interval = interval
+        self.limits = limits
+        self.als = als
+        self.spline_smoothing = spline_smoothing
+        self.chunksize = chunksize
+        self.cache = cache
+
+    @staticmethod
+    def columns(path):
+        r"""
+        Returns the columns of a CSV file.
+        """
+        import pandas as pd
+
+        from .folderindex import open_file
+
+        with open_file(path) as file:
+            return list(pd.read_csv(file, nrows=0).columns)
+
+    @cached_property
+    def ec_columns(self):
+        r"""
+        The columns of the EC file, which are merged, i.e., all potentials and currents.
+        """
+        return [
+            column
+            for column in self.columns(self.ec_file)
+            if "potential" in column or "current" in column
+        ]
+
+    def _read(self, path, columns):
+        r"""
+        Returns a dict with the arrays of `columns` of a CSV file, which is read in chunks.
+        """
+        from .cache import iter_csv
+
+        arrays = {column: [] for column in columns}
+        for chunk in iter_csv(path, self.chunksize, cache=self.cache, usecols=columns):
+            for column in columns:
+                arrays[column].append(chunk[column].to_numpy(dtype=float))
+
+        return {column: np.concatenate(parts) if parts else np.array([]) for column, parts in arrays.items()}
+
+    @cached_property
+    def ec(self):
+        return self._read(self.ec_file, ["time", *self.ec_columns])
+
+    @cached_property
+    def dems(self):
+        r"""
+        The times and ion currents of the masses, where for each mass the rows with a shifted time
+        not larger than zero and rows with missing values are removed.
+        """
+        columns = [column for mass in self.masses for column in (f"time_rel_M{mass}", f"ion_current_M{mass}")]
+        dems = self._read(self.dems_file, columns)
+
+        for mass in self.masses:
+            time = dems[f"time_rel_M{mass}"] + self.time_offset
+            ion_current = dems[f"ion_current_M{mass}"]
+            # The masses are recorded independently, i.e., the time of each mass determines its rows.
+            rows = (time > 0) & ~np.isnan(ion_current)
+            dems[f"time_rel_M{mass}"] = time[rows]
+            dems[f"ion_current_M{mass}"] = ion_current[rows]
+        return dems
+
+    @cached_property
+    def time(self):
+        r"""
+        The common time axis of the merged data, limited to `limits`, which ends
+        with the last time of the mass recorded for the shortest time, such that
+        the ion currents of all masses are interpolated and not extrapolated at the end.
+        """
+        tmax = min(self.dems[f"time_rel_M{mass}"].max() for mass in self.masses)
+        time = np.arange(0, tmax, self.interval)
+        if self.limits is not None:
+            time = time[slice(*self.limits)]
+        return time
+
+    def baseline(self, time, ion_current):
+        r"""
+        Returns a dict with the baseline corrected ion current and the intermediate results
+        with the suffixes of the columns in the notebook.
+        """
+        from scipy.interpolate import UnivariateSpline
+
+        from .als import baseline_als
+
+        uvs = UnivariateSpline(time, ion_current, k=1, s=self.spline_smoothing)(time)
+        uvs_sub = ion_current - uvs
+        uvs_als = baseline_als(uvs_sub, **self.als)
+        return {"_UVS": uvs, "_UVS_sub": uvs_sub, "_UVS_ALS": uvs_als, "_UVS_ALS_sub": uvs_sub - uvs_als}
+
+    @cached_property
+    def ion_currents(self):
+        r"""
+        A dict with the arrays of the ion currents of all masses on the common time axis,
+        and their baseline corrections.
+        """
+        ion_currents = {}
+        for mass in self.masses:
+            ion_currents[f"ion_current_M{mass}"] = interpolate(self.dems[f"time_rel_M{mass}"], self.dems[f"ion_current_M{mass}"], self.time)[0]
+
+        if self.als is not None:
+            for mass in self.masses:
+                for suffix, values in self.baseline(self.time, ion_currents[f"ion_current_M{mass}"]).items():
+                    ion_currents[f"ion_current_M{mass}{suffix}"] = values
+
+        return ion_currents
+
+    @property
+    def merged_columns(self):
+        r"""
+        The columns of the merged data.
+        """
+        ion_currents = [f"ion_current_M{mass}" for mass in self.masses]
+        baselines = [column for column in self.ion_currents if column not in ion_currents]
+        return ["time", *ion_currents, *self.ec_columns, *baselines]
+
+    def _merge(self, start, stop):
+        r"""
+        Returns a dict with the arrays of all columns of the rows `start` to `stop` (excluded) of the merged data.
+        """
+        time = self.time[start:stop]
+        data = {"time": time, **{column: values[start:stop] for column, values in self.ion_currents.items()}}
+        data.update(zip(self.ec_columns, interpolate(self.ec["time"], [self.ec[column] for column in self.ec_columns], time)))
+        return {column: data[column] for column in self.merged_columns}
+
+    @property
+    def data(self):
+        r"""
+        A dict with the arrays of all columns of the merged data.
+        """
+        return self._merge(0, len(self.time))
+
+    def iter_chunks(self):
+        r"""
+        Yields dataframes with `chunksize` rows of the merged data,
+        where the columns of the EC file are interpolated for each chunk.
+        """
+        import pandas as pd
+
+        for start in range(0, len(self.time), self.chunksize):
+            stop = min(start + self.chunksize, len(self.time))
+            yield pd.DataFrame(self._merge(start, stop), index=pd.RangeIndex(start, stop))
+
+    @cached_property
+    def df(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.data)
+
+    def to_csv(self, path):
+        r"""
+        Writes the merged data to a CSV file in chunks.
+
+        Each chunk is also stored in the cache of `cache.read_csv`, such that `WorkingFiles`
+        does not parse the file again. The text of each chunk is parsed for the cache,
+        such that the cached data is identical to the data read from the CSV file.
+        """
+        import io
+        import os
+
+        import pandas as pd
+
+        from . import cache
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        writer = cache.ColumnWriter(self.merged_columns, rows=len(self.time)) if self.cache else None
+        try:
+            with open(path, "w", newline="") as file:
+                file.write(",".join(self.merged_columns) + "\n")
+                for chunk in self.iter_chunks():
+                    text = chunk.to_csv(index=False, header=False)
+                    file.write(text)
+                    if writer is not None:
+                        writer.write(pd.read_csv(io.StringIO(text), header=None, names=self.merged_columns), start=chunk.index[0])
+        except BaseException:
+            if writer is not None:
+                writer.discard()
+            raise
+
+        if writer is not None:
+            writer.commit(cache.cache_path(path))
@@ -0,0 +1,163 @@
+r"""
+Parallel evaluation of the parameter sweeps of `charge_statistics`.
+
+The data of all cycles is written once to memory-mapped NumPy files,
+which are opened by the worker processes, such that no DataFrames are pickled for each task.
+The workers only return the summaries of the evaluated charges.
+"""
+import os
+import tempfile
+from functools import cached_property
+
+import numpy as np
+
+# the dataframes of the memory-mapped files opened in this process
+_frames = {}
+
+
+class SharedCycles:
+    r"""
+    A stand-in for `CycleDescription` in a worker process,
+    providing the cycles of an experiment from memory-mapped files.
+
+    The dataframes are views of the memory-mapped files, which are opened only once in each worker.
+    """
+
+    def __init__(self, cycles, interval):
+        self._cycles = cycles
+        self.interval = interval
+
+    @cached_property
+    def cycle_description(self):
+        import pandas as pd
+
+        cycle_description = {}
+        for key, cycle in self._cycles.items():
+            if cycle["path"] not in _frames:
+                # The files store the columns contiguously, such that each column of the dataframe is a view of the file.
+                data = np.load(cycle["path"], mmap_mode="r")
+                _frames[cycle["path"]] = pd.DataFrame(data.T, columns=cycle["columns"], copy=False)
+            cycle_description[key] = {**cycle["description"], "df": _frames[cycle["path"]]}
+        return cycle_description
+
+    @property
+    def experiment_description(self):
+        return {"interval": self.interval, "cycles": self.cycle_description}
+
+
+def share_cycles(cycle_description, folder):
+    r"""
+    Writes the numeric columns of all cycles of a `CycleDescription` to memory-mapped files in `folder`
+    and returns a dict describing the cycles, which can be sent to worker processes.
+    """
+    cycles = {}
+    for key, description in cycle_description.cycle_description.items():
+        df = description["df"].select_dtypes("number")
+        path = os.path.join(folder, f"{id(cycle_description)}_{key}.npy")
+        np.save(path, df.to_numpy(dtype=float).T)
+        cycles[key] = {
+            "path": path,
+            "columns": list(df.columns),
+            "description": {
+                item: value for item, value in description.items() if item != "df"
+            },
+        }
+    return cycles
+
+
+def evaluate(job):
+    r"""
+    Evaluates the charges of all cycles of a job and returns a list of dicts,
+    with the summary of each cycle, for each combination of K modifier and fixed K in the job.
+    """
+    from .batchintegration import BatchIntegration
+
+    cycles = SharedCycles(job["cycles"], job["interval"])
+    overview = BatchIntegration(
+        cycles,
+        cathodic_limit=job["cathodic_limit"],
+        interval=job["interval"],
+        limits=job["limits"],
+        als=job["als"],
+        cache=job["cache"],
+    )
+
+    if job["analytic_K"]:
+        overviews = overview.sweep_K(job["K_shifts"], job["fixed_Ks"])
+    else:
+        overviews = [
+            BatchIntegration(
+                cycles,
+                cathodic_limit=job["cathodic_limit"],
+                interval=job["interval"],
+                K_modifier=K_modifier,
+                fixed_K=fixed_K,
+                limits=job["limits"],
+                als=job["als"],
+                cache=job["cache"],
+            )
+            for K_modifier in job["K_shifts"]
+            for fixed_K in job["fixed_Ks"]
+        ]
+
+    return [
+        {cycle: charge.summary() for cycle, charge in overview.charges.items()}
+        for overview in overviews
+    ]
+
+
+def sweep(eds, time_shifts, K_shifts, fixed_Ks, cathodic_limit=None, limits=None, analytic_K=False, workers=None, als=None, vertex_bins=None, cache=False):
+    r"""
+    Returns a list of `BatchIntegration`, one for each combination of experiment description,
+    time shift, K shift and fixed K, in the same order as the serial evaluation in `charge_statistics`.
+
+    The charges are evaluated with `workers` processes. The charges of the returned overviews
+    only provide the `summary`; any other attribute is evaluated on request in this process.
+    The remaining arguments are passed to each `BatchIntegration`.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+
+    from .batchintegration import BatchIntegration
+    from .integrate import SummaryCharge
+
+    fixed_Ks = fixed_Ks or [None]
+
+    with tempfile.TemporaryDirectory() as folder:
+        jobs = []
+        for ed in eds:
+            cycles = share_cycles(ed, folder)
+            for time_shift in time_shifts:
+                job = {
+                    "cycles": cycles,
+                    "interval": BatchIntegration(ed, interval=time_shift, als=als).interval,
+                    "cathodic_limit": cathodic_limit,
+                    "limits": limits,
+                    "analytic_K": analytic_K,
+                    "als": als,
+                    "cache": cache,
+                }
+                if analytic_K:
+                    jobs.append({**job, "K_shifts": K_shifts, "fixed_Ks": fixed_Ks})
+                else:
+                    jobs.extend(
+                        {**job, "K_shifts": [K_shift], "fixed_Ks": [fixed_K]}
+                        for K_shift in K_shifts
+                        for fixed_K in fixed_Ks
+                    )
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [summary for summaries in executor.map(evaluate, jobs) for summary in summaries]
+
+    overviews = []
+    for ed in eds:
+        for time_shift in time_shifts:
+            for K_shift, fixed_K in [(K_shift, fixed_K) for K_shift in K_shifts for fixed_K in fixed_Ks]:
+                overview = BatchIntegration(ed, cathodic_limit=cathodic_limit, interval=time_shift, K_modifier=K_shift, fixed_K=fixed_K, limits=limits, als=als, vertex_bins=vertex_bins, cache=cache)
+                overview.__dict__["charges"] = {
+                    cycle: SummaryCharge(summary, partial(overview.integral, cycle))
+                    for cycle, summary in results[len(overviews)].items()
+                }
+                overviews.append(overview)
+
+    return overviews
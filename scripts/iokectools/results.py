@@ -0,0 +1,186 @@
+r"""
+A persistent cache of the charges of the cycles evaluated by `BatchIntegration`.
+
+The summary of the `COIntegral` of a cycle is stored in a JSON file, identified by a hash of
+the content of the cycle file, the parameters of the baseline correction, the calibration factor K,
+the interval, the integration limits, the source code of `iokectools` and the versions of its dependencies.
+Evaluating a cycle again with the same inputs therefore neither loads nor integrates its data.
+Optionally, the integrated regions (`COIntegral.charges`) are stored as well, with the columns
+of each region in the layout of `cache`.
+
+The content hash of a file is stored for the size and the modification time of the file,
+such that unmodified files are not read again.
+The results are located in the folder `results` of the cache of `cache` (`IOKECTOOLS_CACHE`).
+
+EXAMPLES::
+
+    >>> import tempfile
+    >>> from iokectools import cache
+    >>> cache.cache_folder = tempfile.mkdtemp()
+    >>> key = summary_key(data=("file", "0123"), K=1e-6, interval=0.4)
+    >>> load(key) is None
+    True
+    >>> save(key, {"Q_tot_j": 347.5, "vertex potential": 1.0})
+    >>> load(key)
+    {'Q_tot_j': 347.5, 'vertex potential': 1.0}
+
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+
+from . import cache
+
+# Increase when the layout of the stored results changes.
+VERSION = 1
+
+# the packages whose versions determine the charges of a cycle
+dependencies = ["numpy", "pandas", "scipy"]
+
+# the content hashes of files by their state, in addition to those stored on disk
+_file_hashes = {}
+
+
+def results_folder():
+    return os.path.join(cache.cache_folder, "results")
+
+
+def _sha1(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _write(path, text):
+    r"""
+    Writes `text` to `path` atomically, ignoring errors if the cache is not writable.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(descriptor, "w") as file:
+            file.write(text)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    r"""
+    Returns a hash of the source code of all modules of `iokectools` and the versions of the `dependencies`.
+    """
+    from importlib.metadata import version
+
+    digest = hashlib.sha1(str(VERSION).encode())
+    for dependency in dependencies:
+        digest.update(f"{dependency} {version(dependency)}".encode())
+
+    package = os.path.dirname(os.path.abspath(__file__))
+    for module in sorted(os.listdir(package)):
+        if module.endswith(".py"):
+            with open(os.path.join(package, module), "rb") as file:
+                digest.update(module.encode())
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    r"""
+    Returns a hash of the content of a file, which might also be located in a ZIP archive.
+    """
+    from .folderindex import file_stat, open_file
+
+    stat = file_stat(path)
+    if stat in _file_hashes:
+        return _file_hashes[stat]
+
+    marker = os.path.join(results_folder(), "files", _sha1(repr(stat)))
+    try:
+        with open(marker) as file:
+            _file_hashes[stat] = file.read()
+        return _file_hashes[stat]
+    except OSError:
+        pass
+
+    digest = hashlib.sha1()
+    with open_file(path) as file:
+        for chunk in iter(lambda: file.read(2**20), b""):
+            digest.update(chunk)
+
+    _file_hashes[stat] = digest.hexdigest()
+    _write(marker, _file_hashes[stat])
+    return _file_hashes[stat]
+
+
+def fingerprint(cycle):
+    r"""
+    Returns a tuple identifying the data of a cycle of a `CycleDescription`, without loading the data
+    if it is provided by a `CycleData` or `segment.CycleSlice` handle.
+    """
+    data = getattr(cycle, "data", None)
+    if data is not None:
+        return data.fingerprint
+    # Dataframes provided in memory are hashed every time, since they might have been modified in place.
+    return ("frame", cache.frame_hash(cycle["df"]))
+
+
+def summary_key(**inputs):
+    r"""
+    Returns the key of the results of a cycle evaluated from `inputs`, which must be serializable as JSON
+    (other objects are represented by their `repr`), and the current source code.
+    """
+    return _sha1(json.dumps({**inputs, "code": code_version()}, sort_keys=True, default=repr))
+
+
+def load(key):
+    r"""
+    Returns the summary stored for `key` or `None` if no summary is stored.
+    """
+    try:
+        with open(os.path.join(results_folder(), f"{key}.json")) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def save(key, summary, charges=None):
+    r"""
+    Stores the summary of a cycle and, if provided, the integrated regions of `COIntegral.charges`.
+    """
+    if charges is not None:
+        folder = os.path.join(results_folder(), key)
+        regions = {}
+        for n, (name, region) in enumerate(charges.items()):
+            cache.save(region["df"], os.path.join(folder, str(n)))
+            regions[name] = {"folder": str(n), "total charge": float(region["total charge"]), "axis": region["axis"]}
+        _write(os.path.join(folder, "regions.json"), json.dumps(regions, default=repr))
+
+    summary = {item: value.item() if hasattr(value, "item") else value for item, value in summary.items()}
+    _write(os.path.join(results_folder(), f"{key}.json"), json.dumps(summary))
+
+
+def load_charges(key):
+    r"""
+    Returns the integrated regions stored for `key` in the format of `COIntegral.charges`
+    or `None` if the regions were not stored.
+    """
+    folder = os.path.join(results_folder(), key)
+    try:
+        with open(os.path.join(folder, "regions.json")) as file:
+            regions = json.load(file)
+        return {
+            name: {"df": cache.load(os.path.join(folder, region["folder"])), "total charge": region["total charge"], "axis": region["axis"]}
+            for name, region in regions.items()
+        }
+    except (OSError, ValueError):
+        return None
+
+
+def clear():
+    r"""
+    Removes all stored results.
+    """
+    shutil.rmtree(results_folder(), ignore_errors=True)
+    _file_hashes.clear()
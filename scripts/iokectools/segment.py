@@ -0,0 +1,368 @@
+r"""
+Segmentation of an entire measurement file into its cycles.
+
+The cycles are detected from the vertices of the potential, which are the turning points of the potential,
+i.e., the sign changes of dE/dt, where the potential moved away by more than a hysteresis.
+The data of the cycles are slices of the data of the measurement file, which is loaded only once,
+such that the cycles do not need to be stored in individual files.
+"""
+import weakref
+from functools import cached_property
+
+import numpy as np
+
+
+class TurningPoints:
+    r"""
+    Detects the vertices of a potential trace, which is provided in consecutive chunks.
+
+    A vertex is only detected once the potential moved away from it by more than `hysteresis`,
+    such that noise does not create additional vertices. Only the values since the extremum of the
+    current sweep are kept, and each value is only searched once for the next vertex, unless a vertex is detected.
+
+    At the start of the trace, a vertex is only reported at a turning point of the potential.
+    When the trace starts with a rising potential, its start is a lower vertex, if the potential
+    does not drop below it by more than `hysteresis` before the next lower vertex, i.e.,
+    if the trace starts at the lower vertex and not during the sweep. Since this is only known
+    at the next lower vertex, the vertices until then are reported together with it or by `close`.
+
+    EXAMPLES::
+
+        >>> potential = np.concatenate([np.linspace(0, 1, 11), np.linspace(0.9, 0, 10), np.linspace(0.1, 1, 10)])
+        >>> turning_points = TurningPoints(hysteresis=0.15)
+        >>> turning_points.update(potential[:15]) + turning_points.update(potential[15:])
+        [(0, 'lower'), (10, 'upper'), (20, 'lower')]
+
+    Only the values since the maximum of the positive sweep are kept::
+
+        >>> turning_points.offset
+        30
+
+    A trace starting during the positive sweep has no lower vertex at its start::
+
+        >>> turning_points = TurningPoints(hysteresis=0.15)
+        >>> turning_points.update(potential[5:])
+        [(5, 'upper'), (15, 'lower')]
+
+    """
+
+    def __init__(self, hysteresis=0.05):
+        self.hysteresis = hysteresis
+        # the direction of the sweep since the last vertex, which is unknown at the beginning of the trace
+        self.direction = None
+        # the values since the last vertex or the extremum of the current sweep and the position of the first of these values
+        self._values = np.array([])
+        self._offset = 0
+        # the number of values searched and the extrema of these values with their positions in the values
+        self._searched = 0
+        self._max = (-np.inf, 0)
+        self._min = (np.inf, 0)
+        # the position and the potential of a start of the trace, which might be a lower vertex,
+        # and the vertices detected since then
+        self._start = None
+        self._pending = []
+
+    def update(self, potential):
+        r"""
+        Returns a list of the vertices `(position, 'upper' or 'lower')` detected with the values
+        in `potential`, where the position refers to all values provided so far.
+        """
+        self._values = np.concatenate([self._values, np.asarray(potential, dtype=float)])
+
+        vertices = []
+        while True:
+            vertex = self._next()
+            if vertex is None:
+                return vertices
+
+            position, kind = vertex
+            value = self._values[position]
+            initial = self.direction is None
+            self.direction = "down" if kind == "upper" else "up"
+
+            if initial:
+                # The values since the start of the trace are all kept.
+                if kind == "upper" and not self._values[:position].min(initial=np.inf) < value - self.hysteresis:
+                    # The trace started during a negative sweep.
+                    kind = None
+                if kind == "lower" and not self._values[:position].max(initial=-np.inf) > value + self.hysteresis:
+                    self._start = (position, value)
+                    kind = None
+
+            self._values = self._values[position:]
+            self._offset += position
+            self._searched = 0
+            self._max = (-np.inf, 0)
+            self._min = (np.inf, 0)
+
+            if kind is None:
+                continue
+            if self._start is None:
+                vertices.append((self._offset, kind))
+                continue
+
+            self._pending.append((self._offset, kind))
+            if kind == "lower":
+                vertices.extend(self._resolve(value))
+
+    def close(self):
+        r"""
+        Returns the vertices which have not been reported at the end of the trace.
+        """
+        if self._start is None or self.direction != "down":
+            return []
+        return self._resolve(self._values.min())
+
+    def _resolve(self, lower):
+        r"""
+        Returns the pending vertices, including the start of the trace,
+        if the potential did not drop below it to `lower` by more than `hysteresis`.
+        """
+        position, value = self._start
+        vertices = ([(position, "lower")] if value <= lower + self.hysteresis else []) + self._pending
+        self._start = None
+        self._pending = []
+        return vertices
+
+    @property
+    def offset(self):
+        r"""
+        The position of the first value, which might be the start of a cycle, i.e., of the last vertex
+        or the extremum of the current sweep, or of the start of the trace, which has not been confirmed
+        as a vertex yet. Earlier values are not needed to detect the following vertices.
+        """
+        return self._offset if self._start is None else self._start[0]
+
+    def _next(self):
+        r"""
+        Returns the position in the kept values and the kind of the next vertex, if it can be detected.
+
+        The values not searched yet are searched in windows of increasing size, such that the cost does not depend
+        on the number of values after the vertex.
+        """
+        length = 1024
+        while self._searched < len(self._values):
+            stop = min(self._searched + length, len(self._values))
+            vertex = self._search(self._values[self._searched:stop], self._searched)
+            if vertex is not None:
+                return vertex
+            self._searched = stop
+            length *= 2
+
+        # Only the values since the extremum of the current sweep can follow the next vertex.
+        if self.direction is not None:
+            position = self._max[1] if self.direction == "up" else self._min[1]
+            self._values = self._values[position:]
+            self._offset += position
+            self._searched -= position
+            self._max = (self._max[0], self._max[1] - position)
+            self._min = (self._min[0], self._min[1] - position)
+        return None
+
+    def _search(self, values, start):
+        r"""
+        Returns the position and the kind of the next vertex, if it can be detected with the `values`
+        following the values searched before, which start at position `start`.
+        Otherwise the extrema of the searched values are updated.
+        """
+        falling = rising = None
+        if self.direction != "down":
+            maximum = np.maximum(np.maximum.accumulate(values), self._max[0])
+            falling = _first(values < maximum - self.hysteresis)
+        if self.direction != "up":
+            minimum = np.minimum(np.minimum.accumulate(values), self._min[0])
+            rising = _first(values > minimum + self.hysteresis)
+
+        if falling is not None and (rising is None or falling < rising):
+            if maximum[falling] == self._max[0]:
+                return self._max[1], "upper"
+            return start + int(np.argmax(values[: falling + 1])), "upper"
+        if rising is not None:
+            if minimum[rising] == self._min[0]:
+                return self._min[1], "lower"
+            return start + int(np.argmin(values[: rising + 1])), "lower"
+
+        if self.direction != "down" and maximum[-1] > self._max[0]:
+            self._max = (maximum[-1], start + int(np.argmax(values)))
+        if self.direction != "up" and minimum[-1] < self._min[0]:
+            self._min = (minimum[-1], start + int(np.argmin(values)))
+        return None
+
+
+def _first(condition):
+    r"""
+    Returns the position of the first true value in `condition` or `None`.
+    """
+    position = int(np.argmax(condition))
+    return position if condition[position] else None
+
+
+def vertices(potential, hysteresis=0.05):
+    r"""
+    Returns a list of the vertices `(position, 'upper' or 'lower')` of a potential trace,
+    as detected by `TurningPoints`.
+
+    Only the local extrema of the potential, where dE/dt changes its sign, can be vertices.
+    Therefore, only these are processed by `TurningPoints`, which is much faster for smooth potential traces.
+
+    EXAMPLES::
+
+        >>> vertices(np.array([0.0, 0.5, 1.0, 1.0, 0.5, 0.0, 0.5, 0.4, 1.0]), hysteresis=0.2)
+        [(0, 'lower'), (2, 'upper'), (5, 'lower')]
+
+    """
+    potential = np.asarray(potential, dtype=float)
+    if len(potential) < 3:
+        turning_points = TurningPoints(hysteresis)
+        return turning_points.update(potential) + turning_points.close()
+
+    index = np.arange(len(potential))
+
+    # the first position of each run of equal values, such that a plateau is represented by its first value
+    changed = np.concatenate([[True], potential[1:] != potential[:-1]])
+    run_start = np.maximum.accumulate(np.where(changed, index, 0))
+
+    # the sign of dE/dt, where a vanishing slope takes the sign of the preceding slope
+    slope = np.sign(np.diff(potential))
+    slope = slope[np.maximum.accumulate(np.where(slope != 0, index[:-1], 0))]
+    extrema = run_start[1:-1][slope[1:] != slope[:-1]]
+
+    candidates = np.unique(np.concatenate([[0], extrema, [len(potential) - 1]]))
+    turning_points = TurningPoints(hysteresis)
+    return [
+        (int(candidates[position]), kind)
+        for position, kind in turning_points.update(potential[candidates]) + turning_points.close()
+    ]
+
+
+def cycle_ranges(potential, hysteresis=0.05, first_cycle=1):
+    r"""
+    Returns a dict with the first and the last (excluded) position of each cycle of a potential trace.
+
+    A cycle starts at a lower vertex of the potential and ends at the next lower vertex, which is part
+    of both cycles. Data recorded before the first lower vertex is not part of a cycle. The last cycle is
+    only included if the potential returned to the potential at its start, as in `live.LiveCycles`.
+
+    EXAMPLES::
+
+        >>> potential = np.concatenate([np.linspace(0, 1, 11), np.linspace(0.9, 0, 10), np.linspace(0.1, 1, 10), np.linspace(0.9, 0, 10)])
+        >>> cycle_ranges(potential, hysteresis=0.15)
+        {1: (0, 21), 2: (20, 41)}
+
+    """
+    potential = np.asarray(potential, dtype=float)
+    detected = vertices(potential, hysteresis=hysteresis)
+    lower = [position for position, kind in detected if kind == "lower"]
+
+    ranges = {}
+    for n, (start, stop) in enumerate(zip(lower, lower[1:])):
+        ranges[first_cycle + n] = (start, stop + 1)
+
+    if lower and detected[-1][1] == "upper" and potential[-1] <= potential[lower[-1]] + hysteresis:
+        ranges[first_cycle + len(lower) - 1] = (lower[-1], len(potential))
+
+    return ranges
+
+
+class Segments:
+    r"""
+    The cycles of an entire measurement file `filename` in `folder`.
+
+    The file is loaded once with `CycleData` and the data of each cycle is a slice of it,
+    which shares the memory with the data of the file.
+
+    Use `Segments.get` to obtain the segments of a file shared with other users of the same file.
+    """
+
+    _segments = weakref.WeakValueDictionary()
+
+    def __init__(self, folder, filename, hysteresis=0.05, first_cycle=1, usecols=None, dtype=None):
+        self.folder = folder
+        self.filename = filename
+        self.hysteresis = hysteresis
+        self.first_cycle = first_cycle
+        self.usecols = usecols
+        self.dtype = dtype
+        self._dfs = {}
+
+    @classmethod
+    def get(cls, folder, filename, hysteresis=0.05, first_cycle=1, usecols=None, dtype=None):
+        key = (folder, filename, hysteresis, first_cycle, None if usecols is None else tuple(usecols), dtype)
+        segments = cls._segments.get(key)
+        if segments is None:
+            segments = cls(folder, filename, hysteresis=hysteresis, first_cycle=first_cycle, usecols=usecols, dtype=dtype)
+            cls._segments[key] = segments
+        return segments
+
+    @cached_property
+    def data(self):
+        from .cycle_description import CycleData
+
+        return CycleData.get(self.folder, self.filename, usecols=self.usecols, dtype=self.dtype)
+
+    @property
+    def df(self):
+        r"""
+        The data of the entire measurement file.
+        """
+        return self.data.df
+
+    @cached_property
+    def ranges(self):
+        r"""
+        A dict with the first and last (excluded) row of each cycle.
+        """
+        return cycle_ranges(self.df["potential"].to_numpy(), hysteresis=self.hysteresis, first_cycle=self.first_cycle)
+
+    def cycles(self):
+        r"""
+        Returns a list of the available cycles.
+        """
+        return list(self.ranges)
+
+    def cycle(self, cycle):
+        r"""
+        Returns the data of a cycle, which shares the memory with the data of the file.
+        The same dataframe is returned for every call and must not be modified.
+        """
+        import pandas as pd
+
+        if cycle not in self._dfs:
+            start, stop = self.ranges[cycle]
+            df = self.df.iloc[start:stop].copy(deep=False)
+            df.index = pd.RangeIndex(len(df))
+            self._dfs[cycle] = df
+        return self._dfs[cycle]
+
+    def handle(self, cycle):
+        r"""
+        Returns a handle to the data of a cycle, which can be used in place of a `CycleData`.
+        """
+        return CycleSlice(self, cycle)
+
+
+class CycleSlice:
+    r"""
+    A handle to the data of a cycle of `Segments`, which is only segmented when `df` is accessed.
+    """
+
+    def __init__(self, segments, cycle):
+        self.segments = segments
+        self.cycle = cycle
+
+    @property
+    def df(self):
+        return self.segments.cycle(self.cycle)
+
+    @property
+    def fingerprint(self):
+        r"""
+        A tuple identifying the data of the cycle, which is determined without loading the measurement file.
+        """
+        return (*self.segments.data.fingerprint, self.segments.hysteresis, self.segments.first_cycle, self.cycle)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
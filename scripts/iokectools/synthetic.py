@@ -0,0 +1,296 @@
+r"""
+Synthetic CV and DEMS data of CO oxidation with known charges.
+
+The current density consists of the oxidation of a CO adlayer, a Gaussian peak in the positive scan,
+and the charging of the double layer. The ion current of mass 44 is the CO oxidation current,
+delayed by the transfer to the mass spectrometer, broadened by an exponential response (smearing)
+and converted with the calibration factor K. Since the shape of the signals is known, the charges
+of each cycle are known analytically and can be compared to the charges obtained with the pipeline,
+e.g., with `BatchIntegration` without integration limits.
+
+The data can be evaluated in memory, written to CSV files per cycle or as a single measurement file
+(see `segment`), and stored in the columnar cache of `cache.read_csv`.
+"""
+from functools import cached_property
+
+import numpy as np
+
+
+class SyntheticExperiment:
+    r"""
+    A measurement of `cycles` CVs from `lower` to the vertex potentials `vertices` (in V)
+    with a scan rate `rate` (in V/s) sampled with `sampling_rate` (in Hz).
+    By default the vertex potentials increase from 0.9 V in steps of 0.05 V up to 1.85 V and start again.
+
+    co_charge: the charge of the oxidation of the CO adlayer (in µC cm-2) of a complete peak
+    at `co_potential` with a width `co_width` (in V).
+    capacitance: the double layer capacitance (in µF cm-2).
+    K_prefactor, K_power: the calibration factor K of the ion current, as in the experiment descriptions.
+    delay: the delay of the ion current (in s), i.e., the `interval` of `Timeshift` aligning the signals.
+    smearing: the time constant (in s) of the exponential response of the mass spectrometer, which broadens
+    the ion current without changing its charge.
+    The noise is normal distributed with the standard deviations `current_noise` (in µA cm-2),
+    `ion_current_noise` (in A) and `potential_noise` (in V).
+
+    EXAMPLES::
+
+        >>> experiment = SyntheticExperiment(cycles=2, vertices=[1.0, 1.2], sampling_rate=10)
+        >>> experiment.ranges
+        {1: (0, 381), 2: (380, 841)}
+        >>> experiment.charges[1]["Q_CO"], experiment.charges[1]["Q_tot_j"]
+        (300.0, 347.5)
+        >>> round(experiment.charges[1]["Q_tot_M"], 6)
+        300.0
+        >>> list(experiment.cycle(2).columns)
+        ['time', 'potential', 'current1', 'current1_muA', 'current1_muA_geo', 'ion_current_M44', 'ion_current_M44_UVS_ALS_sub']
+
+    """
+
+    def __init__(self, cycles=8, vertices=None, lower=0.05, rate=0.05, sampling_rate=20, co_charge=300, co_potential=0.75, co_width=0.04,
+                 capacitance=50, K_prefactor=1.0, K_power=1e-6, delay=0.4, smearing=0, current_noise=1.0, ion_current_noise=2e-13,
+                 potential_noise=0, ion_current_offset=3e-10, sample_diameter=0.7, mass=44, first_cycle=1, seed=0):
+        if vertices is None:
+            vertices = [0.9 + 0.05 * (n % 20) for n in range(cycles)]
+        if len(vertices) != cycles:
+            raise ValueError(f"Provide {cycles} vertex potentials instead of {len(vertices)}.")
+
+        self.vertices = np.asarray(vertices, dtype=float)
+        self.lower = lower
+        self.rate = rate
+        self.step = 1 / sampling_rate
+        self.co_charge = co_charge
+        self.co_potential = co_potential
+        self.co_width = co_width
+        self.capacitance = capacitance
+        self.K_prefactor = K_prefactor
+        self.K_power = K_power
+        self.delay = delay
+        self.smearing = smearing
+        self.current_noise = current_noise
+        self.ion_current_noise = ion_current_noise
+        self.potential_noise = potential_noise
+        self.ion_current_offset = ion_current_offset
+        self.diameter = sample_diameter
+        self.mass = mass
+        self.first_cycle = first_cycle
+        self.seed = seed
+
+    @property
+    def K(self):
+        return self.K_prefactor * self.K_power
+
+    @property
+    def area(self):
+        r"""
+        The geometric area of the sample in cm2, as used by `WorkingFiles`.
+        """
+        return np.pi * (self.diameter / 2) ** 2
+
+    @cached_property
+    def _points(self):
+        r"""
+        The number of potential steps of the positive scan of each cycle.
+        """
+        return np.round((self.vertices - self.lower) / (self.rate * self.step)).astype(int)
+
+    @cached_property
+    def ranges(self):
+        r"""
+        A dict with the first and last (excluded) row of each cycle in the measurement,
+        where the lower vertex is part of both adjacent cycles (see `segment.cycle_ranges`).
+        """
+        starts = np.concatenate([[0], np.cumsum(2 * self._points)])
+        return {
+            self.first_cycle + n: (int(starts[n]), int(starts[n + 1]) + 1)
+            for n in range(len(self.vertices))
+        }
+
+    @cached_property
+    def _scan(self):
+        r"""
+        The potential without noise and a boolean array indicating the positive scans.
+        """
+        points = self._points
+        starts = np.concatenate([[0], np.cumsum(2 * points)])
+
+        cycle = np.repeat(np.arange(len(points)), 2 * points)
+        position = np.arange(starts[-1]) - starts[cycle]
+        # the lower vertex at the end of the last cycle
+        cycle = np.append(cycle, len(points) - 1)
+        position = np.append(position, 2 * points[-1])
+
+        steps = np.minimum(position, 2 * points[cycle] - position)
+        return self.lower + steps * self.rate * self.step, position < points[cycle]
+
+    @cached_property
+    def _signals(self):
+        r"""
+        The noise-free current density of CO oxidation and the response of the mass spectrometer to it
+        without the delay (both in µA cm-2).
+        """
+        from scipy.signal import lfilter
+
+        potential, positive = self._scan
+
+        amplitude = self.co_charge * self.rate / (self.co_width * np.sqrt(np.pi))
+        co_current = amplitude * np.exp(-(((potential - self.co_potential) / self.co_width) ** 2)) * positive
+
+        response = co_current
+        if self.smearing:
+            decay = np.exp(-self.step / self.smearing)
+            response = lfilter([1 - decay], [1, -decay], co_current)
+        return co_current, response
+
+    @cached_property
+    def data(self):
+        r"""
+        A dict with the arrays of all columns of the measurement.
+        """
+        rng = np.random.default_rng(self.seed)
+        potential, positive = self._scan
+        time = self.step * np.arange(len(potential))
+        co_current, response = self._signals
+
+        double_layer = self.capacitance * self.rate * np.where(positive, 1, -1)
+        current = co_current + double_layer + rng.normal(0, self.current_noise, len(time))
+
+        ion_current = np.interp(time - self.delay, time, response, left=0)
+        ion_current = ion_current * self.K / 1000000 + rng.normal(0, self.ion_current_noise, len(time))
+
+        return {
+            "time": time,
+            "potential": potential + rng.normal(0, self.potential_noise, len(time)) if self.potential_noise else potential,
+            "current1": current * self.area * 1e-6,
+            "current1_muA": current * self.area,
+            "current1_muA_geo": current,
+            f"ion_current_M{self.mass}": ion_current + self.ion_current_offset,
+            f"ion_current_M{self.mass}_UVS_ALS_sub": ion_current,
+        }
+
+    @property
+    def potential(self):
+        return self.data["potential"]
+
+    @cached_property
+    def df(self):
+        r"""
+        The data of the entire measurement.
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.data)
+
+    def cycles(self):
+        r"""
+        Returns a list of the cycles of the measurement.
+        """
+        return list(self.ranges)
+
+    def cycle(self, cycle):
+        r"""
+        Returns the data of a cycle, which shares the memory with the data of the measurement.
+        """
+        import pandas as pd
+
+        start, stop = self.ranges[cycle]
+        df = self.df.iloc[start:stop].copy(deep=False)
+        df.index = pd.RangeIndex(len(df))
+        return df
+
+    @cached_property
+    def charges(self):
+        r"""
+        A dict with the charges (in µC cm-2) of each cycle, named as in `COIntegral.summary`
+        for an evaluation without integration limits with the `delay` as interval and the correct K.
+
+        `Q_CO` is the charge of CO oxidation and `Q_double_layer` the charge of the double layer in each scan.
+        The charges of the current density are known analytically. Those of the ion current are integrated from the
+        noise-free response of the mass spectrometer, since the smearing moves charge from the positive to the negative scan
+        and, at the end of a cycle, to the next cycle. The noise is neglected.
+        """
+        from scipy.integrate import trapezoid
+        from scipy.special import erf
+
+        _, positive = self._scan
+        _, response = self._signals
+
+        charges = {}
+        for (cycle, (start, stop)), vertex in zip(self.ranges.items(), self.vertices):
+            co = self.co_charge * 0.5 * (erf((vertex - self.co_potential) / self.co_width) - erf((self.lower - self.co_potential) / self.co_width))
+            double_layer = self.capacitance * (vertex - self.lower)
+
+            vertex_point = start + int(np.argmin(positive[start:stop]))
+            M_pos = trapezoid(response[start:vertex_point + 1], dx=self.step)
+            M_neg = trapezoid(response[vertex_point:stop], dx=self.step)
+
+            charges[cycle] = {
+                "Q_tot_j": co + double_layer,
+                "Q_tot_M": M_pos + M_neg,
+                "Q_tot_j_pos": co + double_layer,
+                "Q_tot_M_pos": M_pos,
+                "Q_tot_j_neg": 0.0,
+                "Q_tot_M_neg": M_neg,
+                "Q cathodic": double_layer,
+                "Q_CO": co,
+                "Q_double_layer": double_layer,
+                "vertex potential": float(vertex),
+                "interval": self.delay,
+                "K": self.K,
+            }
+        return charges
+
+    def experiment_description(self, data_folder=None, experiment_name=None, measurement_file=None):
+        r"""
+        Returns an experiment description of the cycles for `CycleDescription`.
+
+        Without a `data_folder`, the data of the cycles is provided in memory.
+        Otherwise the cycles are read from the files written by `to_csv`.
+        """
+        cycles = {cycle: {"K_prefactor": self.K_prefactor, "K_power": self.K_power} for cycle in self.ranges}
+        if data_folder is None:
+            for cycle, description in cycles.items():
+                description["df"] = self.cycle(cycle)
+
+        experiment_description = {
+            "data folder": data_folder,
+            "interval": self.delay,
+            "experiment name": experiment_name,
+            "cycles": cycles,
+        }
+        if measurement_file is not None:
+            experiment_description["measurement file"] = measurement_file
+        return experiment_description
+
+    def to_csv(self, data_folder, experiment_name="synthetic_c_", measurement_file=None, cache=True):
+        r"""
+        Writes the cycles to the files `{experiment_name}{cycle}.csv` in `data_folder`,
+        or the entire measurement to `measurement_file`, if provided, and returns the experiment description.
+
+        The columns are those of the merged data files, i.e., the current density is determined when the files are read.
+        With `cache` the data is also stored in the cache of `cache.read_csv` as it is read from the CSV files.
+        """
+        import io
+        import os
+
+        import pandas as pd
+
+        from . import cache as columnar
+
+        os.makedirs(data_folder, exist_ok=True)
+
+        if measurement_file is None:
+            files = {f"{experiment_name}{cycle}.csv": self.cycle(cycle) for cycle in self.ranges}
+        else:
+            files = {measurement_file: self.df}
+
+        for filename, df in files.items():
+            path = os.path.join(data_folder, filename)
+            text = df.drop(columns=["current1_muA_geo"]).to_csv(index=False)
+            with open(path, "w", newline="") as file:
+                file.write(text)
+            if cache:
+                columnar.save(pd.read_csv(io.StringIO(text)), columnar.cache_path(path))
+
+        if measurement_file is None:
+            return self.experiment_description(data_folder, experiment_name=experiment_name)
+        return self.experiment_description(data_folder, measurement_file=measurement_file)
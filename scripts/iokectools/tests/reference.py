@@ -0,0 +1,374 @@
+r"""
+The evaluation of the charges of a cycle as originally implemented, i.e., the baseline correction,
+the alignment of the ion current with a join on the shifted time axis and the integration of each
+region with a separate cumulative trapezoid, and the K lines of `ExpDescriptions` with a regression
+of each pair of K values, which the tests compare to the current implementation.
+
+Plots and widgets have been removed.
+"""
+from functools import cached_property
+
+
+class Baseline:
+    def __init__(self, df, mass=44, start=0, stop=50):
+        self._df = df
+        self.mass = mass
+        self.start = start
+        self.stop = stop
+
+    def remove_baseline(self):
+        self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_norm"] = (
+            self._df[f"ion_current_M{self.mass}_UVS_ALS_sub"]
+            - self._df[f"ion_current_M{self.mass}_UVS_ALS_sub"]
+            .iloc[self.start : self.stop]
+            .mean()
+        )
+        self._df[f"ion_current_M{self.mass}_norm"] = (
+            self._df[f"ion_current_M{self.mass}"]
+            - self._df[f"ion_current_M{self.mass}"].iloc[self.start : self.stop].mean()
+        )
+
+    def med_filter(self, filter_value=9):
+        from scipy.signal import medfilt
+
+        self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_norm_filt"] = medfilt(
+            self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_norm"], filter_value
+        )
+        self._df[f"ion_current_M{self.mass}_UVS_ALS_sub_filt"] = medfilt(
+            self._df[f"ion_current_M{self.mass}_UVS_ALS_sub"], filter_value
+        )
+
+    @property
+    def df(self):
+        self.remove_baseline()
+        self.med_filter()
+
+        return self._df
+
+
+class Timeshift:
+    def __init__(self, df, K_prefactor, K_power, interval=0, mass=44, ion_current=None):
+        self._df = df
+        self.interval = interval
+        self.K_prefactor = K_prefactor
+        self.K_power = K_power
+        self.K = self.K_prefactor * self.K_power
+        self.mass = mass
+        self.ion_current = ion_current or f"ion_current_M{self.mass}_UVS_ALS_sub_norm_filt"
+
+    @property
+    def dfj(self):
+        dfj = (
+            self._df[["time", "potential", "current1_muA_geo"]].copy().set_index("time")
+        )
+        return dfj
+
+    @property
+    def dfm(self):
+        dfm = self._df[["time", self.ion_current]].copy()
+        dfm["time2"] = dfm["time"] - self.interval
+        dfm2 = dfm[["time2", self.ion_current]].copy().set_index("time2")
+        return dfm2
+
+    @property
+    def df(self):
+        dfnew = self.dfj.join(self.dfm).dropna(axis=0, how="any")
+        dfnew["time"] = dfnew.index
+        dfnew["sim_current"] = (
+            dfnew[f"ion_current_M{self.mass}_UVS_ALS_sub_norm_filt"] / self.K * 1000000
+        )
+        dfnew["current_H_sub"] = dfnew["current1_muA_geo"] - dfnew["sim_current"]
+        dfnew = dfnew.reset_index(drop=True)
+        return dfnew
+
+
+class Integrate:
+    def __init__(self, df):
+        self._df = df
+
+    @cached_property
+    def df(self):
+        return self._df.copy()
+
+    @classmethod
+    def integrate(cls, df, xcol, ycol, absolute=False):
+        from scipy import integrate
+
+        if absolute:
+            return abs(integrate.cumulative_trapezoid(x=df[xcol], y=abs(df[ycol]), initial=0))
+        return abs(integrate.cumulative_trapezoid(x=df[xcol], y=df[ycol], initial=0))
+
+
+class COIntegral(Integrate):
+    def __init__(self, df, K, mass=44, cathodic_limit=0.5, j_sim_pos_max=1.1, limits=None):
+        Integrate.__init__(self, df)
+        self.K = K
+        self.mass = mass
+        self._limits = limits
+        self.cathodic_limit = cathodic_limit
+        self.ion_current = 'sim_current'
+        self.current_density = 'current1_muA_geo'
+        self.redox_CV_current = 'current_H_sub'
+        self.j_sim_pos_max = j_sim_pos_max
+
+    @cached_property
+    def limits(self):
+        def default_none():
+            return {'upper': self.df['potential'].max() + 1, 'lower': self.df['potential'].min() - 1, 'current': None}
+
+        _limits = {"Q_tot_j": default_none(),
+                   "Q_tot_j_pos": default_none(),
+                   "Q_tot_j_neg": default_none(),
+                   "Q_tot_M": default_none(),
+                   "Q_tot_M_pos": default_none(),
+                   "Q_tot_M_neg": default_none(),
+                   "Q cathodic": default_none(),
+                   "Q_tot_j_sim_pos": default_none(),
+                   "Q_tot_j_sim_neg": default_none(),
+                   }
+
+        import copy
+
+        provided_limits = copy.deepcopy(self._limits)
+
+        if provided_limits is None:
+            return _limits
+
+        for charge_name, _ in provided_limits.items():
+            provided_limits[charge_name].setdefault('upper', None)
+            provided_limits[charge_name].setdefault('lower', None)
+            provided_limits[charge_name].setdefault('current', None)
+
+        for charge_name, _ in provided_limits.items():
+            if charge_name not in _limits.keys():
+                raise Warning(f"Key `{charge_name} not part of the integration program.")
+            for _key, _ in provided_limits[charge_name].items():
+                if provided_limits[charge_name][_key] is not None:
+                    _limits[charge_name].update({_key: provided_limits[charge_name][_key]})
+
+        return _limits
+
+    @staticmethod
+    def charge_description(func):
+        def inner(self):
+            df, axis = func(self)
+            return {"df": df, "total charge": df["Q_total"].iloc[-1], 'axis': axis}
+
+        return inner
+
+    @cached_property
+    def vertex_point(self):
+        return self.df[self.df["potential"] == self.df["potential"].max()].index.values[0]
+
+    @cached_property
+    def vertex_potential(self):
+        return self.df["potential"].max()
+
+    @cached_property
+    def df_pos(self):
+        return self.df[: self.vertex_point + 1]
+
+    @cached_property
+    def df_neg(self):
+        return self.df[self.vertex_point :].reset_index(drop=True)
+
+    @cached_property
+    @charge_description
+    def charge_total_j(self):
+        axis = self.current_density
+        ipos2 = self.df["current1_muA_geo"] > 0
+        U_limit_lower = self.df["potential"] > self.limits['Q_tot_j']['lower']
+        df_j = self.df[ipos2 & U_limit_lower].copy()
+        df_j["Q_total"] = self.integrate(df_j, "time", axis)
+        return df_j, axis
+
+    @cached_property
+    @charge_description
+    def charge_total_j_pos(self):
+        axis = self.current_density
+        ipos2 = self.df_pos["current1_muA_geo"] > 0
+        U_limit_lower = self.df_pos["potential"] > self.limits['Q_tot_j_pos']['lower']
+        df_j = self.df_pos[ipos2 & U_limit_lower].copy()
+        df_j["Q_total"] = self.integrate(df_j, "time", axis)
+        return df_j, axis
+
+    @cached_property
+    @charge_description
+    def charge_total_j_neg(self):
+        axis = self.current_density
+        ipos2 = self.df_neg["current1_muA_geo"] > 0
+        df_j = self.df_neg[ipos2].copy()
+        df_j["Q_total"] = self.integrate(df_j, "time", axis)
+        return df_j, axis
+
+    @cached_property
+    @charge_description
+    def charge_total_j_cathodic(self):
+        axis = self.current_density
+        ipos2 = self.df_neg["current1_muA_geo"] < 0
+        U_limit_upper = self.df_neg["potential"] > self.limits['Q cathodic']['lower']
+        df_j = self.df_neg[ipos2 & U_limit_upper].copy()
+        if len(df_j) == 0:
+            df_j = self.df_neg[0:2].copy()
+            df_j["Q_total"] = 0
+            return df_j, axis
+
+        df_j["Q_total"] = self.integrate(df_j, "time", axis, absolute=True)
+        return df_j, axis
+
+    @cached_property
+    @charge_description
+    def charge_total_M(self):
+        axis = self.ion_current
+        U_limit_lower = self.df["potential"] > self.limits['Q_tot_M']['lower']
+        df_M = self.df[U_limit_lower].copy()
+        df_M["Q_total"] = self.integrate(df_M, "time", axis)
+        return df_M, axis
+
+    @cached_property
+    @charge_description
+    def charge_total_M_pos(self):
+        axis = self.ion_current
+        U_limit_lower = self.df_pos["potential"] > self.limits['Q_tot_M_pos']['lower']
+        df_M = self.df_pos[U_limit_lower].copy()
+        df_M["Q_total"] = self.integrate(df_M, "time", axis)
+        return df_M, axis
+
+    @cached_property
+    @charge_description
+    def charge_total_M_neg(self):
+        axis = self.ion_current
+        U_limit_lower = self.df_neg["potential"] > self.limits['Q_tot_M_neg']['lower']
+        df_M = self.df_neg[U_limit_lower].copy()
+        df_M["Q_total"] = self.integrate(df_M, "time", axis)
+        return df_M, axis
+
+    @cached_property
+    @charge_description
+    def charge_total_j_sim_pos(self):
+        axis = self.redox_CV_current
+        U_limit_lower = self.df_pos["potential"] > self.limits['Q_tot_j_sim_pos']['lower']
+        U_limit_upper = self.df_pos["potential"] < self.limits['Q_tot_j_sim_pos']['upper']
+        df_j = self.df_pos[U_limit_lower & U_limit_upper].copy()
+        df_j["Q_total"] = self.integrate(df_j, "time", axis)
+        return df_j, axis
+
+    @cached_property
+    @charge_description
+    def charge_total_j_sim_neg(self):
+        axis = self.redox_CV_current
+        U_limit_lower = self.df_neg["potential"] > self.limits['Q_tot_j_sim_neg']['lower']
+        U_limit_upper = self.df_neg["potential"] < self.limits['Q_tot_j_sim_neg']['upper']
+        ipos2 = self.df_neg["current_H_sub"] < 0
+        df_j = self.df_neg[U_limit_lower & U_limit_upper & ipos2].copy()
+        df_j["Q_total"] = self.integrate(df_j, "time", axis)
+        return df_j, axis
+
+    def summary(self):
+        diff_pos = (
+            self.charge_total_j_pos["total charge"] - self.charge_total_M_pos["total charge"]
+        )
+        diff_neg = (
+            self.charge_total_j_neg["total charge"] - self.charge_total_M_neg["total charge"]
+        )
+
+        return {
+            "Q_tot_j": self.charge_total_j["total charge"],
+            "Q_tot_M": self.charge_total_M["total charge"],
+            "Q_tot_j - Q_tot_M": self.charge_total_j["total charge"]
+            - self.charge_total_M["total charge"],
+            "Q_tot_j_pos": self.charge_total_j_pos["total charge"],
+            "Q_tot_M_pos": self.charge_total_M_pos["total charge"],
+            "Q_diff_pos = Q_tot_j_pos - Q_tot_M_pos": diff_pos,
+            "Q_tot_j_neg": self.charge_total_j_neg["total charge"],
+            "Q_tot_M_neg": self.charge_total_M_neg["total charge"],
+            "Q_diff_neg = Q_tot_j_neg - Q_tot_M_neg": diff_neg,
+            "Q_diff_neg - Q cathodic": diff_neg - self.charge_total_j_cathodic["total charge"],
+            "Q cathodic": self.charge_total_j_cathodic["total charge"],
+            "Q_diff_pos - Q_diff_neg": diff_pos + diff_neg,
+            "vertex potential": self.vertex_potential,
+            "Q_tot_j_sim_pos": self.charge_total_j_sim_pos["total charge"],
+            "Q_tot_j_sim_neg": self.charge_total_j_sim_neg["total charge"],
+            "Q_tot_j_sim_neg + cathodic": self.charge_total_j_sim_neg["total charge"] + self.charge_total_j_cathodic["total charge"],
+        }
+
+
+def summaries(experiment_description, interval=None, K_modifier=0, fixed_K=None, limits=None):
+    r"""
+    Returns the summary of the charges of each cycle of an experiment description,
+    as evaluated by the original `BatchIntegration`.
+    """
+    interval = experiment_description["interval"] if interval is None else interval
+
+    summaries = {}
+    for key, cycle in experiment_description["cycles"].items():
+        baseline = Baseline(cycle["df"].copy())
+        timeshift = Timeshift(
+            baseline.df,
+            K_prefactor=(fixed_K or cycle["K_prefactor"]) + K_modifier,
+            K_power=cycle["K_power"],
+            interval=interval,
+        )
+        summaries[key] = COIntegral(timeshift.df, K=timeshift.K, limits=limits).summary()
+    return summaries
+
+
+class ExpDescriptions:
+    def __init__(self, exp_description, K_min, K_max, K_prefactor, K_increment=0.05):
+        self._exp_description = exp_description
+        self.K_min = K_min
+        self.K_max = K_max
+        self.K_increment = K_increment
+        self.K_prefactor = K_prefactor
+
+    @property
+    def exp_description(self):
+        import copy
+        return copy.deepcopy(self._exp_description)
+
+    @property
+    def K_values(self):
+        import numpy as np
+        return [round(K,2) for K in np.arange(self.K_min, self.K_max, self.K_increment)]
+
+    @property
+    def cycles(self):
+        return list(self.exp_description['cycles'].keys())
+
+    def _cycle_K(self, K1, K2):
+        return {'K_prefactor':[K1, K2], 'cycle':[min(self.cycles), max(self.cycles)]}
+
+    @property
+    def dfs_cycles_K(self):
+        import pandas as pd
+
+        cycles_K = []
+        for _K_min in self.K_values:
+            for _K_max in self.K_values:
+                cycles_K.append(pd.DataFrame(self._cycle_K(_K_min, _K_max)))
+        return cycles_K
+
+    def regression_stats_K(self, df):
+        from scipy.stats import linregress
+        return linregress(df['cycle'], df['K_prefactor'])
+
+    def regression_K(self, regression):
+        return [cycle*regression.slope + regression.intercept for cycle in self.cycles]
+
+    @property
+    def K_lines(self):
+        K_lines = []
+        for df in self.dfs_cycles_K:
+            regression = self.regression_stats_K(df)
+            K_lines.append(self.regression_K(regression))
+        return K_lines
+
+    @property
+    def exp_descriptions(self):
+        eds = []
+        for K_line in self.K_lines:
+            experiment = self.exp_description.copy()
+            for idx, cycle in enumerate(self.cycles):
+                experiment['cycles'][cycle]['K_prefactor'] = K_line[idx]
+            eds.append(experiment)
+        return eds
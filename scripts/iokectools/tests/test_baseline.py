@@ -0,0 +1,38 @@
+r"""
+Tests of the baseline correction and of the results of `Baseline` shared between instances.
+"""
+from iokectools.batchintegration import BatchIntegration
+from iokectools.cycle_description import CycleDescription
+from iokectools.synthetic import SyntheticExperiment
+
+columns = ["current1_muA_geo", "ion_current_M44", "ion_current_M44_UVS_ALS_sub"]
+
+
+def charges(experiment_description):
+    overview = BatchIntegration(CycleDescription(experiment_description), cache=False)
+    return [overview.charges[cycle].summary()["Q_tot_j"] for cycle in overview.cycles()]
+
+
+def test_modified_in_place():
+    r"""
+    Cycles whose data is modified in place are evaluated again.
+    """
+    experiment_description = SyntheticExperiment(cycles=2, vertices=[1.0, 1.2]).experiment_description()
+    # The cycles of a synthetic experiment share the lower vertex, which must not be modified twice.
+    for cycle in experiment_description["cycles"].values():
+        cycle["df"] = cycle["df"].copy()
+    original = charges(experiment_description)
+
+    for cycle in experiment_description["cycles"].values():
+        for column in columns:
+            cycle["df"][column] *= 2
+
+    # the same data in new dataframes
+    copied = SyntheticExperiment(cycles=2, vertices=[1.0, 1.2]).experiment_description()
+    for cycle in copied["cycles"].values():
+        cycle["df"] = cycle["df"].copy()
+        for column in columns:
+            cycle["df"][column] *= 2
+
+    assert charges(experiment_description) == charges(copied)
+    assert charges(copied)[0] > 1.9 * original[0]
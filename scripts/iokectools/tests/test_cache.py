@@ -0,0 +1,34 @@
+r"""
+Tests of the columnar cache of CSV files.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from iokectools import cache
+
+
+@pytest.fixture
+def csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path / "cache"))
+    path = str(tmp_path / "cycle.csv")
+    pd.DataFrame({"time": [0.0, 1.0, 2.0], "label": ["a", None, "c"], "count": [1, 2, 3]}).to_csv(path, index=False)
+    return path
+
+
+def test_strings(csv):
+    r"""
+    Columns of strings are stored without pickling and loaded as parsed from the CSV file.
+    """
+    expected = cache.read_csv(csv)
+    folder = cache.cache_path(csv)
+    assert sorted(os.listdir(folder)) == ["0.npy", "1.json", "2.npy", "columns.json"]
+
+    pd.testing.assert_frame_equal(cache.read_csv(csv), expected)
+    pd.testing.assert_frame_equal(pd.concat(cache.iter_csv(csv, 2)), expected)
+
+
+def test_not_writable(csv, monkeypatch):
+    monkeypatch.setattr(cache, "cache_folder", os.path.join(csv, "cache"))
+    assert len(cache.read_csv(csv)) == 3
@@ -0,0 +1,34 @@
+r"""
+Tests of the calibration of K with synthetic experiments of known K.
+"""
+import pytest
+
+from iokectools.calibration import fit_K, fit_K_prefactors
+from iokectools.cycle_description import CycleDescription
+from iokectools.synthetic import SyntheticExperiment
+
+
+def experiment(**kwargs):
+    return SyntheticExperiment(cycles=3, vertices=[1.0, 1.2, 1.4], K_prefactor=1.3, **kwargs)
+
+
+@pytest.mark.parametrize("interval", [None, "auto"])
+@pytest.mark.parametrize("window", [None, (0.6, 0.9)])
+def test_fit_K_prefactors(interval, window):
+    r"""
+    Without a double layer current, the K pre-factor of each cycle is recovered up to the noise.
+    """
+    K_prefactors = fit_K_prefactors(CycleDescription(experiment(capacitance=0).experiment_description()), window=window, interval=interval)
+    assert K_prefactors == pytest.approx({1: 1.3, 2: 1.3, 3: 1.3}, rel=0.005)
+
+
+def test_double_layer():
+    r"""
+    The current density of the double layer in the positive scan, which has no ion current,
+    is attributed to CO oxidation, such that the fitted K is slightly too small.
+    """
+    synthetic = experiment()
+    for cycle in synthetic.cycles():
+        K = fit_K(synthetic.cycle(cycle), interval=synthetic.delay) * 1e6
+        assert K == pytest.approx(1.278, abs=0.005)
+        assert K < 1.3
@@ -0,0 +1,30 @@
+r"""
+Tests of the columns loaded by `CycleDescription`.
+"""
+import pytest
+
+from iokectools import cache
+from iokectools.batchintegration import BatchIntegration
+from iokectools.cycle_description import CycleDescription
+from iokectools.synthetic import SyntheticExperiment
+
+
+@pytest.fixture
+def experiment_description(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path / "cache"))
+    return SyntheticExperiment(cycles=2).to_csv(str(tmp_path / "data"), cache=False)
+
+
+def test_all_columns(experiment_description):
+    df = CycleDescription(experiment_description).cycle_description[1]["df"]
+    assert "current1" in df.columns
+
+
+def test_pipeline_columns(experiment_description):
+    r"""
+    Experiment descriptions evaluated by `BatchIntegration` are loaded with only the required columns.
+    """
+    overview = BatchIntegration(experiment_description)
+    df = overview._experiment_description.cycle_description[1]["df"]
+    assert set(df.columns) == {*BatchIntegration.required_columns(), "current1_muA"}
+    assert overview.charges[1].summary() == BatchIntegration(CycleDescription(experiment_description)).charges[1].summary()
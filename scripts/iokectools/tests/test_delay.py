@@ -0,0 +1,22 @@
+r"""
+Tests of the estimation of the delay of the ion current with synthetic experiments of known delay.
+"""
+import pytest
+
+from iokectools.cycle_description import CycleDescription
+from iokectools.delay import estimate_intervals
+from iokectools.synthetic import SyntheticExperiment
+
+
+@pytest.mark.parametrize("delay", [0.4, -0.4, 1.1])
+def test_estimate_intervals(delay):
+    r"""
+    The estimated interval is the delay of the ion current, including its sign,
+    up to a fraction of the sampling step of 0.05 s.
+    """
+    experiment = SyntheticExperiment(cycles=3, vertices=[1.0, 1.2, 1.4], delay=delay)
+    intervals = estimate_intervals(CycleDescription(experiment.experiment_description()))
+
+    assert list(intervals) == experiment.cycles()
+    for interval in intervals.values():
+        assert interval == pytest.approx(delay, abs=0.01)
@@ -0,0 +1,69 @@
+r"""
+Tests of the charges evaluated by `BatchIntegration`, compared to the original implementation
+in `reference` and to the charges of synthetic experiments, which are known analytically.
+"""
+import pytest
+
+from iokectools.batchintegration import BatchIntegration
+from iokectools.cycle_description import CycleDescription
+from iokectools.synthetic import SyntheticExperiment
+
+from .reference import summaries
+
+limits = {
+    "Q_tot_j": {"lower": 0.5, "current": "positive"},
+    "Q_tot_M_neg": {"lower": 0.3},
+    "Q_tot_j_sim_pos": {"upper": 1.35, "lower": 0.6},
+    "Q_tot_j_sim_neg": {"upper": 1.1, "current": "negative"},
+}
+
+
+def experiment_description():
+    r"""
+    A synthetic experiment with a positive current in all regions, which the original implementation requires.
+    The data is sampled in steps of 1/16 s, such that the original join of the shifted ion current
+    finds all times shifted by multiples of the step.
+    """
+    experiment_description = SyntheticExperiment(cycles=3, vertices=[1.0, 1.2, 1.4], sampling_rate=16, delay=0.375).experiment_description()
+    for cycle in experiment_description["cycles"].values():
+        cycle["df"] = cycle["df"].copy()
+        cycle["df"]["current1_muA_geo"] += 40 * (cycle["df"]["potential"] - 0.4)
+    return experiment_description
+
+
+def assert_summaries(overview, expected):
+    for cycle in overview.cycles():
+        assert overview.charges[cycle].summary() == pytest.approx(expected[cycle], rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("interval", [None, 0, 0.25, -0.125])
+@pytest.mark.parametrize("limits", [None, limits])
+@pytest.mark.parametrize("fixed_K", [None, 0.9])
+def test_reference(interval, limits, fixed_K):
+    overview = BatchIntegration(CycleDescription(experiment_description()), interval=interval, K_modifier=0.02, fixed_K=fixed_K, limits=limits)
+    assert_summaries(overview, summaries(experiment_description(), interval=interval, K_modifier=0.02, fixed_K=fixed_K, limits=limits))
+
+
+def test_reference_sweep_K():
+    r"""
+    The charges of all Ks evaluated at once are the charges of the original implementation for each K.
+    """
+    overview = BatchIntegration(CycleDescription(experiment_description()), interval=0.25, limits=limits)
+    for K_modifier, swept in zip([-0.02, 0, 0.02], overview.sweep_K([-0.02, 0, 0.02], [None])):
+        assert_summaries(swept, summaries(experiment_description(), interval=0.25, K_modifier=K_modifier, limits=limits))
+
+
+@pytest.mark.parametrize("smearing", [0, 1.0])
+def test_synthetic(smearing):
+    r"""
+    The charges of noise-free synthetic cycles are the charges of the generated signals.
+    """
+    experiment = SyntheticExperiment(cycles=4, vertices=[1.0, 1.2, 1.4, 1.6], smearing=smearing, current_noise=0, ion_current_noise=0)
+    overview = BatchIntegration(CycleDescription(experiment.experiment_description()))
+    # The charge of the double layer during the last `delay` of a cycle is missing, since the shifted ion current is not defined there,
+    # as well as up to a step at the edges of a region.
+    missing = experiment.capacitance * experiment.rate * (experiment.delay + 2 * experiment.step)
+    for cycle in overview.cycles():
+        summary = overview.charges[cycle].summary()
+        for charge in ["Q_tot_j", "Q_tot_M", "Q_tot_j_pos", "Q_tot_M_pos", "Q_tot_j_neg", "Q_tot_M_neg", "Q cathodic", "vertex potential"]:
+            assert summary[charge] == pytest.approx(experiment.charges[cycle][charge], rel=0.01, abs=missing), charge
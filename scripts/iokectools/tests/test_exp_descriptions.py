@@ -0,0 +1,46 @@
+r"""
+Tests of the K lines of `ExpDescriptions`, compared to the original implementation in `reference`.
+"""
+import pandas as pd
+import pytest
+
+from iokectools.exp_descriptions import ExpDescriptions
+
+from . import reference
+
+
+def experiment_description():
+    cycles = {cycle: {"K_prefactor": 1.0, "K_power": 1e-6, "df": pd.DataFrame({"time": [0.0, 1.0]})} for cycle in [2, 3, 5, 8]}
+    return {"data folder": None, "interval": 0.4, "experiment name": None, "cycles": cycles}
+
+
+@pytest.fixture
+def descriptions():
+    return [cls(experiment_description(), K_min=0.8, K_max=1.0, K_prefactor=1.0) for cls in [ExpDescriptions, reference.ExpDescriptions]]
+
+
+def test_K_lines(descriptions):
+    descriptions, expected = descriptions
+    assert len(descriptions.K_lines) == len(expected.K_lines) == 16
+    for K_line, expected_line in zip(descriptions.K_lines, expected.K_lines):
+        assert K_line == pytest.approx(expected_line, rel=1e-15, abs=1e-15)
+
+
+def test_exp_descriptions(descriptions):
+    r"""
+    The experiment descriptions differ from the original ones only in sharing the data of the cycles.
+    """
+    descriptions, expected = descriptions
+    original = descriptions._exp_description
+
+    for experiment, expected_experiment, K_overrides in zip(descriptions.iter_exp_descriptions(), expected.exp_descriptions, descriptions.K_overrides()):
+        assert experiment.keys() == expected_experiment.keys()
+        assert {key: value for key, value in experiment.items() if key != "cycles"} == {key: value for key, value in expected_experiment.items() if key != "cycles"}
+        assert {cycle: description["K_prefactor"] for cycle, description in experiment["cycles"].items()} == K_overrides
+        for cycle, description in experiment["cycles"].items():
+            assert description["K_prefactor"] == pytest.approx(expected_experiment["cycles"][cycle]["K_prefactor"], rel=1e-15, abs=1e-15)
+            assert description["K_power"] == expected_experiment["cycles"][cycle]["K_power"]
+            assert description["df"] is original["cycles"][cycle]["df"]
+            pd.testing.assert_frame_equal(description["df"], expected_experiment["cycles"][cycle]["df"])
+
+    assert all(description["K_prefactor"] == 1.0 for description in original["cycles"].values())
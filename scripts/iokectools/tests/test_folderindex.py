@@ -0,0 +1,117 @@
+r"""
+Tests of the index of the files in a folder.
+"""
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from iokectools import cache
+from iokectools.folderindex import FolderIndex, archive_members, file_stat, open_file, split_archive
+
+
+def touch(path):
+    r"""
+    Creates an empty file and advances the modification time of its folder,
+    such that the change is noticed on file systems with a coarse resolution.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").close()
+    stat = os.stat(os.path.dirname(path))
+    os.utime(os.path.dirname(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def walk(folder):
+    return [os.path.join(directory, file) for directory, _, files in os.walk(folder) for file in files if file.endswith(".csv")]
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = str(tmp_path / "data")
+    for path in ["a.csv", "data.csv", "notes.txt", "sub/a.csv", "sub/b.csv", "sub/deeper/c.csv"]:
+        touch(os.path.join(folder, path))
+    return folder
+
+
+def test_files(folder):
+    r"""
+    The files are listed in the order of `os.walk`.
+    """
+    index = FolderIndex.get(folder)
+    assert index.files == walk(folder)
+    assert index.filenames["a.csv"] == [os.path.join(folder, "a.csv"), os.path.join(folder, "sub", "a.csv")]
+
+
+def test_refresh(folder):
+    r"""
+    Files added to or removed from a subfolder are found after a refresh.
+    """
+    index = FolderIndex.get(folder)
+    touch(os.path.join(folder, "sub", "deeper", "d.csv"))
+    touch(os.path.join(folder, "new", "e.csv"))
+    os.remove(os.path.join(folder, "sub", "b.csv"))
+    stat = os.stat(os.path.join(folder, "sub"))
+    os.utime(os.path.join(folder, "sub"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert FolderIndex.get(folder) is index
+    assert index.files == walk(folder)
+    assert index.find(["d.csv", "e.csv", "b.csv"]) == [os.path.join(folder, "sub", "deeper", "d.csv"), os.path.join(folder, "new", "e.csv")]
+
+
+def test_find(folder):
+    r"""
+    An item matching the name of a file only returns the files with this name,
+    even if it is contained in the name of other files. Other items are searched in the full paths.
+    """
+    index = FolderIndex.get(folder)
+    assert index.find(["a.csv"]) == [os.path.join(folder, "a.csv"), os.path.join(folder, "sub", "a.csv")]
+    assert index.find(["ta.csv"]) == [os.path.join(folder, "data.csv")]
+    assert index.find([os.path.join("sub", "deeper")]) == [os.path.join(folder, "sub", "deeper", "c.csv")]
+
+
+def write_archive(path, members):
+    r"""
+    Writes a ZIP archive with the CSV files `members` and advances its modification time.
+    """
+    exists = os.path.exists(path)
+    mtime = os.stat(path).st_mtime_ns if exists else 0
+    with zipfile.ZipFile(path, "w") as archive:
+        for member, df in members.items():
+            archive.writestr(member, df.to_csv(index=False))
+    if exists:
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, max(stat.st_mtime_ns, mtime + 10**9)))
+
+
+def test_archive(tmp_path, monkeypatch):
+    r"""
+    The files in a folder of a ZIP archive are listed and read without extracting the archive.
+    A member whose content changed is read again, although its name did not change.
+    """
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path / "cache"))
+    path = str(tmp_path / "Pt111.zip")
+    members = {"Pt111/c_1.csv": pd.DataFrame({"time": [0.0, 1.0]}), "Pt111/c_2.csv": pd.DataFrame({"time": [2.0]}), "other/c_1.csv": pd.DataFrame({"time": [3.0]})}
+    write_archive(path, members)
+
+    folder = os.path.join(path, "Pt111")
+    file = os.path.join(folder, "c_1.csv")
+    assert split_archive(file) == (path, "Pt111/c_1.csv")
+    assert split_archive(folder) == (path, "Pt111")
+    assert split_archive(str(tmp_path)) is None
+
+    index = FolderIndex.get(folder)
+    assert index.files == [file, os.path.join(folder, "c_2.csv")]
+    assert list(archive_members(path)) == list(members)
+    with open_file(file) as f:
+        pd.testing.assert_frame_equal(pd.read_csv(f), members["Pt111/c_1.csv"])
+    pd.testing.assert_frame_equal(cache.read_csv(file), members["Pt111/c_1.csv"])
+
+    stat = file_stat(file)
+    write_archive(path, {**members, "Pt111/c_1.csv": pd.DataFrame({"time": [0.0, 4.0]}), "Pt111/c_3.csv": pd.DataFrame({"time": [5.0]})})
+
+    assert file_stat(file) != stat
+    with zipfile.ZipFile(path) as archive:
+        assert file_stat(file)[-1] == archive.getinfo("Pt111/c_1.csv").CRC
+    pd.testing.assert_frame_equal(cache.read_csv(file), pd.DataFrame({"time": [0.0, 4.0]}))
+    assert FolderIndex.get(folder).files == [file, os.path.join(folder, "c_2.csv"), os.path.join(folder, "c_3.csv")]
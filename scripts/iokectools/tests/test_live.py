@@ -0,0 +1,78 @@
+r"""
+Tests of the evaluation of a growing measurement file with `LiveCycles`,
+replaying a synthetic measurement file, compared to the evaluation of the entire file.
+"""
+import functools
+
+import pytest
+
+from iokectools import cache, live
+from iokectools.batchintegration import BatchIntegration
+from iokectools.cycle_description import CycleDescription
+from iokectools.live import LiveCycles
+from iokectools.synthetic import SyntheticExperiment
+
+als = {"lam": 1e6, "p": 1e-3, "niter": 5}
+
+
+@pytest.fixture
+def experiment(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path / "cache"))
+    # The file is read in small blocks, such that the cycles are completed across several chunks.
+    monkeypatch.setattr(live, "tail", functools.partial(live.tail, blocksize=1 << 14))
+    return SyntheticExperiment(cycles=3, vertices=[1.0, 1.2, 1.4])
+
+
+def replay(experiment, path, rows=slice(None), drop=(), **kwargs):
+    r"""
+    Writes the `rows` of the measurement without the columns `drop` to `path`
+    and returns the summaries of the cycles evaluated while reading the file.
+    """
+    experiment.df.iloc[rows].drop(columns=["current1_muA_geo", *drop]).to_csv(path, index=False)
+    live = LiveCycles(str(path), K_prefactor=experiment.K_prefactor, K_power=experiment.K_power, interval=experiment.delay, timeout=0, **kwargs)
+    return {summary.pop("cycle"): summary for summary in live.summaries()}
+
+
+def expected(experiment, tmp_path, **kwargs):
+    experiment_description = experiment.to_csv(str(tmp_path / "data"), measurement_file="measurement.csv", cache=False)
+    overview = BatchIntegration(CycleDescription(experiment_description), **kwargs)
+    return {cycle: overview.charges[cycle].summary() for cycle in overview.cycles()}
+
+
+def assert_summaries(summaries, expected):
+    assert list(summaries) == list(expected)
+    for cycle, summary in summaries.items():
+        assert summary == pytest.approx(expected[cycle], rel=1e-9, abs=1e-9), cycle
+
+
+def test_replay(experiment, tmp_path):
+    r"""
+    The cycles are the cycles of the entire measurement file, including the last cycle.
+    """
+    assert_summaries(replay(experiment, tmp_path / "live.csv"), expected(experiment, tmp_path))
+
+
+def test_mid_sweep(experiment, tmp_path):
+    r"""
+    A file starting during the positive sweep starts with the first complete cycle.
+    """
+    summaries = replay(experiment, tmp_path / "live.csv", rows=slice(30, None))
+    charges = expected(experiment, tmp_path)
+    assert_summaries(summaries, {1: charges[2], 2: charges[3]})
+
+
+def test_als(experiment, tmp_path):
+    r"""
+    Without the baseline corrected ion current in the file, the ion current of each cycle is corrected with ALS.
+    """
+    summaries = replay(experiment, tmp_path / "live.csv", drop=["ion_current_M44_UVS_ALS_sub"], als=als)
+    assert_summaries(summaries, expected(experiment, tmp_path, als=als))
+
+
+def test_single_cycle(tmp_path, monkeypatch):
+    r"""
+    The start of a file with a single cycle is confirmed as a lower vertex at the end of the file.
+    """
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path / "cache"))
+    experiment = SyntheticExperiment(cycles=1, vertices=[1.2])
+    assert_summaries(replay(experiment, tmp_path / "live.csv"), expected(experiment, tmp_path))
@@ -0,0 +1,65 @@
+r"""
+Tests of the command-line evaluation of experiment descriptions.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from iokectools import cache
+from iokectools.__main__ import experiment_description, main
+from iokectools.batchintegration import BatchIntegration
+from iokectools.charge_statistics import charge_statistics
+from iokectools.cycle_description import CycleDescription
+from iokectools.synthetic import SyntheticExperiment
+from iokectools.vertex import VertexBins
+
+als = {"lam": 1e6, "p": 1e-3, "niter": 5}
+
+
+@pytest.fixture
+def definitions(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path / "cache"))
+    ed = SyntheticExperiment(cycles=3, vertices=[1.0, 1.2, 1.4]).to_csv(str(tmp_path / "data"), cache=False)
+    path = tmp_path / "experiments.py"
+    path.write_text(f"experiment_description_1 = {ed!r}\n")
+    return str(path), ed
+
+
+def test_experiment_description(definitions):
+    r"""
+    The experiment descriptions are copied entirely, such that the definitions are not modified.
+    """
+    path, _ = definitions
+    copied = experiment_description("experiment_description_1", path, data_folder="elsewhere")
+    copied["cycles"][1]["K_prefactor"] = 2
+    assert experiment_description("experiment_description_1", path)["cycles"][1]["K_prefactor"] == 1.0
+
+
+def test_statistics(definitions, tmp_path):
+    path, ed = definitions
+    output = str(tmp_path / "output")
+    main(["statistics", "experiment_description_1", "--definitions", path, "--output", output, "--time-shifts", "0.4", "--K-shifts", "0",
+          "--als", '{"lam": 1e6, "p": 1e-3, "niter": 5}', "--vertex-bins", "0.2", "1.1", "3", "--trace", str(tmp_path / "trace.json")])
+
+    expected = charge_statistics(ed, time_shifts=[0.4], K_shifts=[0], als=als, vertex_bins=VertexBins(width=0.2, origin=1.1, count=3)).df
+    pd.testing.assert_frame_equal(pd.read_csv(os.path.join(output, "experiment_description_1_statistics.csv")), expected.reset_index(drop=True), check_dtype=False)
+    assert list(expected["vertex potential"]) == [1.1, 1.3, 1.5]
+    assert os.path.exists(tmp_path / "trace_stages.csv")
+
+
+@pytest.mark.parametrize("interval", ["0.35", "auto"])
+def test_integrate(definitions, tmp_path, interval):
+    path, ed = definitions
+    output = str(tmp_path / "output")
+    main(["integrate", "experiment_description_1", "--definitions", path, "--output", output, "--interval", interval])
+
+    expected = BatchIntegration(CycleDescription(ed), interval=interval if interval == "auto" else float(interval)).df
+    pd.testing.assert_frame_equal(pd.read_csv(os.path.join(output, "experiment_description_1.csv")), expected.reset_index(drop=True), check_dtype=False)
+
+
+def test_invalid_interval(definitions, capsys):
+    path, _ = definitions
+    with pytest.raises(SystemExit):
+        main(["integrate", "experiment_description_1", "--definitions", path, "--interval", "later"])
+    assert "neither a number nor 'auto'" in capsys.readouterr().err
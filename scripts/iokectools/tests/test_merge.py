@@ -0,0 +1,70 @@
+r"""
+Tests of merging EC and DEMS files with `Merge`.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from iokectools import cache
+from iokectools.merge import Merge
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path / "cache"))
+    rng = np.random.default_rng(0)
+
+    time = np.arange(0, 100, 0.1) + rng.uniform(0, 0.05, 1000)
+    pd.DataFrame({"time": time, "potential": np.sin(time), "current1": np.cos(time), "other": time}).to_csv(tmp_path / "ec.csv", index=False)
+
+    # The masses are recorded at different times and the ion current of mass 32 is missing in some rows.
+    dems = pd.DataFrame({
+        "time_rel_M32": np.arange(-5, 105, 0.5),
+        "ion_current_M32": rng.normal(1e-10, 1e-12, 220),
+        "time_rel_M44": np.arange(-1, 109, 0.5),
+        "ion_current_M44": rng.normal(3e-10, 1e-12, 220),
+    })
+    dems.loc[100:110, "ion_current_M32"] = np.nan
+    dems.to_csv(tmp_path / "dems.csv", index=False)
+
+    return str(tmp_path / "ec.csv"), str(tmp_path / "dems.csv")
+
+
+def test_masses(files):
+    r"""
+    The rows of each mass are selected by its own time and ion current.
+    """
+    merged = Merge(*files, masses=[32, 44], time_offset=-2, als=None).df
+    single = Merge(*files, masses=[44], time_offset=-2, als=None).df
+    # The merged data ends with mass 32, which is recorded for a shorter time.
+    assert len(merged) < len(single)
+    assert np.array_equal(merged["ion_current_M44"], single["ion_current_M44"].iloc[:len(merged)])
+    assert not merged["ion_current_M32"].isna().any()
+
+
+def test_chunks(files):
+    merge = Merge(*files, masses=[32, 44], als={"lam": 1e4, "p": 1e-3, "niter": 3}, chunksize=64)
+    pd.testing.assert_frame_equal(merge.df, Merge(*files, masses=[32, 44], als={"lam": 1e4, "p": 1e-3, "niter": 3}).df)
+    pd.testing.assert_frame_equal(pd.concat(merge.iter_chunks()), merge.df)
+    assert list(merge.df.columns) == ["time", "ion_current_M32", "ion_current_M44", "potential", "current1",
+                                      *[f"ion_current_M{mass}{suffix}" for mass in [32, 44] for suffix in ["_UVS", "_UVS_sub", "_UVS_ALS", "_UVS_ALS_sub"]]]
+
+
+def test_time(files):
+    r"""
+    The merged data ends with the mass recorded for the shortest time.
+    """
+    merge = Merge(*files, masses=[44, 32], time_offset=-2, als=None)
+    assert merge.time[-1] < merge.dems["time_rel_M32"].max() <= merge.time[-1] + merge.interval + 1e-9
+
+
+def test_to_csv(files, tmp_path):
+    r"""
+    The merged data is stored in the cache as it is read from the CSV file.
+    """
+    merge = Merge(*files, masses=[32, 44], als=None, chunksize=64)
+    path = str(tmp_path / "merged" / "merged.csv")
+    merge.to_csv(path)
+
+    pd.testing.assert_frame_equal(cache.read_csv(path), cache.read_csv(path, cache=False), check_exact=True)
+    pd.testing.assert_frame_equal(cache.load(cache.cache_path(path)), merge.df, check_exact=False, rtol=1e-15)
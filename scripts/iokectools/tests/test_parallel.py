@@ -0,0 +1,31 @@
+r"""
+Tests of the evaluation of `charge_statistics` in worker processes.
+"""
+import numpy as np
+
+from iokectools.charge_statistics import charge_statistics
+from iokectools.cycle_description import CycleDescription
+from iokectools.synthetic import SyntheticExperiment
+
+
+def statistics(**kwargs):
+    experiment_description = SyntheticExperiment(cycles=3, vertices=[1.0, 1.2, 1.4]).experiment_description()
+    return charge_statistics(CycleDescription(experiment_description), time_shifts=[-0.4], K_shifts=[0, 0.02], **kwargs).df
+
+
+def test_workers():
+    r"""
+    The charges evaluated by workers are the charges of the serial evaluation.
+    """
+    serial = statistics()
+    assert np.array_equal(statistics(workers=2).to_numpy(), serial.to_numpy())
+
+
+def test_als():
+    r"""
+    The workers apply the ALS baseline correction of the ion current.
+    """
+    als = {"lam": 1e6, "p": 1e-3, "niter": 5}
+    serial = statistics(als=als)
+    assert not np.array_equal(serial.to_numpy(), statistics().to_numpy())
+    assert np.array_equal(statistics(workers=2, als=als).to_numpy(), serial.to_numpy())
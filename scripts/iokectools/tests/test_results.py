@@ -0,0 +1,65 @@
+r"""
+Tests of the charges of cycles stored by `results`.
+"""
+import os
+
+import pytest
+
+from iokectools import cache, results
+from iokectools.batchintegration import BatchIntegration
+from iokectools.cycle_description import CycleDescription
+from iokectools.synthetic import SyntheticExperiment
+
+
+@pytest.fixture
+def cache_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path))
+    return tmp_path
+
+
+def charges(experiment_description, **kwargs):
+    overview = BatchIntegration(CycleDescription(experiment_description), **kwargs)
+    return {cycle: overview.charges[cycle].summary()["Q_tot_j"] for cycle in overview.cycles()}
+
+
+def test_disabled_by_default(cache_folder):
+    charges(SyntheticExperiment(cycles=2).experiment_description())
+    assert not os.path.exists(results.results_folder())
+
+
+def test_stored(cache_folder):
+    experiment = SyntheticExperiment(cycles=2)
+    expected = charges(experiment.experiment_description(), cache=True)
+    assert len(os.listdir(results.results_folder())) == 2
+
+    overview = BatchIntegration(CycleDescription(experiment.experiment_description()), cache=True)
+    assert type(overview.charges[1]).__name__ == "SummaryCharge"
+    assert charges(experiment.experiment_description(), cache=True) == expected
+
+
+def test_modified_in_place(cache_folder):
+    r"""
+    Dataframes provided in memory are evaluated again when they have been modified in place.
+    """
+    experiment_description = SyntheticExperiment(cycles=1).experiment_description()
+    expected = charges(experiment_description, cache=True)
+
+    experiment_description["cycles"][1]["df"]["current1_muA_geo"] *= 2
+
+    assert charges(experiment_description, cache=True) == charges(experiment_description)
+    assert charges(experiment_description, cache=True)[1] > 1.9 * expected[1]
+
+
+def test_modified_file(cache_folder, tmp_path):
+    experiment = SyntheticExperiment(cycles=2)
+    experiment_description = experiment.to_csv(str(tmp_path / "data"), cache=False)
+    expected = charges(experiment_description, cache=True)
+
+    path = tmp_path / "data" / "synthetic_c_2.csv"
+    df = experiment.cycle(2).drop(columns=["current1_muA_geo"])
+    df["current1_muA"] *= 2
+    df.to_csv(path, index=False)
+
+    modified = charges(experiment_description, cache=True)
+    assert modified[1] == expected[1]
+    assert modified[2] > 1.9 * expected[2]
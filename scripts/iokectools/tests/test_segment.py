@@ -0,0 +1,80 @@
+r"""
+Tests of the detection of the vertices and cycles of a potential trace.
+"""
+import numpy as np
+import pytest
+
+from iokectools.segment import TurningPoints, cycle_ranges, vertices
+
+
+def scan(vertices=(1.0, 1.2, 1.4), lower=0.05, step=0.01):
+    r"""
+    Returns a potential trace of triangular cycles starting at the lower vertex `lower`,
+    and the first row of each cycle.
+    """
+    sweeps = []
+    for upper in vertices:
+        count = int(round((upper - lower) / step))
+        sweeps.append(np.linspace(lower, upper, count + 1)[:-1])
+        sweeps.append(np.linspace(upper, lower, count + 1)[:-1])
+    potential = np.concatenate([*sweeps, [lower]])
+    starts = np.cumsum([0, *[len(sweep) for sweep in sweeps]])[::2]
+    return potential, list(starts)
+
+
+def test_lower_start():
+    r"""
+    A trace starting at the lower vertex starts with the first cycle.
+    """
+    potential, starts = scan()
+    assert cycle_ranges(potential) == {n + 1: (int(start), int(stop) + 1) for n, (start, stop) in enumerate(zip(starts, starts[1:]))}
+
+
+def test_rising_start():
+    r"""
+    A trace starting during the positive sweep starts with the first complete cycle.
+    """
+    potential, starts = scan()
+    ranges = cycle_ranges(potential[50:])
+    assert list(ranges) == [1, 2]
+    assert ranges[1] == (starts[1] - 50, starts[2] - 50 + 1)
+    assert vertices(potential[50:])[0] == (starts[1] - 50 - 95, "upper")
+
+
+def test_falling_start():
+    r"""
+    A trace starting during the negative sweep starts with the first complete cycle.
+    """
+    potential, starts = scan()
+    ranges = cycle_ranges(potential[120:])
+    assert list(ranges) == [1, 2]
+    assert ranges[1] == (starts[1] - 120, starts[2] - 120 + 1)
+    assert vertices(potential[120:])[0] == (starts[1] - 120, "lower")
+
+
+def test_shallow_dip():
+    r"""
+    The start of a rising trace is a lower vertex, if the potential drops below it by less than the hysteresis.
+    """
+    potential, starts = scan()
+    assert cycle_ranges(potential[2:])[1] == (0, starts[1] - 2 + 1)
+    assert cycle_ranges(potential[10:])[1] == (starts[1] - 10, starts[2] - 10 + 1)
+
+
+@pytest.mark.parametrize("offset", [0, 50, 120])
+@pytest.mark.parametrize("chunk", [1, 7, 1000])
+def test_chunks(offset, chunk):
+    r"""
+    The vertices detected in chunks are the vertices of the entire trace.
+    """
+    potential, _ = scan()
+    potential = potential[offset:] + np.random.default_rng(0).normal(0, 0.005, len(potential) - offset)
+
+    turning_points = TurningPoints()
+    detected = []
+    for start in range(0, len(potential), chunk):
+        detected += turning_points.update(potential[start:start + chunk])
+        assert turning_points.offset <= len(potential)
+    detected += turning_points.close()
+
+    assert detected == vertices(potential)
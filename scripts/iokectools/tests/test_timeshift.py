@@ -0,0 +1,38 @@
+r"""
+Tests of the alignment of the ion current with the current density.
+"""
+import numpy as np
+
+from iokectools.integrate import COIntegral
+from iokectools.synthetic import SyntheticExperiment
+from iokectools.timeshift import Timeshift
+
+
+def summary(df):
+    timeshift = Timeshift(df, K_prefactor=1.0, K_power=1e-6, interval=0.4, ion_current="ion_current_M44_UVS_ALS_sub")
+    return COIntegral(timeshift.df, K=timeshift.K).summary()
+
+
+def test_shuffled_rows():
+    r"""
+    The charges do not depend on the order of the rows of the input.
+    """
+    df = SyntheticExperiment(cycles=1, vertices=[1.2]).cycle(1)
+    shuffled = df.iloc[np.random.default_rng(0).permutation(len(df))]
+
+    expected = summary(df)
+    for charge, value in summary(shuffled).items():
+        assert np.isclose(value, expected[charge], rtol=1e-12, atol=1e-12), charge
+
+
+def test_shifted_ion_current():
+    r"""
+    The shifted ion current is the ion current of the row at the shifted time.
+    """
+    df = SyntheticExperiment(cycles=1, vertices=[1.2], sampling_rate=10).cycle(1)
+    shuffled = df.iloc[np.random.default_rng(1).permutation(len(df))]
+
+    aligned = Timeshift(shuffled, K_prefactor=1.0, K_power=1e-6, interval=0.4, ion_current="ion_current_M44_UVS_ALS_sub").aligned
+    expected = df.set_index("time")["ion_current_M44_UVS_ALS_sub"]
+    # The shift is a multiple of the sampling step, i.e., the values are only interpolated within rounding errors of the time.
+    assert np.allclose(aligned["ion_current_M44_UVS_ALS_sub"], expected.reindex(aligned["time"] + 0.4, method="nearest").to_numpy(), rtol=1e-6, atol=0)
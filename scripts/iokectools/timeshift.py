@@ -1,4 +1,66 @@
+import weakref
+from functools import cached_property
+
+import numpy as np
+
+from .instrument import stage
+
+
+def shift(time, values, interval):
+    r"""
+    Returns the values of a time series at the times `time + interval`
+    by linear interpolation between the neighbouring data points.
+
+    Values at times outside the time series are NaN. Values at times coinciding with a data point
+    are the values of that data point, i.e., for shifts by a multiple of the sampling step
+    the values are not interpolated.
+
+    The `time` must be sorted in ascending order.
+
+    EXAMPLES::
+
+        >>> shift(np.array([0.0, 1.0, 2.0]), np.array([0.0, 10.0, 20.0]), 0.5)
+        array([ 5., 15., nan])
+
+    """
+    time = np.asarray(time, dtype=float)
+    values = np.asarray(values, dtype=float)
+    target = time + interval
+
+    shifted = np.full(len(target), np.nan)
+    if len(time) == 0:
+        return shifted
+
+    # the last data point at or before the target time
+    left = np.searchsorted(time, target, side="right") - 1
+    inside = (left >= 0) & (target <= time[-1])
+
+    exact = inside.copy()
+    exact[inside] = time[left[inside]] == target[inside]
+    shifted[exact] = values[left[exact]]
+
+    between = inside & ~exact
+    left = left[between]
+    weight = (target[between] - time[left]) / (time[left + 1] - time[left])
+    shifted[between] = values[left] + weight * (values[left + 1] - values[left])
+
+    return shifted
+
+
 class Timeshift:
+    r"""
+    Aligns the ion current with the current density, where the ion current is shifted in time by `interval`,
+    and simulates the current density from the ion current with the conversion factor `K_prefactor * K_power`.
+
+    The aligned data is computed once for each input dataframe, interval and ion current
+    and shared by all instances, e.g., by all Ks of a parameter sweep.
+    It is computed again when the input dataframe has been modified in place.
+    """
+
+    # The hash of the content of the input dataframe and the aligned columns
+    # by the id of the input dataframe, the interval and the ion current.
+    _aligned = {}
+
     def __init__(self, df, K_prefactor, K_power, interval=0, mass=44, ion_current=None):
         self._df = df
         self.interval = interval
@@ -8,6 +70,18 @@ class Timeshift:
         self.mass = mass
         self.ion_current = ion_current or f"ion_current_M{self.mass}_UVS_ALS_sub_norm_filt"
 
+    @classmethod
+    def required_columns(cls, mass=44, ion_current=None):
+        r"""
+        The columns of the input dataframe used by this class.
+        """
+        return [
+            "time",
+            "potential",
+            "current1_muA_geo",
+            ion_current or f"ion_current_M{mass}_UVS_ALS_sub_norm_filt",
+        ]
+
     @property
     def dfj(self):
         r"""
@@ -29,22 +103,73 @@ class Timeshift:
         dfm2 = dfm[["time2", self.ion_current]].copy().set_index("time2")
         return dfm2
 
+    @classmethod
+    def _forget(cls, source):
+        for key in [key for key in cls._aligned if key[0] == source]:
+            del cls._aligned[key]
+
+    def _align(self):
+        r"""
+        Returns the aligned arrays, see `aligned`.
+        """
+        time = self._df["time"].to_numpy(dtype=float)
+        # All columns are sorted by time, such that the shifted ion current is paired with the rows it was interpolated for.
+        order = np.argsort(time, kind="stable")
+        time = time[order]
+
+        aligned = {
+            "potential": self._df["potential"].to_numpy(dtype=float)[order],
+            "current1_muA_geo": self._df["current1_muA_geo"].to_numpy(dtype=float)[order],
+            self.ion_current: shift(
+                time,
+                self._df[self.ion_current].to_numpy(dtype=float)[order],
+                self.interval,
+            ),
+            "time": time,
+        }
+
+        defined = np.ones(len(time), dtype=bool)
+        for values in aligned.values():
+            defined &= ~np.isnan(values)
+        return {column: values[defined] for column, values in aligned.items()}
+
     @property
+    def aligned(self):
+        r"""
+        A dict with the arrays of the electrochemical data and the ion current at the time shifted
+        by the value of the input parameter `interval`. Only times for which all values are defined are included.
+        The arrays are sorted by time.
+        """
+        from .cache import frame_hash
+
+        key = (id(self._df), self.interval, self.ion_current)
+        content = frame_hash(self._df, ["time", "potential", "current1_muA_geo", self.ion_current])
+
+        if key not in self._aligned or self._aligned[key][0] != content:
+            with stage("timeshift join", rows=len(self._df)):
+                aligned = self._align()
+
+            if not any(cached[0] == key[0] for cached in self._aligned):
+                # Drop the aligned data when the input dataframe is deleted,
+                # before its id can be reused.
+                weakref.finalize(self._df, Timeshift._forget, key[0])
+            self._aligned[key] = (content, aligned)
+
+        return self._aligned[key][1]
+
+    @cached_property
     def df(self):
         r"""
-        A combined dataframe of the sliced dataframes `dfj` and `dfm`,
-        where the time axis is shifted by the value
-        of the input parameter `interval'.
+        A combined dataframe of the current density and the ion current,
+        where the ion current at each time is the ion current at the time shifted by the value
+        of the input parameter `interval', interpolated between data points if necessary.
+        Times where the shifted ion current is not available are dropped.
         """
-        # there seems to be an issue with the indexes, when using `pd.concat' to combine the dataframes.
-        # dfnew = pd.concat([self.dfj, self.dfm], axis=1).dropna(axis=0, how="any").reset_index(drop=True)
-        dfnew = self.dfj.join(self.dfm).dropna(axis=0, how="any")
-        dfnew["time"] = dfnew.index
-        dfnew["sim_current"] = (
-            dfnew[f"ion_current_M{self.mass}_UVS_ALS_sub_norm_filt"] / self.K * 1000000
-        )
+        import pandas as pd
+
+        dfnew = pd.DataFrame(self.aligned)
+        dfnew["sim_current"] = dfnew[self.ion_current] / self.K * 1000000
         dfnew["current_H_sub"] = dfnew["current1_muA_geo"] - dfnew["sim_current"]
-        dfnew = dfnew.reset_index(drop=True)
         return dfnew
 
     def plot(self, filename="unknown"):
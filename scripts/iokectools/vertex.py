@@ -0,0 +1,106 @@
+r"""
+Binning of the vertex potentials of the cycles, such that cycles recorded with nominally the same
+upper potential limit, e.g., 0.99 V and 1.01 V, are grouped and averaged.
+"""
+from functools import cached_property
+
+import numpy as np
+
+
+class VertexBins:
+    r"""
+    Bins of the vertex potential with a width of `width` (in V), centered at `origin + n * width`
+    for the `count` bins `n = 0, 1, ...`. The default bins are those of `charge_statistics`,
+    i.e., 0.75 V, 0.8 V, ..., 2.65 V.
+
+    closed: the side of the bins including a vertex potential on an edge of the bins,
+    `'left'`, `'right'` or `'neither'`, where such potentials are not assigned to any bin.
+
+    EXAMPLES::
+
+        >>> bins = VertexBins()
+        >>> bins.assign([0.99, 1.01, 1.024, 0.6])
+        array([ 1.,  1.,  1., nan])
+        >>> bins.outside([0.99, 1.01, 1.024, 0.6])
+        array([False, False, False,  True])
+
+    On an edge of the bins, the potential is assigned to the bin on the `closed` side::
+
+        >>> bins.assign([1.025])
+        array([1.05])
+        >>> VertexBins(closed="right").assign([1.025])
+        array([1.])
+        >>> VertexBins(closed="neither").assign([1.025])
+        array([nan])
+
+    """
+
+    def __init__(self, width=0.05, origin=0.75, count=39, closed="left", decimals=3):
+        if closed not in ["left", "right", "neither"]:
+            raise ValueError(f"Unknown `closed` value `{closed}`. Use 'left', 'right' or 'neither'.")
+
+        self.width = width
+        self.origin = origin
+        self.count = count
+        self.closed = closed
+        self.decimals = decimals
+
+    @cached_property
+    def edges(self):
+        r"""
+        The `count + 1` edges of the bins, rounded to `decimals`.
+        """
+        return np.round(self.origin + self.width * (np.arange(self.count + 1) - 0.5), self.decimals)
+
+    @cached_property
+    def centers(self):
+        r"""
+        The centers of the bins, rounded to `decimals`.
+        """
+        return np.round(self.origin + self.width * np.arange(self.count), self.decimals)
+
+    def indices(self, vertex):
+        r"""
+        Returns the index of the bin of each vertex potential, or -1 for potentials outside the bins.
+        """
+        vertex = np.asarray(vertex, dtype=float)
+        indices = np.digitize(vertex, self.edges, right=self.closed == "right") - 1
+
+        outside = (indices < 0) | (indices >= self.count) | np.isnan(vertex)
+        if self.closed == "neither":
+            outside |= np.isin(vertex, self.edges)
+        return np.where(outside, -1, indices)
+
+    def outside(self, vertex):
+        r"""
+        Returns a boolean array indicating the vertex potentials, which are not within any bin.
+        """
+        return self.indices(vertex) < 0
+
+    def assign(self, vertex):
+        r"""
+        Returns the center of the bin of each vertex potential, or NaN for potentials outside the bins.
+        """
+        indices = self.indices(vertex)
+        return np.where(indices < 0, np.nan, self.centers[indices])
+
+    def center(self, vertex):
+        r"""
+        Returns the center of the bin of a single vertex potential or `None` if it is outside the bins.
+        """
+        center = float(self.assign([vertex])[0])
+        return None if np.isnan(center) else center
+
+    def report(self, vertex, labels=None):
+        r"""
+        Returns a message listing the vertex potentials outside the bins, identified by `labels`,
+        or `None` if all potentials are within the bins.
+        """
+        vertex = np.asarray(vertex, dtype=float)
+        outside = self.outside(vertex)
+        if not outside.any():
+            return None
+
+        labels = np.arange(len(vertex)) if labels is None else np.asarray(labels)
+        listed = ", ".join(f"{label}: {value}" for label, value in zip(labels[outside], vertex[outside]))
+        return f"{outside.sum()} vertex potentials are outside the bins from {self.edges[0]} V to {self.edges[-1]} V and are ignored ({listed})."
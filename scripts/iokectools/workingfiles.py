@@ -1,29 +1,36 @@
-import os
+from functools import cached_property
 
 import numpy as np
 import pandas as pd
 
+from .cache import iter_csv, read_csv
+from .folderindex import FolderIndex
+
 
 class WorkingFiles:
     """Based on a specific workingdirectory containing all files (folder) and the names of files of interest
-    this class creates a list of files with full path which can be processed with several sub functions"""
+    this class creates a list of files with full path which can be processed with several sub functions.
+
+    The files are looked up in an index of the folder shared by all instances (see `folderindex`).
+    Parsed files are stored in a columnar cache, such that subsequent loads of unmodified files
+    do not parse the CSV again (see `cache`). Set `cache=False` to always parse the files.
+
+    The files are only loaded when the data is accessed for the first time.
+    usecols: the columns to load, e.g., `BatchIntegration.required_columns()`. By default all columns are loaded.
+    dtype: the dtype of the floating point columns, e.g., `float32`. By default these are `float64`."""
 
-    def __init__(self, folder, files, endswith=".csv", sample_diameter=0.7):
+    def __init__(self, folder, files, endswith=".csv", sample_diameter=0.7, cache=True, usecols=None, dtype=None):
         self.folder = folder
         self.endswith = endswith
-        self.folderfiles = [
-            os.path.join(root, file)
-            for root, dirs, files in os.walk(self.folder)
-            for file in files
-            if file.endswith(self.endswith)
-        ]
+        index = FolderIndex.get(self.folder, self.endswith)
+        self.folderfiles = index.files
         if not type(files) == list:
             raise Exception(f"files must be a list and not {type(files)}")
         self.files = files
-        self.filesfullpath = [
-            file for item in self.files for file in self.folderfiles if item in file
-        ]
-        self._df_list = [pd.read_csv(file) for file in self.filesfullpath]
+        self.filesfullpath = index.find(self.files)
+        self.cache = cache
+        self.usecols = usecols
+        self.dtype = dtype
         self.df_concat = "Can be created with create_concat_df()"
         self.diameter = sample_diameter
 
@@ -33,18 +40,36 @@ class WorkingFiles:
         return self.colnames
 
     @property
-    def df_list(self):
-        _df_list_new = []
-        for df in self._df_list:
-            _df_list_new.append(self.modify_df(df))
+    def _usecols(self):
+        if self.usecols is not None and "current1_muA_geo" in self.usecols:
+            # required to determine the current density in `modify_df`
+            return [*self.usecols, "current1_muA"]
+        return self.usecols
+
+    def _astype(self, df):
+        if self.dtype is None:
+            return df
+        return df.astype({column: self.dtype for column in df.select_dtypes("float").columns})
 
-        return _df_list_new
+    def _read(self, file):
+        return self._astype(read_csv(file, cache=self.cache, usecols=self._usecols))
+
+    @cached_property
+    def _df_list(self):
+        return [self._read(file) for file in self.filesfullpath]
+
+    @cached_property
+    def df_list(self):
+        return [self.modify_df(df) for df in self._df_list]
 
     def modify_df(self, df):
         r"""
         Modifies a Dataframe by adding additional axis,
         such as the current density.
         """
+        if "current1_muA" not in df:
+            return df
+
         df["current1_muA_geo"] = df["current1_muA"] / (
             np.pi * (self.diameter / 2) ** 2
         )
@@ -61,13 +86,39 @@ class WorkingFiles:
 
         if len(self.files) > 1:
 
-            self.df_concat = pd.DataFrame()
-
-            for _, df in enumerate(self.df_list):
-                self.df_concat = pd.concat([self.df_concat, df]).reset_index(drop=True)
+            if not self.df_list:
+                self.df_concat = pd.DataFrame()
+            else:
+                self.df_concat = pd.concat(self.df_list, ignore_index=True)
 
             return self.df_concat
 
+    def iter_dfs(self):
+        r"""
+        Yields the dataframe of each selected file, which are loaded one at a time
+        and are not kept in memory after they have been processed.
+        """
+        if "_df_list" in self.__dict__:
+            yield from self.df_list
+            return
+
+        for file in self.filesfullpath:
+            yield self.modify_df(self._read(file))
+
+    def iter_chunks(self, chunksize=100000):
+        r"""
+        Yields the data of all selected files in dataframes of at most `chunksize` rows,
+        such that even large measurement files can be processed with bounded memory.
+        The index of the chunks is continuous over all files, as in `create_concat_df`.
+        """
+        offset = 0
+        for file in self.filesfullpath:
+            for chunk in iter_csv(file, chunksize, cache=self.cache, usecols=self._usecols):
+                chunk = self.modify_df(self._astype(chunk))
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                yield chunk
+
     def plot(self, x_axis='potential', y_axis="current1_muA_geo"):
         r"""
         Returns a current density vs potential plot.